@@ -1,6 +1,10 @@
-from .pfeiffer_vacuum_protocol import enable_valid_char_filter, disable_valid_char_filter
-from .pfeiffer_vacuum_protocol import ErrorCode, InvalidCharError
+from .pfeiffer_vacuum_protocol import enable_valid_char_filter, disable_valid_char_filter, set_valid_char_filter
+from .pfeiffer_vacuum_protocol import reset_input_buffer
+from .pfeiffer_vacuum_protocol import ErrorCode, GaugeError, InvalidCharError
+from .pfeiffer_vacuum_protocol import DATA_TYPES, PARAMETERS, DataType, Parameter, register_parameter
 from .pfeiffer_vacuum_protocol import (
+    read_parameter,
+    write_parameter,
     read_error_code,
     read_pressure,
     read_gauge_type,
@@ -9,12 +13,34 @@ from .pfeiffer_vacuum_protocol import (
     write_correction_value,
     write_pressure_setpoint,
 )
+from .policy import RetryPolicy
+from .poller import BusPoller, Snapshot
+from .port import Port
+from .registry import PortRegistry
+from .acquisition import MultiPortAcquisition, Record
+from .history import PressureHistory
+from .stream import Sample, stream_pressure, astream_pressure
+from .deadband import DeadbandFilter, Event
+from .scheduler import AdaptiveScheduler, Reading
+from .cache import GaugeCache
+from .singleflight import AsyncSingleFlight, Coalescer, SingleFlight
+from .instrument import Instrumentation, enable_instrumentation, disable_instrumentation
 
 __all__ = [
     "enable_valid_char_filter",
     "disable_valid_char_filter",
+    "set_valid_char_filter",
+    "reset_input_buffer",
     "ErrorCode",
+    "GaugeError",
     "InvalidCharError",
+    "DATA_TYPES",
+    "PARAMETERS",
+    "DataType",
+    "Parameter",
+    "register_parameter",
+    "read_parameter",
+    "write_parameter",
     "read_error_code",
     "read_pressure",
     "read_gauge_type",
@@ -22,4 +48,26 @@ __all__ = [
     "read_software_version",
     "write_correction_value",
     "write_pressure_setpoint",
+    "RetryPolicy",
+    "BusPoller",
+    "Snapshot",
+    "Port",
+    "PortRegistry",
+    "MultiPortAcquisition",
+    "Record",
+    "PressureHistory",
+    "Sample",
+    "stream_pressure",
+    "astream_pressure",
+    "DeadbandFilter",
+    "Event",
+    "AdaptiveScheduler",
+    "Reading",
+    "GaugeCache",
+    "Coalescer",
+    "SingleFlight",
+    "AsyncSingleFlight",
+    "Instrumentation",
+    "enable_instrumentation",
+    "disable_instrumentation",
 ]
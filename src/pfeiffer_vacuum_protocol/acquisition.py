@@ -0,0 +1,182 @@
+import heapq
+import itertools
+import queue
+import threading
+import time
+from collections import namedtuple
+
+from .pfeiffer_vacuum_protocol import InvalidCharError, read_pressure
+from .port import Port
+
+# One reading from a gauge.  `value` is None and `error` holds the exception when the read failed.
+Record = namedtuple("Record", ["timestamp", "port", "addr", "value", "error"])
+
+# Put on the queue by a worker when it exits
+_DONE = object()
+
+
+class MultiPortAcquisition:
+    """
+    Polls gauges on many serial ports at once, with a worker thread per port.
+
+    Each worker walks its gauges calling `reader(s, addr)` and the readings from all ports are merged into a single
+    stream ordered by time with `records`.  Records are queued for `records` until it consumes them, up to
+    `max_queued`, after which new ones are dropped.
+    """
+
+    def __init__(self, ports, addrs, reader=read_pressure, period=None, history=None, max_queued=10000):
+        """
+        :param ports: Port name -> open serial object or `pfeiffer_vacuum_protocol.Port`.
+        :type ports: dict
+        :param addrs: Port name -> addresses of the gauges to poll on that port.
+        :type addrs: dict
+        :param reader: Function reading a value from a gauge, eg `pfeiffer_vacuum_protocol.read_pressure`.
+        :param period: Time between the start of each pass over a port's gauges in seconds, or as fast as possible
+            if None.
+        :type period: float/None
+        :param history: Every record is also written here when given.  Values it can't hold, eg the strings returned by
+            some readers, are counted in `stats` instead.
+        :type history: pfeiffer_vacuum_protocol.history.PressureHistory/None
+        :param max_queued: Most records held for `records`, None for no limit, or 0 when only `history` is used.
+        :type max_queued: int/None
+        """
+        self.ports = {name: s if isinstance(s, Port) else Port(s) for name, s in ports.items()}
+        self.addrs = {name: list(addrs[name]) for name in self.ports}
+        self.reader = reader
+        self.period = period
+        self.history = history
+        self.max_queued = max_queued
+        self.queue = queue.Queue()
+        self.stop_event = threading.Event()
+        self.threads = []
+        self.start_time = None
+
+        # Ports whose worker hasn't been seen exiting by `records` yet
+        self.active = set()
+
+        # Port name -> [reads, errors, records dropped from the queue, records the history couldn't hold]
+        self.counts = {name: [0, 0, 0, 0] for name in self.ports}
+
+    def _worker(self, name):
+        port = self.ports[name]
+        addrs = self.addrs[name]
+        counts = self.counts[name]
+        next_start = time.perf_counter()
+        try:
+            while not self.stop_event.is_set():
+                for addr in addrs:
+                    try:
+                        value = port.transaction(self.reader, addr)
+                        rec = Record(time.time(), name, addr, value, None)
+                    except (ValueError, InvalidCharError, OSError) as e:
+                        rec = Record(time.time(), name, addr, None, e)
+                        counts[1] += 1
+                    counts[0] += 1
+                    if self.history is not None:
+                        try:
+                            self.history.append_record(rec)
+                        except (TypeError, ValueError):
+                            counts[3] += 1
+                    if self.max_queued is None or self.queue.qsize() < self.max_queued:
+                        self.queue.put(rec)
+                    else:
+                        counts[2] += 1
+
+                if self.period is not None:
+                    next_start += self.period
+                    delay = next_start - time.perf_counter()
+                    if delay > 0:
+                        self.stop_event.wait(delay)
+                    else:
+                        next_start = time.perf_counter()
+        finally:
+            self.queue.put((name, _DONE))
+
+    def start(self):
+        """
+        Start a worker thread for every port.  Records left unconsumed by a previous run are dropped.
+        """
+        if self.threads:
+            raise RuntimeError("acquisition already started")
+        self.stop_event.clear()
+        self.queue = queue.Queue()
+        self.active = set(self.ports)
+        self.counts = {name: [0, 0, 0, 0] for name in self.ports}
+        self.start_time = time.perf_counter()
+        for name in self.ports:
+            t = threading.Thread(target=self._worker, args=(name,), name="pfeiffer-acq-{}".format(name), daemon=True)
+            t.start()
+            self.threads.append(t)
+
+    def stop(self):
+        """
+        Ask the workers to finish their current read and wait for them to exit.
+        """
+        self.stop_event.set()
+        for t in self.threads:
+            t.join()
+        self.threads = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+    def records(self, max_delay=0.5):
+        """
+        Generator yielding the records from every port in time order until the acquisition is stopped.
+
+        A record is held back until every port has produced something newer, or it is `max_delay` seconds old, so
+        a port stuck on a timeout delays the stream by at most that long.
+
+        :param max_delay: Longest time a record is held back to wait for slower ports, in seconds.
+        :type max_delay: float
+        """
+        heap = []
+        seq = itertools.count()
+        # Time of the newest record seen from each port, nothing is released for a port that hasn't reported yet
+        latest = {name: float("-inf") for name in self.ports}
+        active = self.active
+
+        while True:
+            try:
+                item = self.queue.get(timeout=min(max_delay, 0.05))
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, Record):
+                heapq.heappush(heap, (item.timestamp, next(seq), item))
+                latest[item.port] = item.timestamp
+            elif item is not None:
+                active.discard(item[0])
+
+            # Release everything older than what the slowest active port has already reported
+            watermark = min((latest[name] for name in active), default=float("inf"))
+            cutoff = max(watermark, time.time() - max_delay)
+            while heap and heap[0][0] <= cutoff:
+                yield heapq.heappop(heap)[2]
+
+            if not active and not heap and self.queue.empty():
+                return
+
+    def stats(self):
+        """
+        Per-port throughput since the acquisition started.
+
+        :returns: Port name -> dict with the number of reads, failed reads, records dropped because the queue was
+            full, records the history couldn't hold, and reads per second
+        :rtype: dict
+        """
+        elapsed = time.perf_counter() - self.start_time if self.start_time is not None else 0.0
+        return {
+            name: {
+                "reads": reads,
+                "errors": errors,
+                "dropped": dropped,
+                "history_errors": history_errors,
+                "rate": reads / elapsed if elapsed > 0 else 0.0,
+            }
+            for name, (reads, errors, dropped, history_errors) in self.counts.items()
+        }
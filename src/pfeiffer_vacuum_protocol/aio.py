@@ -0,0 +1,424 @@
+import asyncio
+
+from . import pfeiffer_vacuum_protocol as _core
+from .pfeiffer_vacuum_protocol import (
+    InvalidCharError,
+    _DATA_DECODERS,
+    _DATA_ENCODERS,
+    _check_response,
+    _filter_chars,
+    _parse_gauge_response,
+    _parse_gauge_response_observed,
+    _resolve_valid_char_filter,
+    _resync,
+    _send_control_command,
+    _send_data_request,
+)
+from .policy import _telegram_lengths
+
+
+class TelegramProtocol(asyncio.Protocol):
+    """
+    asyncio protocol splitting the bytes received from a serial port into carriage return terminated telegrams.
+    """
+
+    def __init__(self):
+        self.transport = None
+        self.rx = bytearray()
+        self.frames = asyncio.Queue()
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def data_received(self, data):
+        self.rx += data
+        while True:
+            end = self.rx.find(b"\r")
+            if end < 0:
+                break
+            self.frames.put_nowait(bytes(self.rx[: end + 1]))
+            del self.rx[: end + 1]
+
+    def connection_lost(self, exc):
+        # Wake up anyone waiting on a telegram
+        self.frames.put_nowait(None)
+
+    def discard(self):
+        """
+        Drop any telegrams or partial telegrams left over from earlier exchanges.
+        """
+        self.rx.clear()
+        while not self.frames.empty():
+            if self.frames.get_nowait() is None:
+                self.frames.put_nowait(None)
+                break
+
+    async def read_frame(self, timeout=None):
+        """
+        Wait for the next telegram.  On timeout, returns whatever partial telegram has been received.
+        """
+        try:
+            frame = await asyncio.wait_for(self.frames.get(), timeout)
+        except asyncio.TimeoutError:
+            frame = bytes(self.rx)
+            self.rx.clear()
+
+        if frame is None:
+            self.frames.put_nowait(None)
+            raise ConnectionError("serial connection lost")
+        return frame
+
+
+class AsyncPort:
+    """
+    An RS485 port used from asyncio.  Request/response exchanges are serialized with a lock because the bus is
+    half-duplex.
+    """
+
+    def __init__(self, transport, protocol, timeout=1.0, valid_char_filter=None):
+        """
+        :param transport: The asyncio transport writing to the serial port.
+        :param protocol: The `TelegramProtocol` receiving from the serial port.
+        :param timeout: Time to wait for each response in seconds.
+        :type timeout: float/None
+        :param valid_char_filter: Default valid character filter setting for requests on this port.
+        :type valid_char_filter: bool/None
+        """
+        self.transport = transport
+        self.protocol = protocol
+        self.timeout = timeout
+        self.valid_char_filter = valid_char_filter
+        self.lock = asyncio.Lock()
+
+    async def _read_telegram(self, timeout, valid_char_filter):
+        # Next telegram with any garbage ahead of its header removed, and the numbers of bytes removed by the valid
+        # character filter and skipped as garbage
+        loop = asyncio.get_running_loop()
+        deadline = None if timeout is None else loop.time() + timeout
+        dropped = skipped = 0
+        while True:
+            frame = await self.protocol.read_frame(None if deadline is None else max(deadline - loop.time(), 0))
+            filtered = _filter_chars(frame, valid_char_filter)
+            start = _resync(filtered)
+            dropped += len(frame) - len(filtered)
+            skipped += start
+            filtered = filtered[start:]
+
+            # Keep waiting if all that came in was garbage
+            if filtered or not frame.endswith(b"\r"):
+                return filtered, dropped, skipped
+
+    def _parse(self, frame, dropped, skipped):
+        inst = _core._instrument
+        if inst is None:
+            return _parse_gauge_response(frame)
+        return _parse_gauge_response_observed(inst, self.transport, frame, dropped, skipped)
+
+    async def _transaction(self, send, addr, param_num, data, valid_char_filter, policy):
+        if valid_char_filter is None:
+            valid_char_filter = self.valid_char_filter
+        valid_char_filter = _resolve_valid_char_filter(valid_char_filter)
+        if policy is None:
+            attempts = 1
+            timeout = self.timeout
+        else:
+            attempts = policy.retries + 1
+            baudrate = getattr(getattr(self.transport, "serial", None), "baudrate", None)
+            timeout = policy.attempt_timeout(baudrate, *_telegram_lengths(data))
+
+        async with self.lock:
+            for attempt in range(attempts):
+                if attempt:
+                    await asyncio.sleep(policy.delay(attempt))
+                self.protocol.discard()
+                send(self.transport)
+                try:
+                    frame, dropped, skipped = await self._read_telegram(timeout, valid_char_filter)
+                except InvalidCharError as e:
+                    inst = _core._instrument
+                    if inst is not None:
+                        inst.response(self.transport, b"", 0, 0, e)
+                    raise
+                try:
+                    return _check_response(self._parse(frame, dropped, skipped), addr, param_num)
+                except ValueError:
+                    if attempt == attempts - 1 or not policy.retryable(frame):
+                        raise
+
+    async def request(self, addr, param_num, valid_char_filter=None, policy=None):
+        """
+        Send a data request and return the data field of the response as a str.
+        """
+        return await self._transaction(
+            lambda t: _send_data_request(t, addr, param_num), addr, param_num, None, valid_char_filter, policy
+        )
+
+    async def command(self, addr, param_num, data, valid_char_filter=None, policy=None):
+        """
+        Send a control command and return the data field acknowledged by the gauge as a str.
+        """
+        return await self._transaction(
+            lambda t: _send_control_command(t, addr, param_num, data), addr, param_num, data, valid_char_filter, policy
+        )
+
+    def close(self):
+        self.transport.close()
+
+
+class MockTransport(asyncio.Transport):
+    """
+    Async adapter around a blocking serial object which answers immediately, like `pfeiffer_vacuum_protocol.mock.Serial`.
+    """
+
+    def __init__(self, s, protocol, loop):
+        super().__init__()
+        self.s = s
+        self.protocol = protocol
+        self.loop = loop
+        self.closing = False
+
+    def write(self, data):
+        self.s.write(data)
+        self.loop.call_soon(self._deliver)
+
+    def _deliver(self):
+        if self.closing:
+            return
+        data = self.s.read(self.s.in_waiting)
+        if data:
+            self.protocol.data_received(data)
+
+    def is_closing(self):
+        return self.closing
+
+    def close(self):
+        if not self.closing:
+            self.closing = True
+            self.loop.call_soon(self.protocol.connection_lost, None)
+
+
+async def open_mock_connection(s, timeout=1.0, valid_char_filter=None):
+    """
+    Wrap a blocking mock serial object for use with the async functions.
+
+    :param s: The mock serial object, eg `pfeiffer_vacuum_protocol.mock.Serial`.
+    :param timeout: Time to wait for each response in seconds.
+    :type timeout: float/None
+    :param valid_char_filter: Default valid character filter setting for requests on this port.
+    :type valid_char_filter: bool/None
+
+    :returns: The port
+    :rtype: pfeiffer_vacuum_protocol.aio.AsyncPort
+    """
+    protocol = TelegramProtocol()
+    transport = MockTransport(s, protocol, asyncio.get_running_loop())
+    protocol.connection_made(transport)
+    return AsyncPort(transport, protocol, timeout=timeout, valid_char_filter=valid_char_filter)
+
+
+async def open_serial_connection(url, timeout=1.0, valid_char_filter=None, **kwargs):
+    """
+    Open a serial port with `pyserial-asyncio`.  Extra keyword arguments are passed on to `serial.Serial`.
+
+    :param url: The name of the serial port, eg "COM1" or "/dev/ttyUSB0".
+    :param timeout: Time to wait for each response in seconds.
+    :type timeout: float/None
+    :param valid_char_filter: Default valid character filter setting for requests on this port.
+    :type valid_char_filter: bool/None
+
+    :returns: The port
+    :rtype: pfeiffer_vacuum_protocol.aio.AsyncPort
+    """
+    try:
+        import serial_asyncio
+    except ImportError:
+        raise ImportError("opening a serial port from asyncio requires the `pyserial-asyncio` package")
+
+    transport, protocol = await serial_asyncio.create_serial_connection(
+        asyncio.get_running_loop(), TelegramProtocol, url, **kwargs
+    )
+    return AsyncPort(transport, protocol, timeout=timeout, valid_char_filter=valid_char_filter)
+
+
+async def read_parameter(port, addr, param_num, valid_char_filter=None, policy=None):
+    """
+    Async version of `pfeiffer_vacuum_protocol.read_parameter`.
+
+    :param port: The port attached to the gauge.
+    :type port: pfeiffer_vacuum_protocol.aio.AsyncPort
+    :param addr: The address of the gauge.
+    :type addr: int
+    :param param_num: The parameter number.
+    :type param_num: int
+    :param valid_char_filter: Manually override the valid character filter.
+    :type valid_char_filter: bool/None
+    :param policy: Timeout and retry policy for the exchange, or None to use the port's timeout.
+    :type policy: pfeiffer_vacuum_protocol.RetryPolicy/None
+
+    :returns: The value decoded according to the parameter's data type
+    """
+    try:
+        decode = _DATA_DECODERS[param_num]
+    except KeyError:
+        raise ValueError("cannot read parameter {:d}".format(param_num)) from None
+    return decode(await port.request(addr, param_num, valid_char_filter, policy))
+
+
+async def write_parameter(port, addr, param_num, val, valid_char_filter=None, policy=None):
+    """
+    Async version of `pfeiffer_vacuum_protocol.write_parameter`.
+
+    :param port: The port attached to the gauge.
+    :type port: pfeiffer_vacuum_protocol.aio.AsyncPort
+    :param addr: The address of the gauge.
+    :type addr: int
+    :param param_num: The parameter number.
+    :type param_num: int
+    :param val: The value, encoded according to the parameter's data type.
+    :param valid_char_filter: Manually override the valid character filter.
+    :type valid_char_filter: bool/None
+    :param policy: Timeout and retry policy for the exchange, or None to use the port's timeout.
+    :type policy: pfeiffer_vacuum_protocol.RetryPolicy/None
+    :returns: None
+    :rtype: None
+    """
+    try:
+        encode = _DATA_ENCODERS[param_num]
+    except KeyError:
+        raise ValueError("cannot write parameter {:d}".format(param_num)) from None
+    data = encode(val)
+    if await port.command(addr, param_num, data, valid_char_filter, policy) != data:
+        raise ValueError("invalid acknowledgment from gauge")
+
+
+async def read_error_code(port, addr, valid_char_filter=None, policy=None):
+    """
+    Async version of `pfeiffer_vacuum_protocol.read_error_code`.
+
+    :param port: The port attached to the gauge.
+    :type port: pfeiffer_vacuum_protocol.aio.AsyncPort
+    :param addr: The address of the gauge.
+    :type addr: int
+    :param valid_char_filter: Manually override the valid character filter.
+    :type valid_char_filter: bool/None
+    :param policy: Timeout and retry policy for the exchange, or None to use the port's timeout.
+    :type policy: pfeiffer_vacuum_protocol.RetryPolicy/None
+
+    :returns: The error code returned by the gauge
+    :rtype: pfeiffer_vacuum_protocol.ErrorCode enum element
+    """
+    return await read_parameter(port, addr, 303, valid_char_filter, policy)
+
+
+async def read_software_version(port, addr, valid_char_filter=None, policy=None):
+    """
+    Async version of `pfeiffer_vacuum_protocol.read_software_version`.
+
+    :param port: The port attached to the gauge.
+    :type port: pfeiffer_vacuum_protocol.aio.AsyncPort
+    :param addr: The address of the gauge.
+    :type addr: int
+    :param valid_char_filter: Manually override the valid character filter.
+    :type valid_char_filter: bool/None
+    :param policy: Timeout and retry policy for the exchange, or None to use the port's timeout.
+    :type policy: pfeiffer_vacuum_protocol.RetryPolicy/None
+
+    :returns: The version numbers as the tuple (major, minor, sub-minor)
+    """
+    return await read_parameter(port, addr, 312, valid_char_filter, policy)
+
+
+async def read_gauge_type(port, addr, valid_char_filter=None, policy=None):
+    """
+    Async version of `pfeiffer_vacuum_protocol.read_gauge_type`.
+
+    :param port: The port attached to the gauge.
+    :type port: pfeiffer_vacuum_protocol.aio.AsyncPort
+    :param addr: The address of the gauge.
+    :type addr: int
+    :param valid_char_filter: Manually override the valid character filter.
+    :type valid_char_filter: bool/None
+    :param policy: Timeout and retry policy for the exchange, or None to use the port's timeout.
+    :type policy: pfeiffer_vacuum_protocol.RetryPolicy/None
+
+    :returns: The model name of the gauge attached
+    :rtype: str
+    """
+    return await read_parameter(port, addr, 349, valid_char_filter, policy)
+
+
+async def read_pressure(port, addr, valid_char_filter=None, policy=None):
+    """
+    Async version of `pfeiffer_vacuum_protocol.read_pressure`.
+
+    :param port: The port attached to the gauge.
+    :type port: pfeiffer_vacuum_protocol.aio.AsyncPort
+    :param addr: The address of the gauge.
+    :type addr: int
+    :param valid_char_filter: Manually override the valid character filter.
+    :type valid_char_filter: bool/None
+    :param policy: Timeout and retry policy for the exchange, or None to use the port's timeout.
+    :type policy: pfeiffer_vacuum_protocol.RetryPolicy/None
+
+    :returns: Pressure measured by gauge in bars
+    :rtype: float
+    """
+    return await read_parameter(port, addr, 740, valid_char_filter, policy)
+
+
+async def write_pressure_setpoint(port, addr, val, valid_char_filter=None, policy=None):
+    """
+    Async version of `pfeiffer_vacuum_protocol.write_pressure_setpoint`.
+
+    :param port: The port attached to the gauge.
+    :type port: pfeiffer_vacuum_protocol.aio.AsyncPort
+    :param addr: The address of the gauge.
+    :type addr: int
+    :param val: The setpoint
+    :type val: int
+    :param valid_char_filter: Manually override the valid character filter.
+    :type valid_char_filter: bool/None
+    :param policy: Timeout and retry policy for the exchange, or None to use the port's timeout.
+    :type policy: pfeiffer_vacuum_protocol.RetryPolicy/None
+    :returns: None
+    :rtype: None
+    """
+    await write_parameter(port, addr, 741, val, valid_char_filter, policy)
+
+
+async def read_correction_value(port, addr, valid_char_filter=None, policy=None):
+    """
+    Async version of `pfeiffer_vacuum_protocol.read_correction_value`.
+
+    :param port: The port attached to the gauge.
+    :type port: pfeiffer_vacuum_protocol.aio.AsyncPort
+    :param addr: The address of the gauge.
+    :type addr: int
+    :param valid_char_filter: Manually override the valid character filter.
+    :type valid_char_filter: bool/None
+    :param policy: Timeout and retry policy for the exchange, or None to use the port's timeout.
+    :type policy: pfeiffer_vacuum_protocol.RetryPolicy/None
+
+    :returns: The current correction value
+    """
+    return await read_parameter(port, addr, 742, valid_char_filter, policy)
+
+
+async def write_correction_value(port, addr, val, valid_char_filter=None, policy=None):
+    """
+    Async version of `pfeiffer_vacuum_protocol.write_correction_value`.
+
+    :param port: The port attached to the gauge.
+    :type port: pfeiffer_vacuum_protocol.aio.AsyncPort
+    :param addr: The address of the gauge.
+    :type addr: int
+    :param val: The value it will be set to
+    :type val: float
+    :param valid_char_filter: Manually override the valid character filter.
+    :type valid_char_filter: bool/None
+    :param policy: Timeout and retry policy for the exchange, or None to use the port's timeout.
+    :type policy: pfeiffer_vacuum_protocol.RetryPolicy/None
+    :returns: None
+    :rtype: None
+    """
+    await write_parameter(port, addr, 742, val, valid_char_filter, policy)
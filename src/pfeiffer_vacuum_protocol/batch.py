@@ -0,0 +1,172 @@
+import math
+from array import array
+from collections import namedtuple
+
+from .pfeiffer_vacuum_protocol import _ERROR_RESPONSES, _decode_correction_value, _decode_pressure
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, telegrams are decoded one at a time without it
+    np = None
+else:
+    # The powers of ten a double holds exactly
+    _POW10 = np.array([float(10**k) for k in range(23)])
+
+# Decoded telegrams, one element per telegram.  `value` holds the pressure (740) or correction value (742) carried by
+# responses and control commands, and is NaN for requests and other parameters.  The other fields are zero where
+# `valid` is false.  `consumed` is the number of bytes of input used, trailing bytes without a terminator are left for
+# the next batch.
+BatchResult = namedtuple("BatchResult", ["addr", "action", "param", "value", "valid", "consumed"])
+
+# Parameters with numerical values decoded in the batch, all use a six character data field
+_VALUE_DECODERS = {740: _decode_pressure, 742: _decode_correction_value}
+
+
+def _decode_one(frame):
+    # Returns (addr, action, param, value) or None if the telegram is bad
+    if len(frame) < 14 or frame[-1] != 13 or not frame[:10].isdigit() or not frame[-4:-1].isdigit():
+        return None
+    if int(frame[-4:-1]) != sum(frame[:-4]) % 256 or int(frame[8:10]) != len(frame) - 14:
+        return None
+
+    action = int(frame[3:4])
+    param = int(frame[5:8])
+    data = frame[10:-4]
+    if data in _ERROR_RESPONSES:
+        return None
+
+    # Only responses and control commands carry a value, requests have "=?" as data
+    value = math.nan
+    if action == 1 and param in _VALUE_DECODERS:
+        if len(data) != 6 or not data.isdigit():
+            return None
+        value = _VALUE_DECODERS[param](data.decode("ascii"))
+    return int(frame[:3]), action, param, value
+
+
+def _decode_python(frames, consumed):
+    addr, action, param, value, valid = array("i"), array("b"), array("i"), array("d"), array("b")
+    for frame in frames:
+        r = _decode_one(frame)
+        valid.append(r is not None)
+        if r is None:
+            r = (0, 0, 0, math.nan)
+        addr.append(r[0])
+        action.append(r[1])
+        param.append(r[2])
+        value.append(r[3])
+    return BatchResult(addr, action, param, value, valid, consumed)
+
+
+def _np_number(d, cols):
+    # Combine columns of decimal digits into integers
+    n = np.zeros(d.shape[0], dtype=np.int64)
+    for c in cols:
+        n = n * 10 + d[:, c]
+    return n
+
+
+def _np_pressure(mantissa, exponent):
+    # Vectorized _decode_pressure.  Powers of ten up to 1e22 are exact in a double, so scaling by one of them rounds
+    # once like the exact integer arithmetic of the scalar decoder.  The rare values outside that range use it directly.
+    value = np.empty(len(mantissa))
+    exponent = exponent - 26
+    up = (exponent >= 0) & (exponent < len(_POW10))
+    down = (exponent < 0) & (-exponent < len(_POW10))
+    value[up] = mantissa[up] * _POW10[exponent[up]]
+    value[down] = mantissa[down] / _POW10[-exponent[down]]
+    rest = np.flatnonzero(~(up | down))
+    value[rest] = [_decode_pressure("{:04d}{:02d}".format(mantissa[i], exponent[i] + 26)) for i in rest]
+    return value
+
+
+def _np_decode_rows(rows):
+    n, w = rows.shape
+    if w < 14:
+        z = np.zeros(n, dtype=np.int64)
+        return z, z, z, np.full(n, np.nan), np.zeros(n, dtype=bool)
+
+    d = rows.astype(np.int64) - 48
+    is_digit = (d >= 0) & (d <= 9)
+    valid = (rows[:, -1] == 13) & is_digit[:, :10].all(axis=1) & is_digit[:, -4:-1].all(axis=1)
+    valid &= _np_number(d, range(8, 10)) == w - 14
+    valid &= rows[:, :-4].sum(axis=1, dtype=np.int64) % 256 == _np_number(d, range(w - 4, w - 1))
+
+    data = rows[:, 10:-4]
+    for code in _ERROR_RESPONSES:
+        if len(code) == w - 14:
+            valid &= ~(data == np.frombuffer(code, dtype=np.uint8)).all(axis=1)
+
+    addr = _np_number(d, range(0, 3))
+    action = d[:, 3]
+    param = _np_number(d, range(5, 8))
+
+    # Numerical values, vectorized versions of the decoders in _VALUE_DECODERS
+    value = np.full(n, np.nan)
+    has_value = (action == 1) & ((param == 740) | (param == 742))
+    if w == 20:
+        valid &= ~has_value | is_digit[:, 10:16].all(axis=1)
+        sel = valid & has_value & (param == 740)
+        value[sel] = _np_pressure(_np_number(d[sel], range(10, 14)), _np_number(d[sel], range(14, 16)))
+        sel = valid & has_value & (param == 742)
+        value[sel] = _np_number(d[sel], range(10, 16)) / 100
+    else:
+        valid &= ~has_value
+
+    value[~valid] = np.nan
+    return np.where(valid, addr, 0), np.where(valid, action, 0), np.where(valid, param, 0), value, valid
+
+
+def _decode_numpy(buf, width):
+    if width is not None:
+        n = len(buf) // width
+        return BatchResult(*_np_decode_rows(buf[: n * width].reshape(n, width)), n * width)
+
+    ends = np.flatnonzero(buf == 13)
+    n = len(ends)
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    lengths = ends - starts + 1
+    addr = np.zeros(n, dtype=np.int64)
+    action = np.zeros(n, dtype=np.int64)
+    param = np.zeros(n, dtype=np.int64)
+    value = np.full(n, np.nan)
+    valid = np.zeros(n, dtype=bool)
+
+    # Decode telegrams of the same length together
+    for length in np.unique(lengths):
+        idx = np.flatnonzero(lengths == length)
+        rows = buf[starts[idx, None] + np.arange(length)]
+        addr[idx], action[idx], param[idx], value[idx], valid[idx] = _np_decode_rows(rows)
+    return BatchResult(addr, action, param, value, valid, int(ends[-1]) + 1 if n else 0)
+
+
+def decode_batch(data, width=None):
+    """
+    Decode many telegrams at once, eg from captured bus traffic.  Bad telegrams are marked in the `valid` mask instead
+    of raising exceptions.
+
+    Decoding is vectorized with numpy when it is installed and the fields are returned as numpy arrays.  Otherwise,
+    each telegram is decoded in turn and `array.array` is returned.
+
+    :param data: Carriage return terminated telegrams back to back.  With numpy, a 2D uint8 array of fixed width
+        telegrams is also accepted.
+    :type data: bytes
+    :param width: If given, `data` is split every `width` bytes instead of at the terminators.
+    :type width: int/None
+
+    :returns: The decoded fields and mask of valid telegrams
+    :rtype: pfeiffer_vacuum_protocol.batch.BatchResult
+    """
+    if np is not None:
+        if isinstance(data, np.ndarray) and data.ndim == 2:
+            return BatchResult(*_np_decode_rows(data.astype(np.uint8, copy=False)), data.size)
+        return _decode_numpy(np.frombuffer(data, dtype=np.uint8), width)
+
+    data = bytes(data)
+    if width is not None:
+        n = len(data) // width
+        return _decode_python([data[i * width : (i + 1) * width] for i in range(n)], n * width)
+
+    consumed = data.rfind(b"\r") + 1
+    frames = [x + b"\r" for x in data[:consumed].split(b"\r")[:-1]]
+    return _decode_python(frames, consumed)
@@ -0,0 +1,182 @@
+"""
+Throughput and latency benchmarks of the protocol hot path against the mock gauge.
+
+Run with `python -m pfeiffer_vacuum_protocol.benchmark`.
+"""
+
+import argparse
+import sys
+import time
+import tracemalloc
+from collections import namedtuple
+
+from . import mock
+from .pfeiffer_vacuum_protocol import (
+    read_correction_value,
+    read_error_code,
+    read_gauge_type,
+    read_pressure,
+    read_software_version,
+    write_correction_value,
+    write_pressure_setpoint,
+)
+from .batch import decode_batch
+from .poller import BusPoller
+
+# A benchmark scenario.  `setup(timing)` builds a fresh mock port and returns the function to time.  Each call of that
+# function exchanges `telegrams` request/response pairs with the mock.
+Scenario = namedtuple("Scenario", ["name", "telegrams", "setup"])
+
+# Timing results for a scenario, latencies are per call in microseconds
+Result = namedtuple("Result", ["name", "calls", "telegrams_per_sec", "p50", "p90", "p99", "max", "alloc_bytes"])
+
+
+def _port(nonascii=False, timing=None):
+    return mock.Serial(mock.PPT100(nonascii=nonascii), "COM1", timeout=1, timing=timing)
+
+
+def _call(fn, *args, nonascii=False, **kwargs):
+    def setup(timing=None):
+        s = _port(nonascii, timing)
+        return lambda: fn(s, *args, **kwargs)
+
+    return setup
+
+
+def _sweep(n_addrs, n_dead=0, depth=1):
+    # Gauges at the last `n_dead` addresses never answer
+    def setup(timing=None):
+        bus = mock.Bus([mock.PPT100(address=a, silent=a > n_addrs - n_dead) for a in range(1, n_addrs + 1)])
+        s = mock.Serial(bus, "COM1", timeout=1, timing=timing)
+        return BusPoller(s, range(1, n_addrs + 1), [740], timeout=0.05, depth=depth).sweep
+
+    return setup
+
+
+def _decode_batch(n):
+    def setup(timing=None):
+        blob = b"0011074006100023025\r" * n
+        return lambda: decode_batch(blob)
+
+    return setup
+
+
+SCENARIOS = [
+    Scenario("read_pressure", 1, _call(read_pressure, 1)),
+    Scenario("read_pressure_nonascii", 1, _call(read_pressure, 1, nonascii=True, valid_char_filter=True)),
+    Scenario("read_error_code", 1, _call(read_error_code, 1)),
+    Scenario("read_gauge_type", 1, _call(read_gauge_type, 1)),
+    Scenario("read_software_version", 1, _call(read_software_version, 1)),
+    Scenario("read_correction_value", 1, _call(read_correction_value, 1)),
+    Scenario("write_correction_value", 1, _call(write_correction_value, 1, 1.0)),
+    Scenario("write_pressure_setpoint", 1, _call(write_pressure_setpoint, 1, 1)),
+    Scenario("sweep_64_addrs", 64, _sweep(64)),
+    Scenario("sweep_200_addrs", 200, _sweep(200)),
+    Scenario("sweep_64_addrs_8_dead", 64, _sweep(64, n_dead=8)),
+    Scenario("sweep_64_addrs_pipelined", 64, _sweep(64, depth=2)),
+    Scenario("decode_batch_1000", 1000, _decode_batch(1000)),
+]
+
+
+def _percentile(sorted_vals, q):
+    return sorted_vals[min(int(q * len(sorted_vals)), len(sorted_vals) - 1)]
+
+
+def run_scenario(scenario, calls=10000, warmup=100, timing=None):
+    """
+    Time a scenario.
+
+    :param scenario: The scenario to run.
+    :type scenario: pfeiffer_vacuum_protocol.benchmark.Scenario
+    :param calls: Number of timed calls.
+    :type calls: int
+    :param warmup: Number of untimed calls made first.
+    :type warmup: int
+    :param timing: Timing model for the mock port, or None for instant responses.
+    :type timing: pfeiffer_vacuum_protocol.mock.Timing/None
+
+    :returns: The throughput, latency percentiles and peak bytes allocated per call
+    :rtype: pfeiffer_vacuum_protocol.benchmark.Result
+    """
+    fn = scenario.setup(timing)
+    for _ in range(warmup):
+        fn()
+
+    # Latency and throughput, without tracing slowing things down
+    perf_counter = time.perf_counter
+    latencies = []
+    start = perf_counter()
+    for _ in range(calls):
+        t0 = perf_counter()
+        fn()
+        latencies.append(perf_counter() - t0)
+    elapsed = perf_counter() - start
+    latencies.sort()
+
+    # Memory allocated while making a call, averaged over a smaller number of calls
+    n_alloc = max(min(calls // 10, 1000), 1)
+    tracemalloc.start()
+    try:
+        total = 0
+        for _ in range(n_alloc):
+            base, _ = tracemalloc.get_traced_memory()
+            tracemalloc.reset_peak()
+            fn()
+            total += tracemalloc.get_traced_memory()[1] - base
+    finally:
+        tracemalloc.stop()
+
+    return Result(
+        scenario.name,
+        calls,
+        calls * scenario.telegrams / elapsed,
+        _percentile(latencies, 0.5) * 1e6,
+        _percentile(latencies, 0.9) * 1e6,
+        _percentile(latencies, 0.99) * 1e6,
+        latencies[-1] * 1e6,
+        total / n_alloc,
+    )
+
+
+def format_results(results):
+    """
+    Format benchmark results as a text table.
+    """
+    lines = [
+        "{:<26s}{:>10s}{:>14s}{:>10s}{:>10s}{:>10s}{:>10s}{:>12s}".format(
+            "scenario", "calls", "telegrams/s", "p50 us", "p90 us", "p99 us", "max us", "alloc B"
+        )
+    ]
+    for r in results:
+        lines.append(
+            "{:<26s}{:>10d}{:>14.0f}{:>10.1f}{:>10.1f}{:>10.1f}{:>10.1f}{:>12.0f}".format(
+                r.name, r.calls, r.telegrams_per_sec, r.p50, r.p90, r.p99, r.max, r.alloc_bytes
+            )
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None, out=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--calls", type=int, default=10000, help="timed calls per scenario")
+    parser.add_argument("-k", "--filter", default="", help="only run scenarios with this substring in their name")
+    parser.add_argument(
+        "--wire",
+        action="store_true",
+        help="simulate 9600 baud wire timing, use with a small number of calls",
+    )
+    parser.add_argument("--latency", type=float, default=0.0, help="simulated adapter latency in ms with --wire")
+    args = parser.parse_args(argv)
+
+    timing = mock.Timing(adapter_latency=args.latency / 1000) if args.wire else None
+    results = [
+        run_scenario(x, calls=args.calls, warmup=min(args.calls, 100), timing=timing)
+        for x in SCENARIOS
+        if args.filter in x.name
+    ]
+    print(format_results(results), file=out or sys.stdout)
+    return results
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import threading
+import time
+
+from .pfeiffer_vacuum_protocol import (
+    GaugeError,
+    InvalidCharError,
+    _DATA_DECODERS,
+    _DATA_ENCODERS,
+    _command,
+    _request,
+)
+from .port import Port
+
+# Default time to live of cached values by parameter number, in seconds.  Zero disables caching.
+DEFAULT_TTLS = {
+    303: 1.0,  # Error code
+    312: 3600.0,  # Software version
+    349: 3600.0,  # Gauge type
+    740: 0.0,  # Pressure
+    742: 60.0,  # Correction value
+}
+
+
+class GaugeCache:
+    """
+    Read-through cache in front of the gauges on a port, for values that rarely change.
+
+    Every parameter has its own time to live.  Values written with `write_correction_value` are cached as soon as the
+    gauge acknowledges them.  When a gauge stops answering or its replies are garbled, eg because it was unplugged,
+    all its cached values are dropped so they're read fresh once it's back.  A gauge that answers with an error code
+    keeps them.
+    """
+
+    def __init__(self, s, ttls=None, valid_char_filter=None):
+        """
+        :param s: The open serial device attached to the gauges, or a `pfeiffer_vacuum_protocol.Port`.
+        :param ttls: Parameter number -> time to live in seconds, overriding `DEFAULT_TTLS`.
+        :type ttls: dict/None
+        :param valid_char_filter: Default valid character filter setting for reads through the cache.
+        :type valid_char_filter: bool/None
+        """
+        self.port = s if isinstance(s, Port) else Port(s, valid_char_filter=valid_char_filter)
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls is not None:
+            self.ttls.update(ttls)
+        self.lock = threading.Lock()
+
+        # (addr, param_num) -> (expiry time, value)
+        self.entries = {}
+        # Bumped whenever entries are dropped or written, so a read that raced a write doesn't cache a stale value
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _put(self, addr, param_num, value, generation=None):
+        # Store a value, unless `generation` is given and entries were dropped or written since
+        ttl = self.ttls.get(param_num, 0.0)
+        if ttl > 0:
+            with self.lock:
+                if generation is None:
+                    self.generation += 1
+                elif generation != self.generation:
+                    return
+                self.entries[(addr, param_num)] = (time.monotonic() + ttl, value)
+
+    def _evict_gauge(self, addr):
+        with self.lock:
+            keys = [key for key in self.entries if key[0] == addr]
+            for key in keys:
+                del self.entries[key]
+            self.evictions += len(keys)
+            self.generation += 1
+
+    def _exchange(self, addr, fn, *args, **kwargs):
+        # Returns the data field of the response.  Only failures to get a valid telegram back evict the gauge.
+        try:
+            return self.port.transaction(fn, addr, *args, **kwargs)
+        except GaugeError:
+            raise
+        except (ValueError, InvalidCharError):
+            self._evict_gauge(addr)
+            raise
+
+    def read_parameter(self, addr, param_num, valid_char_filter=None, policy=None):
+        """
+        See `pfeiffer_vacuum_protocol.read_parameter`.
+        """
+        try:
+            decode = _DATA_DECODERS[param_num]
+        except KeyError:
+            raise ValueError("cannot read parameter {:d}".format(param_num)) from None
+
+        generation = None
+        if self.ttls.get(param_num, 0.0) > 0:
+            with self.lock:
+                entry = self.entries.get((addr, param_num))
+                if entry is not None and entry[0] > time.monotonic():
+                    self.hits += 1
+                    return entry[1]
+                self.misses += 1
+                generation = self.generation
+
+        value = decode(self._exchange(addr, _request, param_num, valid_char_filter=valid_char_filter, policy=policy))
+        if generation is not None:
+            self._put(addr, param_num, value, generation)
+        return value
+
+    def invalidate(self, addr=None, param_num=None):
+        """
+        Drop cached values.  With no arguments the whole cache is cleared.
+
+        :param addr: Only drop values from this gauge.
+        :type addr: int/None
+        :param param_num: Only drop this parameter.
+        :type param_num: int/None
+        """
+        with self.lock:
+            self.generation += 1
+            for key in list(self.entries):
+                if (addr is None or key[0] == addr) and (param_num is None or key[1] == param_num):
+                    del self.entries[key]
+
+    def stats(self):
+        """
+        :returns: dict with the number of cache hits, misses, entries dropped because their gauge failed, and
+            entries currently held
+        :rtype: dict
+        """
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "entries": len(self.entries),
+            }
+
+    def write_parameter(self, addr, param_num, val, valid_char_filter=None, policy=None):
+        """
+        See `pfeiffer_vacuum_protocol.write_parameter`.  The value is cached once the gauge acknowledges it.
+        """
+        try:
+            encode = _DATA_ENCODERS[param_num]
+        except KeyError:
+            raise ValueError("cannot write parameter {:d}".format(param_num)) from None
+        data = encode(val)
+
+        # Drop the old value first so a failed write can't leave it behind
+        self.invalidate(addr, param_num)
+        rdata = self._exchange(addr, _command, param_num, data, valid_char_filter=valid_char_filter, policy=policy)
+        if rdata != data:
+            raise ValueError("invalid acknowledgment from gauge")
+
+        # Cache what the gauge stored, after rounding by the encoder
+        if param_num in _DATA_DECODERS:
+            self._put(addr, param_num, _DATA_DECODERS[param_num](data))
+
+    def read_error_code(self, addr, valid_char_filter=None, policy=None):
+        return self.read_parameter(addr, 303, valid_char_filter, policy)
+
+    def read_software_version(self, addr, valid_char_filter=None, policy=None):
+        return self.read_parameter(addr, 312, valid_char_filter, policy)
+
+    def read_gauge_type(self, addr, valid_char_filter=None, policy=None):
+        return self.read_parameter(addr, 349, valid_char_filter, policy)
+
+    def read_pressure(self, addr, valid_char_filter=None, policy=None):
+        return self.read_parameter(addr, 740, valid_char_filter, policy)
+
+    def write_pressure_setpoint(self, addr, val, valid_char_filter=None, policy=None):
+        return self.write_parameter(addr, 741, val, valid_char_filter, policy)
+
+    def read_correction_value(self, addr, valid_char_filter=None, policy=None):
+        return self.read_parameter(addr, 742, valid_char_filter, policy)
+
+    def write_correction_value(self, addr, val, valid_char_filter=None, policy=None):
+        return self.write_parameter(addr, 742, val, valid_char_filter, policy)
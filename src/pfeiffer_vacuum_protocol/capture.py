@@ -0,0 +1,281 @@
+import bisect
+import mmap
+import struct
+import time
+from collections import namedtuple
+
+# A capture is two files.  The data file starts with `MAGIC` followed by one record per telegram, a `RECORD` header
+# (timestamp, direction, length) and the raw bytes.  The index file, at the same path plus ".idx", has a fixed size
+# `INDEX` entry (timestamp, offset of the record, address, parameter number, direction) per telegram so captures can be
+# searched without touching the data.
+MAGIC = b"PVPCAP01"
+RECORD = struct.Struct("<dBH")
+INDEX = struct.Struct("<dQHHB3x")
+
+# Direction of a telegram
+TX, RX = 0, 1
+
+# Address and parameter number of telegrams that couldn't be parsed
+UNKNOWN = 0xFFFF
+
+# A telegram from a capture.  `data` is a memoryview into the memory-mapped file.
+CapturedTelegram = namedtuple("CapturedTelegram", ["timestamp", "direction", "addr", "param", "data"])
+
+
+def _header_fields(frame):
+    if len(frame) >= 8 and frame[:8].isdigit():
+        return int(frame[:3]), int(frame[5:8])
+    return UNKNOWN, UNKNOWN
+
+
+class CaptureSerial:
+    """
+    Wraps a serial object and records every telegram written to or read from it.  All other attributes, eg `timeout`,
+    are read from and set on the wrapped object.
+    """
+
+    # Attributes of the wrapper itself
+    _OWN = frozenset(("s", "path", "data_file", "index_file", "rx"))
+
+    def __init__(self, s, path):
+        """
+        :param s: The serial object to record, eg from pySerial or `pfeiffer_vacuum_protocol.mock.Serial`.
+        :param path: The capture data file, appended to if it exists.
+        :type path: str
+        """
+        self.s = s
+        self.path = path
+        self.data_file = open(path, "ab")
+        self.index_file = open(path + ".idx", "ab")
+        if self.data_file.tell() == 0:
+            self.data_file.write(MAGIC)
+        self.rx = bytearray()
+
+    def __getattr__(self, name):
+        return getattr(self.s, name)
+
+    def __setattr__(self, name, value):
+        if name in self._OWN:
+            object.__setattr__(self, name, value)
+        else:
+            setattr(self.s, name, value)
+
+    def _record(self, direction, frame):
+        offset = self.data_file.tell()
+        t = time.time()
+        addr, param = _header_fields(frame)
+        self.data_file.write(RECORD.pack(t, direction, len(frame)))
+        self.data_file.write(frame)
+        self.index_file.write(INDEX.pack(t, offset, addr, param, direction))
+
+    def write(self, data):
+        data = bytes(data)
+        start = 0
+        while start < len(data):
+            end = data.find(b"\r", start)
+            end = len(data) if end < 0 else end + 1
+            self._record(TX, data[start:end])
+            start = end
+        return self.s.write(data)
+
+    def read(self, size=1):
+        data = self.s.read(size)
+        self.rx += data
+        while True:
+            end = self.rx.find(b"\r")
+            if end < 0:
+                break
+            self._record(RX, bytes(self.rx[: end + 1]))
+            del self.rx[: end + 1]
+        return data
+
+    def _record_partial(self):
+        # Record bytes read without a terminator as they are
+        if self.rx:
+            self._record(RX, bytes(self.rx))
+            self.rx.clear()
+
+    def reset_input_buffer(self):
+        self._record_partial()
+        if hasattr(self.s, "reset_input_buffer"):
+            self.s.reset_input_buffer()
+
+    def flush(self):
+        self.data_file.flush()
+        self.index_file.flush()
+        if hasattr(self.s, "flush"):
+            self.s.flush()
+
+    def close(self):
+        """
+        Close the capture files and the wrapped serial object.
+        """
+        self._record_partial()
+        self.data_file.close()
+        self.index_file.close()
+        if hasattr(self.s, "close"):
+            self.s.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class _IndexTimestamps:
+    # Sequence view of the index timestamps for bisect
+    def __init__(self, index):
+        self.index = index
+
+    def __len__(self):
+        return len(self.index) // INDEX.size
+
+    def __getitem__(self, i):
+        return INDEX.unpack_from(self.index, i * INDEX.size)[0]
+
+
+def _map(path):
+    with open(path, "rb") as f:
+        size = f.seek(0, 2)
+        if size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+class CaptureReader:
+    """
+    Memory-mapped read access to a capture.
+    """
+
+    def __init__(self, path):
+        """
+        :param path: The capture data file.
+        :type path: str
+        """
+        self.data = _map(path)
+        if self.data[: len(MAGIC)] != MAGIC:
+            raise ValueError("not a capture file: {}".format(path))
+        self.index = _map(path + ".idx")
+        self.view = memoryview(self.data)
+
+    def __len__(self):
+        return len(self.index) // INDEX.size
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        t, offset, addr, param, direction = INDEX.unpack_from(self.index, i * INDEX.size)
+        _, _, length = RECORD.unpack_from(self.data, offset)
+        start = offset + RECORD.size
+        return CapturedTelegram(t, direction, addr, param, self.view[start : start + length])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def select(self, start=None, end=None, addr=None, param=None, direction=None):
+        """
+        Generator over the telegrams matching all of the given conditions.  The time range is found by a binary
+        search of the index, telegrams outside it are never read.
+
+        :param start: Earliest timestamp, inclusive.
+        :type start: float/None
+        :param end: Latest timestamp, exclusive.
+        :type end: float/None
+        :param addr: Only telegrams to or from this address.
+        :type addr: int/None
+        :param param: Only telegrams with this parameter number.
+        :type param: int/None
+        :param direction: Only sent (`TX`) or received (`RX`) telegrams.
+        :type direction: int/None
+        """
+        times = _IndexTimestamps(self.index)
+        lo = 0 if start is None else bisect.bisect_left(times, start)
+        hi = len(self) if end is None else bisect.bisect_left(times, end)
+        for i in range(lo, hi):
+            _, _, i_addr, i_param, i_direction = INDEX.unpack_from(self.index, i * INDEX.size)
+            if addr is not None and i_addr != addr:
+                continue
+            if param is not None and i_param != param:
+                continue
+            if direction is not None and i_direction != direction:
+                continue
+            yield self[i]
+
+    def close(self):
+        """
+        Unmap the capture.  If views returned by the reader are still alive, the mapping is left for the garbage
+        collector instead.
+        """
+        try:
+            self.view.release()
+            for m in (self.data, self.index):
+                if isinstance(m, mmap.mmap):
+                    m.close()
+        except BufferError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class ReplaySerial:
+    """
+    Serial port replaying a capture, for running recorded sessions through `read_pressure` and friends.
+
+    Each write is matched to the next recorded request with the same bytes, and the responses recorded after that
+    request become available to read.
+    """
+
+    def __init__(self, reader):
+        """
+        :param reader: The capture to replay.
+        :type reader: pfeiffer_vacuum_protocol.capture.CaptureReader
+        """
+        self.reader = reader
+        self.pos = 0
+        self.buffer = b""
+        self.timeout = None
+
+    def write(self, data):
+        data = bytes(data)
+        n = len(self.reader)
+
+        # Find the request in the recording
+        while self.pos < n:
+            rec = self.reader[self.pos]
+            self.pos += 1
+            if rec.direction == TX and rec.data == data:
+                break
+        else:
+            return len(data)
+
+        # Everything received until the next request is the response
+        while self.pos < n:
+            rec = self.reader[self.pos]
+            if rec.direction == TX:
+                break
+            self.buffer += rec.data
+            self.pos += 1
+        return len(data)
+
+    def read(self, size=1):
+        ret = self.buffer[:size]
+        self.buffer = self.buffer[size:]
+        return ret
+
+    @property
+    def in_waiting(self):
+        return len(self.buffer)
+
+    def reset_input_buffer(self):
+        self.buffer = b""
+
+    def close(self):
+        pass
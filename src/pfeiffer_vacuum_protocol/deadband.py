@@ -0,0 +1,166 @@
+import math
+from array import array
+from collections import namedtuple
+
+from .acquisition import Record
+from .poller import Snapshot
+from .scheduler import Reading
+from .stream import Sample
+
+# A reading let through by a `DeadbandFilter`.  `reason` is "first", "change", "heartbeat" or "error", and
+# `suppressed` counts the readings of the same gauge and parameter dropped since the previous event.  `param` is None
+# for records of a `MultiPortAcquisition`, whose reader isn't known.
+Event = namedtuple("Event", ["timestamp", "port", "addr", "param", "value", "error", "reason", "suppressed"])
+
+_MISSING = object()
+
+
+class DeadbandFilter:
+    """
+    Turns a stream of readings into a stream of events, one per reading that differs from the last event of its gauge
+    by more than a deadband.
+
+    A numeric value passes when it moves more than the wider of `absolute` and `relative` times the last value passed,
+    so for pressures spanning decades the relative band does the work and the absolute band stops noise near zero from
+    getting through.  Other values pass whenever they change.  A gauge that starts failing passes its first error, and
+    its first good reading after that.  With a `heartbeat`, a reading also passes when that many seconds went by since
+    the last event of its gauge, so consumers can tell a quiet gauge from a dead stream.
+
+    Time is taken from the readings, so a recorded stream filters the same as a live one.  The state of each (port,
+    address, parameter) is one slot in flat arrays.
+    """
+
+    def __init__(self, absolute=0.0, relative=0.0, heartbeat=None):
+        """
+        :param absolute: Smallest change passed, in the units of the value.
+        :type absolute: float
+        :param relative: Smallest change passed as a fraction of the last value passed, eg 0.05 for 5%.
+        :type relative: float
+        :param heartbeat: Longest time between two events of a gauge in seconds, or None for no heartbeat.
+        :type heartbeat: float/None
+        """
+        if absolute < 0 or relative < 0:
+            raise ValueError("deadband must not be negative")
+        if heartbeat is not None and heartbeat <= 0:
+            raise ValueError("heartbeat must be positive")
+        self.absolute = absolute
+        self.relative = relative
+        self.heartbeat = heartbeat
+
+        # (port, addr, param) -> slot in the arrays below, holding the value and time of the last event, the number
+        # of readings suppressed since, and whether the last event was an error.  Values that aren't numbers are kept
+        # in `others` by slot instead.
+        self.slots = {}
+        self.values = array("d")
+        self.times = array("d")
+        self.suppressed = array("L")
+        self.failing = array("b")
+        self.others = {}
+
+        self.readings = 0
+        self.events = 0
+
+    def _changed(self, i, value):
+        if i in self.others or isinstance(value, bool) or not isinstance(value, (int, float)):
+            return self.others.get(i, _MISSING) != value
+        last = self.values[i]
+        return abs(value - last) > max(self.absolute, self.relative * abs(last))
+
+    def update(self, timestamp, port, addr, param, value, error=None):
+        """
+        Feed one reading.
+
+        :param timestamp: Time of the reading in seconds.
+        :type timestamp: float
+        :param port: Name of the port the gauge is on, or None.
+        :param addr: The address of the gauge.
+        :type addr: int
+        :param param: The parameter read.
+        :type param: int/None
+        :param value: The value read, ignored if `error` is set.
+        :param error: The exception raised by the read, None for a good reading.
+
+        :returns: The event, or None if the reading is suppressed
+        :rtype: Event/None
+        """
+        self.readings += 1
+        key = (port, addr, param)
+        i = self.slots.get(key)
+        if i is None:
+            i = self.slots[key] = len(self.times)
+            self.values.append(math.nan)
+            self.times.append(timestamp)
+            self.suppressed.append(0)
+            self.failing.append(0)
+            reason = "first" if error is None else "error"
+        elif error is not None:
+            reason = None if self.failing[i] else "error"
+        elif self.failing[i] or self._changed(i, value):
+            reason = "change"
+        else:
+            reason = None
+
+        if reason is None and self.heartbeat is not None and timestamp - self.times[i] >= self.heartbeat:
+            reason = "heartbeat"
+        if reason is None:
+            self.suppressed[i] += 1
+            return None
+
+        event = Event(timestamp, port, addr, param, value if error is None else None, error, reason, self.suppressed[i])
+        self.times[i] = timestamp
+        self.suppressed[i] = 0
+        self.failing[i] = error is not None
+        if error is None:
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                self.values[i] = math.nan
+                self.others[i] = value
+            else:
+                self.values[i] = value
+                self.others.pop(i, None)
+        self.events += 1
+        return event
+
+    def _updates(self, item, port):
+        # Events for one item of a poll stream
+        if isinstance(item, Sample):
+            yield self.update(item.timestamp, port, item.addr, 740, item.pressure, item.error)
+        elif isinstance(item, Reading):
+            yield self.update(item.timestamp, port, item.addr, item.param, item.value, item.error)
+        elif isinstance(item, Record):
+            yield self.update(item.timestamp, item.port, item.addr, None, item.value, item.error)
+        elif isinstance(item, Snapshot):
+            for (addr, param), value in item.values.items():
+                yield self.update(item.timestamp, port, addr, param, value)
+            for (addr, param), error in item.errors.items():
+                yield self.update(item.timestamp, port, addr, param, None, error)
+        else:
+            raise TypeError("cannot filter {!r}".format(type(item).__name__))
+
+    def filter(self, items, port=None):
+        """
+        Generator yielding the events for a poll stream as it is consumed.
+
+        :param items: `Sample`s from `stream_pressure`, `Reading`s from an `AdaptiveScheduler`, `Snapshot`s from a
+            `BusPoller`, or `Record`s from a `MultiPortAcquisition`.
+        :param port: Name of the port the items come from, records carry their own.
+        """
+        for item in items:
+            for event in self._updates(item, port):
+                if event is not None:
+                    yield event
+
+    async def afilter(self, items, port=None):
+        """
+        Async iterator version of `filter`, eg for `astream_pressure`.
+        """
+        async for item in items:
+            for event in self._updates(item, port):
+                if event is not None:
+                    yield event
+
+    def stats(self):
+        """
+        :returns: dict with the number of readings fed, events passed, and gauges seen
+        :rtype: dict
+        """
+        return {"readings": self.readings, "events": self.events, "gauges": len(self.slots)}
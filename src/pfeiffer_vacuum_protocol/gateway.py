@@ -0,0 +1,279 @@
+"""
+Network gateway sharing the gauges on serial ports between many clients.
+
+Run with `python -m pfeiffer_vacuum_protocol.gateway COM1 --tcp 127.0.0.1:8740`.
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from enum import Enum
+
+from . import mock
+from .pfeiffer_vacuum_protocol import (
+    GaugeError,
+    InvalidCharError,
+    _DATA_DECODERS,
+    _DATA_ENCODERS,
+    _command,
+    _control_telegram,
+    _parse_telegram,
+    _request,
+)
+from .registry import PortRegistry
+from .singleflight import AsyncSingleFlight
+
+
+def _jsonable(value):
+    if isinstance(value, Enum):
+        return value.name
+    return value
+
+
+class Gateway:
+    """
+    Shares the ports of a `PortRegistry` between clients connected over TCP or Unix sockets.
+
+    A client either sends raw Pfeiffer telegrams, which are answered like the gauge would over RS485, or
+    newline-separated JSON requests.  The first byte of a connection picks the format, "{" for JSON.  Data requests
+    for the same (port, address, parameter) that arrive while one is already on the bus share its response, and a
+    response younger than `max_age` is served again without touching the bus.  Control commands always go to the bus
+    and act as a barrier for their gauge, see `pfeiffer_vacuum_protocol.singleflight.SingleFlight`.
+
+    JSON requests are objects with an "op" of "read", "write" or "stats", and "port", "addr", "param" and "value" as
+    needed.  The port defaults to the first one given and any "id" is echoed back.  Replies hold either "value" or
+    "error".
+    """
+
+    def __init__(self, registry, ports, max_age=0.1, policy=None):
+        """
+        :param registry: The registry owning the serial ports.
+        :type registry: pfeiffer_vacuum_protocol.PortRegistry
+        :param ports: Names of the ports clients may use.  Raw telegrams, and JSON requests without a port, go to the
+            first one.
+        :type ports: list of str
+        :param max_age: Time a response is served from the cache in seconds.  Zero only shares requests in flight.
+        :type max_age: float
+        :param policy: Timeout and retry policy for the exchanges on the bus.
+        :type policy: pfeiffer_vacuum_protocol.RetryPolicy/None
+        """
+        if not ports:
+            raise ValueError("at least one port is needed")
+        self.registry = registry
+        self.ports = list(ports)
+        self.default_port = self.ports[0]
+        self.policy = policy
+
+        # Data requests in flight and recent responses, keyed by (port, addr, param_num)
+        self.flights = AsyncSingleFlight(max_age)
+
+        self.requests = 0
+        self.exchanges = 0
+        self.errors = 0
+        self.clients = 0
+
+    async def _run(self, name, fn, *args):
+        # Exchanges block on the serial port, keep them off the event loop
+        self.exchanges += 1
+        return await asyncio.get_running_loop().run_in_executor(None, self.registry.transaction, name, fn, *args)
+
+    async def request(self, name, addr, param_num):
+        """
+        Get the data field of parameter `param_num` from a gauge, from the cache or the bus.
+
+        :returns: The data field of the response
+        :rtype: str
+        """
+        self.requests += 1
+        return await self.flights.call(
+            (name, addr, param_num), self._run, name, _request, addr, param_num, None, self.policy
+        )
+
+    async def command(self, name, addr, param_num, data_str):
+        """
+        Send a control command to a gauge.
+
+        :returns: The data field acknowledged by the gauge
+        :rtype: str
+        """
+        self.requests += 1
+        with self.flights.barrier(lambda key: key[:2] == (name, addr)):
+            return await self._run(name, _command, addr, param_num, data_str, None, self.policy)
+
+    def stats(self):
+        """
+        :returns: dict with the number of requests, those served from the cache or sharing a request in flight,
+            exchanges made on the bus, failed requests, and connected clients
+        :rtype: dict
+        """
+        return {
+            "requests": self.requests,
+            "cache_hits": self.flights.hits,
+            "coalesced": self.flights.shared,
+            "exchanges": self.exchanges,
+            "errors": self.errors,
+            "clients": self.clients,
+        }
+
+    async def _raw_reply(self, telegram):
+        # The reply a gauge would send, or None where it would stay silent
+        try:
+            addr, action, param_num, data = _parse_telegram(telegram)
+        except ValueError:
+            return None
+
+        try:
+            if action == 0 and data == b"=?":
+                rdata = await self.request(self.default_port, addr, param_num)
+            elif action == 1:
+                rdata = await self.command(self.default_port, addr, param_num, data.decode("ascii"))
+            else:
+                return None
+        except GaugeError as e:
+            # Pass on the gauge's error reply
+            self.errors += 1
+            rdata = e.code
+        except (ValueError, InvalidCharError, OSError):
+            self.errors += 1
+            return None
+        return _control_telegram(addr, param_num, rdata)
+
+    async def _json_reply(self, line):
+        try:
+            req = json.loads(line)
+            if not isinstance(req, dict):
+                raise ValueError("request must be a JSON object")
+        except ValueError as e:
+            return {"error": str(e)}
+
+        reply = {"id": req["id"]} if "id" in req else {}
+        try:
+            op = req.get("op")
+            if op == "stats":
+                reply["value"] = self.stats()
+                return reply
+
+            name = req.get("port", self.default_port)
+            if name not in self.ports:
+                raise ValueError("unknown port {!r}".format(name))
+            addr = int(req["addr"])
+            param_num = int(req["param"])
+            if op == "read":
+                if param_num not in _DATA_DECODERS:
+                    raise ValueError("cannot read parameter {:d}".format(param_num))
+                reply["value"] = _jsonable(_DATA_DECODERS[param_num](await self.request(name, addr, param_num)))
+            elif op == "write":
+                if param_num not in _DATA_ENCODERS:
+                    raise ValueError("cannot write parameter {:d}".format(param_num))
+                data = _DATA_ENCODERS[param_num](req["value"])
+                if await self.command(name, addr, param_num, data) != data:
+                    raise ValueError("invalid acknowledgment from gauge")
+                reply["value"] = None
+            else:
+                raise ValueError("unknown op {!r}".format(op))
+        except KeyError as e:
+            reply["error"] = "missing field {}".format(e)
+        except (TypeError, ValueError, InvalidCharError, OSError) as e:
+            self.errors += 1
+            reply["error"] = str(e)
+            if isinstance(e, GaugeError):
+                reply["code"] = e.code
+        return reply
+
+    async def handle_client(self, reader, writer):
+        """
+        Serve one client connection, for use with `asyncio.start_server`.
+        """
+        self.clients += 1
+        try:
+            first = await reader.read(1)
+            if first == b"{":
+                line = first + await reader.readline()
+                while line:
+                    if line.strip():
+                        writer.write(json.dumps(await self._json_reply(line)).encode() + b"\n")
+                        await writer.drain()
+                    line = await reader.readline()
+            elif first:
+                telegram = first
+                while True:
+                    try:
+                        telegram += await reader.readuntil(b"\r")
+                    except asyncio.IncompleteReadError:
+                        break
+                    reply = await self._raw_reply(telegram)
+                    if reply is not None:
+                        writer.write(reply)
+                        await writer.drain()
+                    telegram = b""
+        except (ConnectionError, asyncio.LimitOverrunError):
+            pass
+        finally:
+            self.clients -= 1
+            writer.close()
+
+    async def start_tcp(self, host="127.0.0.1", port=8740):
+        """
+        Listen for clients on a TCP port.
+
+        :rtype: asyncio.Server
+        """
+        return await asyncio.start_server(self.handle_client, host, port)
+
+    async def start_unix(self, path):
+        """
+        Listen for clients on a Unix socket.
+
+        :rtype: asyncio.Server
+        """
+        return await asyncio.start_unix_server(self.handle_client, path)
+
+
+def _parse_address(text):
+    host, _, port = text.rpartition(":")
+    return host or "127.0.0.1", int(port)
+
+
+async def _serve(gateway, tcp, unix):
+    servers = [await gateway.start_tcp(*_parse_address(x)) for x in tcp]
+    servers += [await gateway.start_unix(x) for x in unix]
+    for server in servers:
+        for sock in server.sockets:
+            print("listening on {}".format(sock.getsockname()), file=sys.stderr)
+    await asyncio.gather(*(server.serve_forever() for server in servers))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("ports", nargs="+", help="serial ports to share, raw telegrams go to the first one")
+    parser.add_argument("--tcp", action="append", default=[], help="HOST:PORT to listen on, can be repeated")
+    parser.add_argument("--unix", action="append", default=[], help="Unix socket path to listen on, can be repeated")
+    parser.add_argument("--baudrate", type=int, default=9600)
+    parser.add_argument("--timeout", type=float, default=0.1, help="read timeout of the serial ports in seconds")
+    parser.add_argument("--max-age", type=float, default=0.1, help="time responses are cached in seconds")
+    parser.add_argument("--valid-char-filter", action="store_true", help="ignore invalid characters from the ports")
+    parser.add_argument("--mock", action="store_true", help="serve a mock gauge at address 1 on every port")
+    args = parser.parse_args(argv)
+    if not args.tcp and not args.unix:
+        parser.error("give at least one of --tcp or --unix")
+
+    if args.mock:
+        registry = PortRegistry(
+            lambda name: mock.Serial(mock.PPT100(), name), valid_char_filter=args.valid_char_filter or None
+        )
+    else:
+        registry = PortRegistry(
+            valid_char_filter=args.valid_char_filter or None, baudrate=args.baudrate, timeout=args.timeout
+        )
+    gateway = Gateway(registry, args.ports, max_age=args.max_age)
+    try:
+        asyncio.run(_serve(gateway, args.tcp, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        registry.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import math
+import threading
+from array import array
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, plain arrays are used without it
+    np = None
+
+
+class _Series:
+    """
+    Fixed-capacity ring buffer of samples from one gauge.
+
+    Every sample is written twice, at `i` and `i + capacity`, so the latest `n` samples are always contiguous and can
+    be handed out as views without copying.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.timestamps = array("d", bytes(16 * capacity))
+        self.pressures = array("d", bytes(16 * capacity))
+        self.errors = array("b", bytes(2 * capacity))
+        self.head = 0
+        self.count = 0
+
+    def append(self, timestamp, pressure, error):
+        i = self.head
+        j = i + self.capacity
+        self.timestamps[i] = self.timestamps[j] = timestamp
+        self.pressures[i] = self.pressures[j] = pressure
+        self.errors[i] = self.errors[j] = error
+        self.head = i + 1 if i + 1 < self.capacity else 0
+        if self.count < self.capacity:
+            self.count += 1
+
+    def window(self, n):
+        n = self.count if n is None else min(n, self.count)
+        end = self.head + self.capacity
+        return slice(end - n, end)
+
+
+class PressureHistory:
+    """
+    Pressure history of many gauges, keyed by (port, address).
+
+    Timestamps, pressures and error flags are stored in preallocated arrays of `capacity` samples per gauge, the
+    oldest samples are overwritten once full.  Failed reads are stored with a NaN pressure and a non-zero error flag.
+    """
+
+    def __init__(self, capacity=86400):
+        """
+        :param capacity: Number of samples kept for each gauge.
+        :type capacity: int
+        """
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def _get_series(self, key):
+        series = self.series.get(key)
+        if series is None:
+            with self.lock:
+                series = self.series.setdefault(key, _Series(self.capacity))
+        return series
+
+    def append(self, port, addr, timestamp, pressure, error=0):
+        """
+        Add a sample.
+
+        :param port: Name of the port the gauge is on.
+        :param addr: The address of the gauge.
+        :type addr: int
+        :param timestamp: Time of the reading in seconds since the epoch.
+        :type timestamp: float
+        :param pressure: The pressure read, in bar.
+        :type pressure: float
+        :param error: Zero for a good reading.
+        :type error: int
+        """
+        self._get_series((port, addr)).append(timestamp, pressure, error)
+
+    def append_record(self, rec):
+        """
+        Add a `pfeiffer_vacuum_protocol.Record` from an acquisition.
+        """
+        if rec.error is None:
+            self._get_series((rec.port, rec.addr)).append(rec.timestamp, rec.value, 0)
+        else:
+            self._get_series((rec.port, rec.addr)).append(rec.timestamp, math.nan, 1)
+
+    def __len__(self):
+        return len(self.series)
+
+    def __contains__(self, key):
+        return key in self.series
+
+    def keys(self):
+        return list(self.series)
+
+    def count(self, port, addr):
+        """
+        Number of samples held for a gauge.
+        """
+        series = self.series.get((port, addr))
+        return 0 if series is None else series.count
+
+    def last(self, port, addr, n=None):
+        """
+        Zero-copy views of the latest samples from a gauge, oldest first.  The views are only valid until the next
+        `append` for that gauge.
+
+        :param n: Number of samples, or all of them if None.
+        :type n: int/None
+        :returns: The timestamps, pressures, and error flags as memoryviews, or numpy arrays if numpy is installed
+        :rtype: tuple
+        """
+        series = self.series.get((port, addr))
+        if series is None:
+            raise KeyError((port, addr))
+
+        w = series.window(n)
+        views = (
+            memoryview(series.timestamps)[w],
+            memoryview(series.pressures)[w],
+            memoryview(series.errors)[w],
+        )
+        if np is not None:
+            return tuple(np.frombuffer(v, dtype=v.format) for v in views)
+        return views
+
+    def summary(self, port, addr, n=None):
+        """
+        Statistics of the good readings among the latest samples from a gauge.
+
+        :param n: Number of samples, or all of them if None.
+        :type n: int/None
+        :returns: dict with the number of good readings, number of errors, and min/max/mean pressure (NaN if there
+            were no good readings)
+        :rtype: dict
+        """
+        _, pressures, errors = self.last(port, addr, n)
+        if np is not None:
+            good = pressures[errors == 0]
+            n_good = int(good.size)
+            if n_good:
+                return {
+                    "count": n_good,
+                    "errors": len(pressures) - n_good,
+                    "min": float(good.min()),
+                    "max": float(good.max()),
+                    "mean": float(good.mean()),
+                }
+        else:
+            good = [p for p, e in zip(pressures, errors) if not e]
+            n_good = len(good)
+            if n_good:
+                return {
+                    "count": n_good,
+                    "errors": len(pressures) - n_good,
+                    "min": min(good),
+                    "max": max(good),
+                    "mean": math.fsum(good) / n_good,
+                }
+        return {"count": 0, "errors": len(pressures), "min": math.nan, "max": math.nan, "mean": math.nan}
+
+    def rolling_mean(self, port, addr, window, n=None):
+        """
+        Mean pressure over a sliding window of samples.  Windows containing a failed read are NaN.
+
+        :param window: Number of samples in each window.
+        :type window: int
+        :param n: Number of latest samples to use, or all of them if None.
+        :type n: int/None
+        :returns: One mean per complete window, oldest first
+        :rtype: numpy array if numpy is installed, otherwise array.array
+        """
+        if window < 1:
+            raise ValueError("window must be at least 1")
+        _, pressures, _ = self.last(port, addr, n)
+        if np is not None:
+            if len(pressures) < window:
+                return np.empty(0)
+            bad = np.isnan(pressures)
+            c = np.cumsum(np.concatenate(([0.0], np.where(bad, 0.0, pressures))))
+            b = np.cumsum(np.concatenate(([0], bad)))
+            means = (c[window:] - c[:-window]) / window
+            means[(b[window:] - b[:-window]) > 0] = np.nan
+            return means
+
+        out = array("d")
+        total = 0.0
+        n_bad = 0
+        for i, p in enumerate(pressures):
+            if math.isnan(p):
+                n_bad += 1
+            else:
+                total += p
+            if i >= window:
+                old = pressures[i - window]
+                if math.isnan(old):
+                    n_bad -= 1
+                else:
+                    total -= old
+            if i >= window - 1:
+                out.append(math.nan if n_bad else total / window)
+        return out
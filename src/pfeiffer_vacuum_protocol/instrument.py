@@ -0,0 +1,249 @@
+import bisect
+import threading
+import time
+
+from . import pfeiffer_vacuum_protocol as _core
+from .pfeiffer_vacuum_protocol import _ERROR_RESPONSES, InvalidCharError
+
+# Upper bounds of the latency histogram buckets in seconds
+LATENCY_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0)
+
+# Requests awaiting a response kept per port, the oldest are forgotten beyond this
+_MAX_PENDING = 16
+
+# Kinds of failed exchanges counted by `Instrumentation`
+ERROR_KINDS = ("timeout", "checksum", "framing", "mismatch", "invalid_char") + tuple(
+    code.decode("ascii") for code in _ERROR_RESPONSES
+)
+
+
+def _classify(frame, error, addr, param):
+    # Returns the kind of failure for a response, or None if it was good
+    if isinstance(error, InvalidCharError):
+        return "invalid_char"
+    if not frame.endswith(b"\r"):
+        return "timeout"
+    if error is None:
+        if addr is not None and (int(frame[:3]) != addr or int(frame[5:8]) != param):
+            return "mismatch"
+        return None
+    if len(frame) < 14 or not frame[-4:-1].isdigit():
+        return "framing"
+    if int(frame[-4:-1]) != sum(frame[:-4]) % 256:
+        return "checksum"
+    data = frame[10:-4]
+    if data in _ERROR_RESPONSES:
+        return data.decode("ascii")
+    return "framing"
+
+
+def _frame_key(frame):
+    # (address, parameter) from the header of a response, None if it doesn't have one
+    if len(frame) >= 8 and frame[:3].isdigit() and frame[5:8].isdigit():
+        return int(frame[:3]), int(frame[5:8])
+    return None
+
+
+class _Counters:
+    def __init__(self, n_buckets):
+        self.requests = 0
+        self.responses = 0
+        self.bytes_read = 0
+        self.invalid_chars_dropped = 0
+        self.noise_bytes_skipped = 0
+        self.errors = dict.fromkeys(ERROR_KINDS, 0)
+        self.buckets = [0] * (n_buckets + 1)
+        self.latency_sum = 0.0
+
+
+class Instrumentation:
+    """
+    Counters and latency histograms for every (port, address, parameter) the protocol functions talk to.
+
+    Install with `enable_instrumentation`.  The protocol functions call `request` before sending a telegram and
+    `response` once the reply has been read, any object with these two methods can be installed instead.
+    """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        """
+        :param buckets: Upper bounds of the latency histogram buckets in seconds, increasing.
+        :type buckets: tuple of float
+        """
+        self.bucket_bounds = tuple(buckets)
+        self.counters = {}
+
+        # id of the serial object -> list of (start time, addr, param_num) of the requests awaiting a response, oldest
+        # first.  More than one is outstanding when requests are pipelined.
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def _get_counters(self, key):
+        c = self.counters.get(key)
+        if c is None:
+            c = self.counters[key] = _Counters(len(self.bucket_bounds))
+        return c
+
+    def request(self, s, addr, param_num):
+        """
+        Called just before a telegram is written to the serial object `s`.
+        """
+        port = getattr(s, "port", None)
+        with self.lock:
+            pending = self.pending.setdefault(id(s), [])
+            pending.append((time.perf_counter(), addr, param_num))
+            if len(pending) > _MAX_PENDING:
+                del pending[0]
+            self._get_counters((port, addr, param_num)).requests += 1
+
+    def _pop_pending(self, s, port, frame):
+        # The request a response belongs to, matched by address and parameter when several are outstanding.  Requests
+        # sent before it were passed over by their gauges and count as timeouts.
+        pending = self.pending.get(id(s))
+        if not pending:
+            return None, None, None
+        i = 0
+        if len(pending) > 1:
+            key = _frame_key(frame)
+            i = next((i for i, p in enumerate(pending) if p[1:] == key), 0)
+        for _, addr, param_num in pending[:i]:
+            self._get_counters((port, addr, param_num)).errors["timeout"] += 1
+        del pending[:i]
+        return pending.pop(0)
+
+    def response(self, s, frame, dropped, skipped, error):
+        """
+        Called after a response has been read from `s`.
+
+        :param frame: The telegram read, after removing invalid characters.  Unterminated if the gauge stopped
+            responding.
+        :type frame: bytes
+        :param dropped: Number of bytes removed by the valid character filter.
+        :type dropped: int
+        :param skipped: Number of bytes skipped as noise ahead of the telegram.
+        :type skipped: int
+        :param error: The exception raised while reading or parsing the response, if any.
+        """
+        now = time.perf_counter()
+        port = getattr(s, "port", None)
+        with self.lock:
+            start, addr, param_num = self._pop_pending(s, port, frame)
+            kind = _classify(frame, error, addr, param_num)
+            c = self._get_counters((port, addr, param_num))
+            c.bytes_read += len(frame) + dropped + skipped
+            c.invalid_chars_dropped += dropped
+            c.noise_bytes_skipped += skipped
+            if kind is not None:
+                c.errors[kind] += 1
+            if kind not in ("timeout", "invalid_char"):
+                c.responses += 1
+                if start is not None:
+                    latency = now - start
+                    c.buckets[bisect.bisect_left(self.bucket_bounds, latency)] += 1
+                    c.latency_sum += latency
+
+    def reset(self):
+        """
+        Zero all counters.
+        """
+        with self.lock:
+            self.counters.clear()
+            self.pending.clear()
+
+    def snapshot(self):
+        """
+        Copy of the counters.
+
+        :returns: (port, address, parameter) -> dict of requests, responses, bytes read, invalid characters dropped,
+            noise bytes skipped, errors by kind, and the latency histogram as cumulative (upper bound, count) pairs with its sum and count
+        :rtype: dict
+        """
+        out = {}
+        with self.lock:
+            for key, c in self.counters.items():
+                cumulative = []
+                total = 0
+                for bound, n in zip(self.bucket_bounds + (float("inf"),), c.buckets):
+                    total += n
+                    cumulative.append((bound, total))
+                out[key] = {
+                    "requests": c.requests,
+                    "responses": c.responses,
+                    "bytes_read": c.bytes_read,
+                    "invalid_chars_dropped": c.invalid_chars_dropped,
+                    "noise_bytes_skipped": c.noise_bytes_skipped,
+                    "errors": dict(c.errors),
+                    "latency": {"buckets": cumulative, "sum": c.latency_sum, "count": total},
+                }
+        return out
+
+    def prometheus(self, prefix="pfeiffer_vacuum"):
+        """
+        The counters in the Prometheus text exposition format.
+
+        :param prefix: Prefix of the metric names.
+        :type prefix: str
+        :rtype: str
+        """
+        snap = self.snapshot()
+        lines = []
+
+        def labels(key, **extra):
+            port, addr, param_num = key
+            pairs = [
+                ("port", "" if port is None else str(port)),
+                ("addr", "" if addr is None else str(addr)),
+                ("param", "" if param_num is None else str(param_num)),
+            ]
+            pairs += extra.items()
+            return ",".join(
+                '{}="{}"'.format(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs
+            )
+
+        for name, field, doc in (
+            ("requests_total", "requests", "Telegrams sent."),
+            ("responses_total", "responses", "Responses received."),
+            ("bytes_read_total", "bytes_read", "Bytes read from the port."),
+            ("invalid_chars_dropped_total", "invalid_chars_dropped", "Bytes removed by the valid character filter."),
+            ("noise_bytes_skipped_total", "noise_bytes_skipped", "Bytes skipped as noise ahead of a telegram."),
+        ):
+            lines.append("# HELP {}_{} {}".format(prefix, name, doc))
+            lines.append("# TYPE {}_{} counter".format(prefix, name))
+            for key, v in snap.items():
+                lines.append("{}_{}{{{}}} {}".format(prefix, name, labels(key), v[field]))
+
+        lines.append("# HELP {}_errors_total Failed exchanges by kind.".format(prefix))
+        lines.append("# TYPE {}_errors_total counter".format(prefix))
+        for key, v in snap.items():
+            for kind, n in v["errors"].items():
+                lines.append("{}_errors_total{{{}}} {}".format(prefix, labels(key, kind=kind), n))
+
+        lines.append("# HELP {}_latency_seconds Time from request to response.".format(prefix))
+        lines.append("# TYPE {}_latency_seconds histogram".format(prefix))
+        for key, v in snap.items():
+            h = v["latency"]
+            for bound, n in h["buckets"]:
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append("{}_latency_seconds_bucket{{{}}} {}".format(prefix, labels(key, le=le), n))
+            lines.append("{}_latency_seconds_sum{{{}}} {}".format(prefix, labels(key), repr(h["sum"])))
+            lines.append("{}_latency_seconds_count{{{}}} {}".format(prefix, labels(key), h["count"]))
+        return "\n".join(lines) + "\n"
+
+
+def enable_instrumentation(hook=None):
+    """
+    Globally install an instrumentation hook on the protocol functions.
+
+    :param hook: The hook, a new `Instrumentation` if None.
+    :returns: The installed hook
+    """
+    if hook is None:
+        hook = Instrumentation()
+    _core._instrument = hook
+    return hook
+
+
+def disable_instrumentation():
+    """
+    Globally remove the instrumentation hook.  The protocol functions then only pay for a check against None.
+    """
+    _core._instrument = None
@@ -1,5 +1,8 @@
+import bisect
 import io
-from .pfeiffer_vacuum_protocol import ErrorCode
+import random
+import time
+from .pfeiffer_vacuum_protocol import ErrorCode, _control_telegram, _parse_telegram
 
 # Pulled from pySerial
 PARITY_NONE, PARITY_EVEN, PARITY_ODD, PARITY_MARK, PARITY_SPACE = "N", "E", "O", "M", "S"
@@ -22,6 +25,30 @@ def to_bytes(seq):
         return bytes(bytearray(seq))
 
 
+class Timing:
+    """\
+    Timing model for the mock serial port.  Bytes reach the host according to the baudrate, the device's turnaround
+    time, and the latency of the USB adapter.
+    """
+
+    def __init__(self, turnaround=0.001, adapter_latency=0.0, bits_per_char=10):
+        """\
+        :param turnaround: Time between the end of a request and the start of the device's reply in seconds.
+        :type turnaround: float
+        :param adapter_latency: Delay added by the adapter before received bytes reach the host in seconds, eg 0.016
+            for the default FTDI latency timer.
+        :type adapter_latency: float
+        :param bits_per_char: Bits on the wire per byte, including start and stop bits.
+        :type bits_per_char: int
+        """
+        self.turnaround = turnaround
+        self.adapter_latency = adapter_latency
+        self.bits_per_char = bits_per_char
+
+    def char_time(self, baudrate):
+        return self.bits_per_char / baudrate
+
+
 class Serial(io.RawIOBase):
     """\
     Mockup of a serial port named COM1 connected to a pfeiffer device
@@ -79,30 +106,115 @@ class Serial(io.RawIOBase):
         dsrdtr=False,
         inter_byte_timeout=None,
         exclusive=None,
+        timing=None,
         **kwargs,
     ):
         """\
-        Initializes the com port object
+        Initializes the com port object.  Responses are available immediately unless a `Timing` model is given, in
+        which case `timeout` and `inter_byte_timeout` are honored like in pySerial.
+
+        The port counts the calls to `read` and `write` in `n_reads` and `n_writes`, and the changes of `timeout` in
+        `n_timeout_sets`, since each one reconfigures a real pySerial port.
         """
         self.buffer = b""
         self.dev = connected_device
+        self.port = port
         self.baudrate = baudrate
+        self._timeout = timeout
+        self.inter_byte_timeout = inter_byte_timeout
+        self.timing = timing
+
+        # Time each byte in the buffer becomes visible to the host and when the bus is next free (timing model only)
+        self.arrivals = []
+        self.bus_free = 0.0
+
+        self.n_reads = 0
+        self.n_writes = 0
+        self.n_timeout_sets = 0
+
+    @property
+    def timeout(self):
+        return self._timeout
+
+    @timeout.setter
+    def timeout(self, value):
+        self._timeout = value
+        self.n_timeout_sets += 1
 
     def flush(self):
+        self.reset_input_buffer()
+
+    def reset_input_buffer(self):
         self.buffer = b""
+        self.arrivals = []
 
     def write(self, output):
-        self.buffer += self.dev.get_response(to_bytes(output))
+        self.n_writes += 1
+        output = to_bytes(output)
+        response = self.dev.get_response(output)
+        if self.timing is not None:
+            self._schedule(len(output), response)
+        self.buffer += response
         return len(output)
 
+    def _schedule(self, n_out, response):
+        # The reply starts after the request has been clocked out and the device has turned the bus around
+        char_time = self.timing.char_time(self.baudrate)
+        start = max(time.monotonic(), self.bus_free) + n_out * char_time + self.timing.turnaround
+        start += getattr(self.dev, "response_delay", 0.0)
+        arrival = start + self.timing.adapter_latency
+        self.arrivals.extend(arrival + (i + 1) * char_time for i in range(len(response)))
+        self.bus_free = start + len(response) * char_time
+
+    def _available(self, now):
+        return bisect.bisect_right(self.arrivals, now)
+
+    def _take(self, n):
+        ret = self.buffer[:n]
+        self.buffer = self.buffer[n:]
+        del self.arrivals[:n]
+        return ret
+
+    def _timed_read(self, readlen):
+        now = time.monotonic()
+        deadline = None if self.timeout is None else now + self.timeout
+        n = self._available(now)
+        while readlen < 0 or n < readlen:
+            # Stop on the overall timeout, once nothing more is coming, or when the gap between bytes is too long
+            if n >= len(self.arrivals) or (deadline is not None and now >= deadline):
+                break
+            wake = self.arrivals[n]
+            if self.inter_byte_timeout is not None and n > 0 and wake - self.arrivals[n - 1] > self.inter_byte_timeout:
+                wake = self.arrivals[n - 1] + self.inter_byte_timeout
+                if now >= wake:
+                    break
+            if deadline is not None:
+                wake = min(wake, deadline)
+            time.sleep(max(wake - now, 0.0))
+            now = time.monotonic()
+            n = self._available(now)
+        return self._take(n if readlen < 0 else min(n, readlen))
+
     def read(self, readlen=-1):
+        self.n_reads += 1
         if self.baudrate != 9600:
             return b""
 
+        if self.timing is not None:
+            return self._timed_read(readlen)
+
         ret = self.buffer[:readlen]
         self.buffer = self.buffer[readlen:]
         return ret
 
+    @property
+    def in_waiting(self):
+        if self.baudrate != 9600:
+            return 0
+        if self.timing is not None:
+            return self._available(time.monotonic())
+        return len(self.buffer)
+
     def readinto(self, b):
         data = self.read(len(b))
         n = len(data)
@@ -124,117 +236,195 @@ class PPT100:
     Mockup of the Pfeiffer vacuum gauge model PPT 100
     """
 
-    def __init__(self, address=1, err_state=ErrorCode.NO_ERROR, nonascii=False):
+    # Data fields for the error states
+    ERROR_CODES = {
+        ErrorCode.NO_ERROR: "000000",
+        ErrorCode.DEFECTIVE_TRANSMITTER: "Err001",
+        ErrorCode.DEFECTIVE_MEMORY: "Err002",
+    }
+
+    def __init__(
+        self, address=1, err_state=ErrorCode.NO_ERROR, nonascii=False, silent=False, response_delay=0.0, noise=b""
+    ):
         self.address = address
         self.err_state = err_state
         self.nonascii = nonascii  # Include array of  \xff before message (github issue 1)
+        self.noise = noise  # Arbitrary bytes sent before message, like line noise
+        self.silent = silent  # Never answer, like a dead gauge
+        self.response_delay = response_delay  # Extra time taken to answer, used with a `Timing` model
 
-    def _get_response(self, bin_str):
-        # Convert to a unicode str
-        in_str = bin_str.decode("ascii")
+        # Parameter number and data of every write the gauge accepted, addressed or broadcast
+        self.written = []
 
-        # If it doesn't end in a carriage return, exit
-        if in_str[-1] != "\r":
-            return b""
+    def _reply(self, param_num, data):
+        # Responses have the same layout as control commands
+        return _control_telegram(self.address, param_num, data)
 
-        # Validate the checksum and exit if bad
-        if int(in_str[-4:-1]) != (sum([ord(x) for x in in_str[:-4]]) % 256):
+    def _get_response(self, bin_str):
+        # Validate the framing and checksum and exit if bad
+        try:
+            addr, op_type, param_num, data = _parse_telegram(bin_str)
+        except ValueError:
             return b""
 
-        # Get the address, and exit if it isn't correct
-        if int(in_str[:3]) != 1:
+        # Get the address, and exit if it isn't correct or a broadcast
+        broadcast = addr == 0
+        if addr != self.address and not broadcast:
             return b""
 
         # Get the data length and return if it's wrong
-        if len(in_str) - 14 != int(in_str[8:10]):
+        if len(data) != int(bin_str[8:10]):
             return b""
 
-        # Get the operation type (read/write)
-        op_type = int(in_str[3])
-
-        # Get the paramter number
-        param_num = int(in_str[5:8])
-
         # If we are reading
         if op_type == 0:
-            # Check that the data length is right and exit if not
-            if int(in_str[8:10]) != 2:
-                return b""
-
-            # Check that the data is =? exit if it isn't
-            if in_str[10:12] != "=?":
+            # Check that the data is =? exit if it isn't, and never answer a broadcast
+            if data != b"=?" or broadcast:
                 return b""
 
             # If it is error code, return the right one
             if param_num == 303:
-                if self.err_state == ErrorCode.NO_ERROR:
-                    return b"0011030306000000014\r"
-
-                elif self.err_state == ErrorCode.DEFECTIVE_TRANSMITTER:
-                    return b"0011030306Err001168\r"
-
-                elif self.err_state == ErrorCode.DEFECTIVE_MEMORY:
-                    return b"0011030306Err002169\r"
-
-                else:
+                if self.err_state not in self.ERROR_CODES:
                     raise ValueError("unknown error state")
+                return self._reply(303, self.ERROR_CODES[self.err_state])
 
             # Or, if it's version number, return it
             elif param_num == 312:
-                return b"0011031206010100016\r"
+                return self._reply(312, "010100")
 
             # Or, if it's the component name, return it
             elif param_num == 349:
-                return b"0011034906    A3236\r"
+                return self._reply(349, "    A3")
 
             # Or, if it's pressure, return it
             elif param_num == 740:
-                return b"0011074006100023025\r"
+                return self._reply(740, "100023")
 
             # Or, if it's the correction value, return it
             elif param_num == 742:
-                return b"0011074206000100022\r"
+                return self._reply(742, "000100")
 
             # If it wasn't any of these, return the error code
             else:
-                resp = "00110{:03d}06NO_DEF".format(param_num)
-                resp += "{:03d}\r".format(sum([ord(x) for x in resp]) % 256)
-                return resp.encode()
+                return self._reply(param_num, "NO_DEF")
 
         # Or, if it's write
         else:
-            # If it was set point
-            if param_num == 741:
-                # Check the datatype
-                if int(in_str[8:10]) != 3:
-                    return b"0011074106NO_DEF191\r"
-
-                # Check bounds and return error if we're out
-                val = int(in_str[10:13])
-                if val < 0 or val > 1:
-                    return b"0011074106_RANGE192\r"
-
-                # Return the confirmation
-                return in_str.encode()
-
-            # Or, if it was the correction value
-            elif param_num == 742:
-                # Check the datatype
-                if int(in_str[8:10]) != 6:
-                    return b"0011074206NO_DEF192\r"
-
-                # Return the confirmation
-                return in_str.encode()
-
-            # If it wasn't a valid parameter, return an error
-            else:
-                return b"0011074206NO_DEF192\r"
+            r = self._write(param_num, data, bin_str)
+            if r == bin_str:
+                self.written.append((param_num, data))
+
+            # Broadcasts are acted on but never answered
+            return b"" if broadcast else r
+
+    def _write(self, param_num, data, bin_str):
+        # If it was set point
+        if param_num == 741:
+            # Check the datatype
+            if len(data) != 3:
+                return self._reply(741, "NO_DEF")
+
+            # Check bounds and return error if we're out
+            val = int(data)
+            if val < 0 or val > 1:
+                return self._reply(741, "_RANGE")
+
+            # Return the confirmation
+            return bin_str
+
+        # Or, if it was the correction value
+        elif param_num == 742:
+            # Check the datatype
+            if len(data) != 6:
+                return self._reply(742, "NO_DEF")
+
+            # Return the confirmation
+            return bin_str
+
+        # If it wasn't a valid parameter, return an error
+        else:
+            return self._reply(param_num, "NO_DEF")
 
     def get_response(self, bin_str):
         """
         Wrap the get response function to optionally add chars before/after
         """
+        if self.silent:
+            return b""
         r = self._get_response(bin_str)
         if self.nonascii:
             r = b"\xff" * 40 + r
+        if r:
+            r = self.noise + r
+        return r
+
+
+class Bus:
+    """\
+    Mockup of an RS485 network with many gauges on it.  Used as the `connected_device` of a `Serial`.
+
+    Each telegram is routed to the device with a matching address.  Address 0 is treated as a broadcast, it is passed
+    to every device, which applies a valid write without answering.  Faults can be injected into the responses at the given rates.
+    """
+
+    def __init__(self, devices, drop_rate=0.0, corrupt_rate=0.0, slow_rate=0.0, slow_delay=0.5, seed=None):
+        """\
+        :param devices: The gauges on the bus, each with a distinct address.
+        :param drop_rate: Fraction of responses that lose a byte.
+        :type drop_rate: float
+        :param corrupt_rate: Fraction of responses with a bad checksum.
+        :type corrupt_rate: float
+        :param slow_rate: Fraction of responses delayed by an extra `slow_delay` seconds, used with a `Timing` model.
+        :type slow_rate: float
+        :param seed: Seed for the random number generator choosing which responses are faulty.
+        """
+        self.devices = {}
+        for dev in devices:
+            if dev.address in self.devices:
+                raise ValueError("duplicate device address {:d}".format(dev.address))
+            self.devices[dev.address] = dev
+
+        self.drop_rate = drop_rate
+        self.corrupt_rate = corrupt_rate
+        self.slow_rate = slow_rate
+        self.slow_delay = slow_delay
+        self.random = random.Random(seed)
+        self.response_delay = 0.0
+
+        # Count of each type of injected fault
+        self.faults = {"dropped": 0, "corrupted": 0, "slow": 0}
+
+    def get_response(self, bin_str):
+        self.response_delay = 0.0
+        try:
+            addr = int(bin_str[:3])
+        except ValueError:
+            return b""
+
+        # Broadcasts are seen by everyone and answered by no one
+        if addr == 0:
+            for dev in self.devices.values():
+                dev.get_response(bin_str)
+            return b""
+
+        dev = self.devices.get(addr)
+        if dev is None:
+            return b""
+        r = dev.get_response(bin_str)
+        self.response_delay = getattr(dev, "response_delay", 0.0)
+        if not r:
+            return r
+
+        # Inject faults
+        if self.random.random() < self.corrupt_rate:
+            self.faults["corrupted"] += 1
+            bad = (int(r[-4:-1]) + 1) % 256
+            r = r[:-4] + "{:03d}".format(bad).encode() + r[-1:]
+        if self.random.random() < self.drop_rate:
+            self.faults["dropped"] += 1
+            i = self.random.randrange(len(r))
+            r = r[:i] + r[i + 1 :]
+        if self.random.random() < self.slow_rate:
+            self.faults["slow"] += 1
+            self.response_delay += self.slow_delay
         return r
@@ -1,4 +1,10 @@
+from collections import namedtuple
 from enum import Enum
+import functools
+import math
+import re
+import time
+import weakref
 
 
 class InvalidCharError(Exception):  # Custom exception when failing on invalid chars
@@ -27,6 +33,10 @@ def disable_valid_char_filter():
     _filter_invalid_char = False
 
 
+# Instrumentation hook, None when disabled.  See `pfeiffer_vacuum_protocol.instrument`.
+_instrument = None
+
+
 # Error states for vacuum gauges
 class ErrorCode(Enum):
     NO_ERROR = 1
@@ -34,93 +44,376 @@ class ErrorCode(Enum):
     DEFECTIVE_MEMORY = 3
 
 
-def _send_data_request(s, addr, param_num):
+@functools.lru_cache(maxsize=4096)
+def _data_request_telegram(addr, param_num):
+    # Data requests never change for a given address and parameter, so only build them once
     c = "{:03d}00{:03d}02=?".format(addr, param_num)
     c += "{:03d}\r".format(sum([ord(x) for x in c]) % 256)
-    s.write(c.encode())
+    return c.encode()
 
 
-def _send_control_command(s, addr, param_num, data_str):
+def _send_data_request(s, addr, param_num):
+    inst = _instrument
+    if inst is not None:
+        inst.request(s, addr, param_num)
+    s.write(_data_request_telegram(addr, param_num))
+
+
+def _control_telegram(addr, param_num, data_str):
     c = "{:03d}10{:03d}{:02d}{:s}".format(addr, param_num, len(data_str), data_str)
     c += "{:03d}\r".format(sum([ord(x) for x in c]) % 256)
-    return s.write(c.encode())
+    return c.encode()
+
+
+def _send_control_command(s, addr, param_num, data_str):
+    inst = _instrument
+    if inst is not None:
+        inst.request(s, addr, param_num)
+    return s.write(_control_telegram(addr, param_num, data_str))
+
+
+# Most bytes read from the port while looking for a single telegram, including garbage skipped ahead of it
+_MAX_FRAME_BYTES = 1024
+
+# Start of a plausible telegram: address, action, zero, parameter number and data length
+_HEADER = re.compile(rb"[0-9]{3}[01]0[0-9]{5}")
+
+# Bytes that cannot be decoded as ascii, removed by the valid character filter
+_NON_ASCII = bytes(range(128, 256))
+
+
+def _filter_chars(chunk, valid_char_filter):
+    # Drop bytes that can't be decoded as ascii, or complain about them if the filter is off
+    if chunk.isascii():
+        return chunk
+    if not valid_char_filter:
+        raise InvalidCharError(
+            "Cannot decode character. This issue may sometimes be resolved by ignoring invalid "
+            "characters. Enable the filter globally by running the function "
+            "`pfeiffer_vacuum_protocol.enable_valid_char_filter()` after the import statement."
+        )
+    return chunk.translate(None, _NON_ASCII)
+
+
+def _resync(buf):
+    # Index of the first byte that could start a telegram.  Without a full header in view, only the bytes that could
+    # still grow into one are kept.
+    if len(buf) >= 10 and buf[:10].isdigit() and buf[3] < 50 and buf[4] == 48:
+        # Same as matching `_HEADER`, without the cost of the regex on every telegram
+        return 0
+    m = _HEADER.search(buf)
+    if m is not None:
+        return m.start()
+    return max(len(buf) - 9, buf.rfind(b"\r") + 1, 0)
+
+
+def _checksum_ok(buf):
+    return buf.endswith(b"\r") and buf[-4:-1].isdigit() and int(buf[-4:-1]) == sum(buf[:-4]) % 256
+
+
+def _later_telegram(buf):
+    # Start of a later telegram in `buf` with the right length and checksum, None if there isn't one
+    m = _HEADER.search(buf, 1)
+    while m is not None:
+        rest = buf[m.start() :]
+        if len(rest) == 14 + int(rest[8:10]) and _checksum_ok(rest):
+            return m.start()
+        m = _HEADER.search(buf, m.start() + 1)
+    return None
+
+
+class _FrameReader:
+    """
+    Splits the byte stream coming from a serial port into carriage return terminated telegrams.
+
+    Bytes are pulled from the port in bulk using the length field of the telegram header to avoid blocking past the
+    end of a response.  Anything received after the telegram is kept for the next call.  Garbage ahead of a telegram,
+    like line noise or the tail of a telegram cut short, is skipped by scanning for a plausible header.
+    """
+
+    def __init__(self, s):
+        self.s = s
+        self.rx = bytearray()
+
+        # Per-port valid character filter setting, the global one is used if None
+        self.valid_char_filter = None
+
+        # Count of bytes removed by the valid character filter, and of bytes skipped while looking for a header
+        self.dropped = 0
+        self.skipped = 0
+
+        # Number of times garbage was skipped to find a header
+        self.resyncs = 0
+
+    def _bytes_wanted(self, frame):
+        # Read at least the shortest possible telegram, or the rest of it once the length field has arrived
+        if len(frame) < 10:
+            n = 14 - len(frame)
+        else:
+            n = max(14 + int(frame[8:10]) - len(frame), 1)
+
+        # Take everything the adapter already has buffered in the same call
+        return max(n, getattr(self.s, "in_waiting", 0) or 0)
+
+    def _skip(self, frame, n):
+        del frame[:n]
+        self.skipped += n
+        self.resyncs += 1
+
+    def read_frame(self, valid_char_filter, deadline=None):
+        """
+        Returns the next telegram from the port as bytes.  May be short or unterminated if the device stops responding.
+
+        Gives up after reading `_MAX_FRAME_BYTES`.  If `deadline` is given, reads stop at that `time.monotonic()`
+        value, otherwise each read waits on the port's timeout.  pySerial reconfigures the port whenever its timeout
+        is set, so with a deadline the timeout is only changed when a read could wait too long or too little, and
+        is left for the caller to restore.
+        """
+        frame = bytearray()
+        want = 0  # Length of the telegram once its header is in
+        resynced = False
+        consumed = 0
+        while consumed < _MAX_FRAME_BYTES:
+            # Refill from the port when nothing is left over from the last read
+            if not self.rx:
+                if deadline is not None:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    # A read may overrun the deadline by less than the time remaining
+                    timeout = getattr(self.s, "timeout", None)
+                    if timeout is None or not remaining <= timeout < 2 * remaining:
+                        self.s.timeout = remaining
+                data = self.s.read(min(self._bytes_wanted(frame), _MAX_FRAME_BYTES - consumed))
+                if not data:
+                    break
+                self.rx += data
+
+            # Take bytes up to and including the terminator, but not past the end of a telegram whose header is in
+            end = self.rx.find(b"\r")
+            n = len(self.rx) if end < 0 else end + 1
+            if want:
+                n = min(n, want - len(frame))
+            n = min(n, _MAX_FRAME_BYTES - consumed)
+            chunk = bytes(self.rx[:n])
+            del self.rx[:n]
+            consumed += n
+
+            filtered = _filter_chars(chunk, valid_char_filter)
+            if filtered is not chunk:
+                self.dropped += len(chunk) - len(filtered)
+            frame += filtered
+
+            while True:
+                if not want:
+                    # Skip garbage until a header is found
+                    start = _resync(frame)
+                    if start:
+                        self._skip(frame, start)
+                        resynced = True
+                    if len(frame) >= 10:
+                        want = 14 + (frame[8] - 48) * 10 + frame[9] - 48
+                        if len(frame) > want:
+                            # Hand back what belongs after the telegram
+                            self.rx[:0] = frame[want:]
+                            consumed -= len(frame) - want
+                            del frame[want:]
+
+                terminated = frame.endswith(b"\r")
+                if not want or len(frame) < want and not terminated:
+                    break
+                if terminated and (not resynced or len(frame) == want and _checksum_ok(frame)):
+                    break
+
+                # The header was faked by noise if the telegram is unterminated at the length it gives, or, once noise
+                # has been skipped, is cut short or fails its checksum.  The real response is still to come.
+                self._skip(frame, 1)
+                resynced = True
+                want = 0
+
+            if frame.endswith(b"\r"):
+                if len(frame) != want:
+                    # The header may have been faked by noise, otherwise return the bad telegram
+                    start = _later_telegram(frame)
+                    if start is not None:
+                        self._skip(frame, start)
+                break
+        return bytes(frame)
+
+
+# Frame readers are kept per port so leftover bytes and settings survive between calls
+_frame_readers = weakref.WeakKeyDictionary()
+
+
+def _get_frame_reader(s):
+    try:
+        return _frame_readers[s]
+    except KeyError:
+        reader = _FrameReader(s)
+        _frame_readers[s] = reader
+        return reader
+    except TypeError:  # Port object cannot be weakly referenced, buffer for this call only
+        return _FrameReader(s)
+
+
+def reset_input_buffer(s):
+    """
+    Throw away everything received and not read yet, eg a late reply from a slow gauge.
+
+    Responses are read from the port in bulk, and bytes received past the end of a telegram are held by the library
+    for the next read.  Those bytes don't show in `s.in_waiting` and aren't cleared by `s.reset_input_buffer()`, use
+    this function instead.
+
+    :param s: The open serial device attached to the gauges.
+    """
+    try:
+        reader = _frame_readers.get(s)
+    except TypeError:
+        reader = None
+    if reader is not None:
+        reader.rx.clear()
+    if hasattr(s, "reset_input_buffer"):
+        s.reset_input_buffer()
+
+
+def set_valid_char_filter(s, valid_char_filter):
+    """
+    Set the valid character filter for one serial device, overriding the global setting.  Arguments passed to the
+    read/write functions still take precedence.
+
+    :param s: The open serial device attached to the gauges.
+    :param valid_char_filter: True to filter invalid characters, False to raise on them, or None to go back to the
+        global setting.
+    :type valid_char_filter: bool/None
+    """
+    reader = _get_frame_reader(s)
+    if reader is not _frame_readers.get(s):
+        raise ValueError("serial object cannot hold a valid character filter setting")
+    reader.valid_char_filter = valid_char_filter
+
+
+def _resolve_valid_char_filter(valid_char_filter, s=None):
+    # Fall back to the port's setting, then the global one, when the caller doesn't override it
+    if valid_char_filter is not None:
+        return valid_char_filter
+    if s is not None:
+        try:
+            reader = _frame_readers.get(s)
+        except TypeError:
+            reader = None
+        if reader is not None and reader.valid_char_filter is not None:
+            return reader.valid_char_filter
+    return _filter_invalid_char
 
 
 def _read_gauge_response(s, valid_char_filter=None):
-    if valid_char_filter is None:
-        valid_char_filter = _filter_invalid_char
+    valid_char_filter = _resolve_valid_char_filter(valid_char_filter, s)
+    inst = _instrument
+    if inst is not None:
+        return _read_gauge_response_observed(inst, s, valid_char_filter)
 
     # Read until newline or we stop getting a response
-    r = ""
-    for _ in range(64):
-        c = s.read(1)
+    return _parse_gauge_response(_get_frame_reader(s).read_frame(valid_char_filter))
 
-        if c == b"":
-            break
 
-        try:
-            r += c.decode("ascii")
-        except UnicodeDecodeError:
-            if valid_char_filter:
-                continue
-            raise InvalidCharError(
-                "Cannot decode character. This issue may sometimes be resolved by ignoring invalid "
-                "characters. Enable the filter globally by running the function "
-                "`pfeiffer_vacuum_protocol.enable_valid_char_filter()` after the import statement."
-            )
-
-        if c == b"\r":
-            break
+def _read_gauge_response_observed(inst, s, valid_char_filter):
+    # Same as `_read_gauge_response`, reporting the outcome to the instrumentation hook
+    reader = _get_frame_reader(s)
+    dropped, skipped = reader.dropped, reader.skipped
+    try:
+        frame = reader.read_frame(valid_char_filter)
+    except InvalidCharError as e:
+        inst.response(s, b"", 0, 0, e)
+        raise
+    return _parse_gauge_response_observed(inst, s, frame, reader.dropped - dropped, reader.skipped - skipped)
+
+
+def _parse_telegram(buf):
+    """
+    Splits a telegram into (address, action, parameter number, data) after checking its framing and checksum.
 
+    Works directly on the received bytes, the data field is returned undecoded.
+    """
     # Check the length
-    if len(r) < 14:
+    if len(buf) < 14:
         raise ValueError("gauge response too short to be valid")
 
     # Check it is terminated correctly
-    if r[-1] != "\r":
+    if buf[-1] != 13:
         raise ValueError("gauge response incorrectly terminated")
 
     # Evaluate the checksum
-    if int(r[-4:-1]) != (sum([ord(x) for x in r[:-4]]) % 256):
+    if int(buf[-4:-1]) != sum(buf[:-4]) % 256:
         raise ValueError("invalid checksum in gauge response")
 
-    # Pull out the address
-    addr = int(r[:3])
-    rw = int(r[3:4])
-    param_num = int(r[5:8])
-    data = r[10:-4]
+    return int(buf[:3]), int(buf[3:4]), int(buf[5:8]), buf[10:-4]
 
-    # Check for errors
-    if data == "NO_DEF":
-        raise ValueError("undefined parameter number")
-    if data == "_RANGE":
-        raise ValueError("data is out of range")
-    if data == "_LOGIC":
-        raise ValueError("logic access violation")
 
-    # Return it
-    return addr, rw, param_num, data
+# Data fields sent back by the gauge in place of a value when a request fails
+_ERROR_RESPONSES = {
+    b"NO_DEF": "undefined parameter number",
+    b"_RANGE": "data is out of range",
+    b"_LOGIC": "logic access violation",
+}
 
 
-def read_error_code(s, addr, valid_char_filter=None):
+class GaugeError(ValueError):
+    """
+    The gauge answered a request with an error code in place of data.  `code` is the data field it sent back, one of
+    "NO_DEF", "_RANGE" or "_LOGIC".
     """
-    Reads Pfeiffer's low level error code on the gauge.  This appears to be useful for diagnosing failure of the transmitter itself.
 
-    :param s: The open serial object pointing to an adapter attached to the gauge.
-    :param addr: The address of the gauge.
-    :type addr: int
-    :param valid_char_filter: Manually override the valid character filter.
-    :type valid_char_filter: bool/None
+    def __init__(self, message, code):
+        super().__init__(message)
+        self.code = code
+
+
+def _parse_gauge_response(buf):
+    addr, rw, param_num, data = _parse_telegram(buf)
+
+    # Check for errors
+    if data in _ERROR_RESPONSES:
+        raise GaugeError(_ERROR_RESPONSES[data], data.decode("ascii"))
+
+    # Return it
+    return addr, rw, param_num, data.decode("ascii")
 
-    :returns: The error code returned by the gauge, this can be one of `NO_ERROR`, `DEFECTIVE_TRANSMITTER`, or `DEFECTIVE_MEMORY`
-    :rtype: pfeiffer_vacuum_protocol.ErrorCode enum element
-    """
-    _send_data_request(s, addr, 303)
-    raddr, rw, rparam_num, rdata = _read_gauge_response(s, valid_char_filter=valid_char_filter)
 
-    if raddr != addr or rw != 1 or rparam_num != 303:
+def _parse_gauge_response_observed(inst, s, frame, dropped, skipped):
+    try:
+        response = _parse_gauge_response(frame)
+    except ValueError as e:
+        inst.response(s, frame, dropped, skipped, e)
+        raise
+    inst.response(s, frame, dropped, skipped, None)
+    return response
+
+
+def _check_response(response, addr, param_num):
+    # Make sure the gauge answered the request we sent and return the data field
+    raddr, rw, rparam_num, rdata = response
+    if raddr != addr or rw != 1 or rparam_num != param_num:
         raise ValueError("invalid response from gauge")
+    return rdata
+
+
+def _request(s, addr, param_num, valid_char_filter, policy):
+    # Send a data request and return the data field of the response
+    if policy is not None:
+        return policy.exchange(s, addr, param_num, None, valid_char_filter)
+    _send_data_request(s, addr, param_num)
+    return _check_response(_read_gauge_response(s, valid_char_filter=valid_char_filter), addr, param_num)
+
+
+def _command(s, addr, param_num, data_str, valid_char_filter, policy):
+    # Send a control command and return the data field acknowledged by the gauge
+    if policy is not None:
+        return policy.exchange(s, addr, param_num, data_str, valid_char_filter)
+    _send_control_command(s, addr, param_num, data_str)
+    return _check_response(_read_gauge_response(s, valid_char_filter=valid_char_filter), addr, param_num)
 
+
+def _decode_error_code(rdata):
     if rdata == "000000":
         return ErrorCode.NO_ERROR
     elif rdata == "Err001":
@@ -131,28 +424,266 @@ def read_error_code(s, addr, valid_char_filter=None):
         raise ValueError("unexpected error code from gauge")
 
 
-def read_software_version(s, addr, valid_char_filter=None):
+def _decode_software_version(rdata):
+    return int(rdata[0:2]), int(rdata[2:4]), int(rdata[4:])
+
+
+def _decode_gauge_type(rdata):
+    if rdata == "    A1":
+        return "CPT 100"
+    elif rdata == "    A2":
+        return "RPT 100"
+    elif rdata == "    A3":
+        return "PPT 100"
+    elif rdata == "    A4":
+        return "HPT 100"
+    elif rdata == "    A5":
+        return "MPT 100"
+    else:
+        raise ValueError("unrecognized gauge type")
+
+
+def _decode_boolean_old(rdata):
+    if rdata == "000000":
+        return False
+    elif rdata == "111111":
+        return True
+    else:
+        raise ValueError("invalid boolean from gauge")
+
+
+def _encode_boolean_old(val):
+    return "111111" if val else "000000"
+
+
+def _decode_u_integer(rdata):
+    return int(rdata)
+
+
+def _encode_u_integer(val):
+    if not 0 <= val <= 999999:
+        raise ValueError("value out of range")
+    return "{:06d}".format(val)
+
+
+def _decode_u_short_int(rdata):
+    return int(rdata)
+
+
+def _encode_u_short_int(val):
+    if not 0 <= val <= 999:
+        raise ValueError("value out of range")
+    return "{:03d}".format(val)
+
+
+def _decode_u_real(rdata):
+    return float(rdata) / 100
+
+
+def _encode_u_real(val):
+    return "{:06d}".format(int(val * 100))
+
+
+def _decode_u_expo_new(rdata):
+    # Four digit mantissa and two digit exponent, converted to bar
+    mantissa = int(rdata[:4])
+    exponent = int(rdata[4:]) - 26
+
+    # Exact integer arithmetic, so the value is only rounded once when converted to float
+    if exponent >= 0:
+        return float(mantissa * 10**exponent)
+    return mantissa / 10**-exponent
+
+
+def _encode_u_expo_new(val):
+    if val == 0:
+        return "000000"
+    if val < 0:
+        raise ValueError("value out of range")
+    exponent = math.floor(math.log10(val)) + 23
+    mantissa = round(val / 10 ** (exponent - 26))
+    if mantissa >= 10000:
+        mantissa //= 10
+        exponent += 1
+    if not 0 <= exponent <= 99:
+        raise ValueError("value out of range")
+    return "{:04d}{:02d}".format(mantissa, exponent)
+
+
+def _decode_string(rdata):
+    return rdata
+
+
+def _encode_string(val):
+    if len(val) != 6:
+        raise ValueError("strings must be six characters long")
+    return val
+
+
+# Codecs of the parameters handled by the dedicated functions
+_decode_pressure = _decode_u_expo_new
+_decode_correction_value = _decode_u_real
+_encode_correction_value = _encode_u_real
+
+
+def _encode_pressure_setpoint(val):
+    return "{:03d}".format(val)
+
+
+# A Pfeiffer data type and the functions converting between its data field and python values
+DataType = namedtuple("DataType", ["name", "decode", "encode"])
+
+DATA_TYPES = {
+    t.name: t
+    for t in (
+        DataType("boolean_old", _decode_boolean_old, _encode_boolean_old),
+        DataType("u_integer", _decode_u_integer, _encode_u_integer),
+        DataType("u_real", _decode_u_real, _encode_u_real),
+        DataType("string", _decode_string, _encode_string),
+        DataType("u_short_int", _decode_u_short_int, _encode_u_short_int),
+        DataType("u_expo_new", _decode_u_expo_new, _encode_u_expo_new),
+    )
+}
+
+# A parameter understood by `read_parameter` and `write_parameter`.  `access` is "r", "w", or "rw".
+Parameter = namedtuple("Parameter", ["number", "name", "dtype", "access", "decode", "encode"])
+
+# Parameter number -> Parameter
+PARAMETERS = {}
+
+# Decoders for the data field of each readable parameter and encoders for each writable one
+_DATA_DECODERS = {}
+_DATA_ENCODERS = {}
+
+
+def register_parameter(number, name, dtype, access="r", decode=None, encode=None):
     """
-    Returns the vacuum gauge's firmware version.
+    Add a parameter to the registry, or replace one, so it can be used with `read_parameter` and `write_parameter`.
+
+    :param number: The parameter number from the gauge's manual.
+    :type number: int
+    :param name: A short name for the parameter.
+    :type name: str
+    :param dtype: The Pfeiffer data type, one of the keys of `DATA_TYPES`.
+    :type dtype: str
+    :param access: "r" if the parameter can be read, "w" if it can be written, or "rw" for both.
+    :type access: str
+    :param decode: Converts the data field to a python value, defaults to the data type's decoder.
+    :param encode: Converts a python value to the data field, defaults to the data type's encoder.
+
+    :returns: The registered parameter
+    :rtype: pfeiffer_vacuum_protocol.Parameter
+    """
+    if dtype not in DATA_TYPES:
+        raise ValueError("unknown data type {!r}".format(dtype))
+    if access not in ("r", "w", "rw"):
+        raise ValueError("access must be one of 'r', 'w', or 'rw'")
+    dt = DATA_TYPES[dtype]
+    param = Parameter(number, name, dtype, access, decode or dt.decode, encode or dt.encode)
+
+    PARAMETERS[number] = param
+    _DATA_DECODERS.pop(number, None)
+    _DATA_ENCODERS.pop(number, None)
+    if "r" in access:
+        _DATA_DECODERS[number] = param.decode
+    if "w" in access:
+        _DATA_ENCODERS[number] = param.encode
+    return param
+
+
+register_parameter(303, "error_code", "string", decode=_decode_error_code)
+register_parameter(312, "software_version", "string", decode=_decode_software_version)
+register_parameter(349, "gauge_type", "string", decode=_decode_gauge_type)
+register_parameter(740, "pressure", "u_expo_new")
+register_parameter(741, "pressure_setpoint", "u_short_int", access="w", encode=_encode_pressure_setpoint)
+register_parameter(742, "correction_value", "u_real", access="rw")
+
+
+def read_parameter(s, addr, param_num, valid_char_filter=None, policy=None):
+    """
+    Reads any parameter in `PARAMETERS` from the gauge.
 
     :param s: The open serial device attached to the gauge.
     :param addr: The address of the gauge.
     :type addr: int
+    :param param_num: The parameter number.
+    :type param_num: int
     :param valid_char_filter: Manually override the valid character filter.
     :type valid_char_filter: bool/None
+    :param policy: Timeout and retry policy for the exchange, or None to rely on the port's timeout.
+    :type policy: pfeiffer_vacuum_protocol.RetryPolicy/None
 
-    :returns: The version numbers as the tuple (major, minor, sub-minor)
+    :returns: The value decoded according to the parameter's data type
     """
-    _send_data_request(s, addr, 312)
-    raddr, rw, rparam_num, rdata = _read_gauge_response(s, valid_char_filter=valid_char_filter)
+    try:
+        decode = _DATA_DECODERS[param_num]
+    except KeyError:
+        raise ValueError("cannot read parameter {:d}".format(param_num)) from None
+    return decode(_request(s, addr, param_num, valid_char_filter, policy))
 
-    if raddr != addr or rw != 1 or rparam_num != 312:
-        raise ValueError("invalid response from gauge")
 
-    return int(rdata[0:2]), int(rdata[2:4]), int(rdata[4:])
+def write_parameter(s, addr, param_num, val, valid_char_filter=None, policy=None):
+    """
+    Writes any parameter in `PARAMETERS` on the gauge and checks the gauge acknowledged the value.
 
+    :param s: The open serial device attached to the gauge.
+    :param addr: The address of the gauge.
+    :type addr: int
+    :param param_num: The parameter number.
+    :type param_num: int
+    :param val: The value, encoded according to the parameter's data type.
+    :param valid_char_filter: Manually override the valid character filter.
+    :type valid_char_filter: bool/None
+    :param policy: Timeout and retry policy for the exchange, or None to rely on the port's timeout.
+    :type policy: pfeiffer_vacuum_protocol.RetryPolicy/None
+    :returns: None
+    :rtype: None
+    """
+    try:
+        encode = _DATA_ENCODERS[param_num]
+    except KeyError:
+        raise ValueError("cannot write parameter {:d}".format(param_num)) from None
+    data = encode(val)
+    if _command(s, addr, param_num, data, valid_char_filter, policy) != data:
+        raise ValueError("invalid acknowledgment from gauge")
 
-def read_gauge_type(s, addr, valid_char_filter=None):
+
+def read_error_code(s, addr, valid_char_filter=None, policy=None):
+    """
+    Reads Pfeiffer's low level error code on the gauge.  This appears to be useful for diagnosing failure of the transmitter itself.
+
+    :param s: The open serial object pointing to an adapter attached to the gauge.
+    :param addr: The address of the gauge.
+    :type addr: int
+    :param valid_char_filter: Manually override the valid character filter.
+    :type valid_char_filter: bool/None
+    :param policy: Timeout and retry policy for the exchange, or None to rely on the port's timeout.
+    :type policy: pfeiffer_vacuum_protocol.RetryPolicy/None
+
+    :returns: The error code returned by the gauge, this can be one of `NO_ERROR`, `DEFECTIVE_TRANSMITTER`, or `DEFECTIVE_MEMORY`
+    :rtype: pfeiffer_vacuum_protocol.ErrorCode enum element
+    """
+    return read_parameter(s, addr, 303, valid_char_filter, policy)
+
+
+def read_software_version(s, addr, valid_char_filter=None, policy=None):
+    """
+    Returns the vacuum gauge's firmware version.
+
+    :param s: The open serial device attached to the gauge.
+    :param addr: The address of the gauge.
+    :type addr: int
+    :param valid_char_filter: Manually override the valid character filter.
+    :type valid_char_filter: bool/None
+    :param policy: Timeout and retry policy for the exchange, or None to rely on the port's timeout.
+    :type policy: pfeiffer_vacuum_protocol.RetryPolicy/None
+
+    :returns: The version numbers as the tuple (major, minor, sub-minor)
+    """
+    return read_parameter(s, addr, 312, valid_char_filter, policy)
+
+
+def read_gauge_type(s, addr, valid_char_filter=None, policy=None):
     """
     Returns the name of the vacuum gauge attached at this address.
 
@@ -161,31 +692,16 @@ def read_gauge_type(s, addr, valid_char_filter=None):
     :type addr: int
     :param valid_char_filter: Manually override the valid character filter.
     :type valid_char_filter: bool/None
+    :param policy: Timeout and retry policy for the exchange, or None to rely on the port's timeout.
+    :type policy: pfeiffer_vacuum_protocol.RetryPolicy/None
 
     :returns: The model name of the gauge attached
     :rtype: str
     """
-    _send_data_request(s, addr, 349)
-    raddr, rw, rparam_num, rdata = _read_gauge_response(s, valid_char_filter=valid_char_filter)
-
-    if raddr != addr or rw != 1 or rparam_num != 349:
-        raise ValueError("invalid response from gauge")
-
-    if rdata == "    A1":
-        return "CPT 100"
-    elif rdata == "    A2":
-        return "RPT 100"
-    elif rdata == "    A3":
-        return "PPT 100"
-    elif rdata == "    A4":
-        return "HPT 100"
-    elif rdata == "    A5":
-        return "MPT 100"
-    else:
-        raise ValueError("unrecognized gauge type")
+    return read_parameter(s, addr, 349, valid_char_filter, policy)
 
 
-def read_pressure(s, addr, valid_char_filter=None):
+def read_pressure(s, addr, valid_char_filter=None, policy=None):
     """
     Reads the pressure from the gauge and returns it in bars.
 
@@ -194,23 +710,16 @@ def read_pressure(s, addr, valid_char_filter=None):
     :type addr: int
     :param valid_char_filter: Manually override the valid character filter.
     :type valid_char_filter: bool/None
+    :param policy: Timeout and retry policy for the exchange, or None to rely on the port's timeout.
+    :type policy: pfeiffer_vacuum_protocol.RetryPolicy/None
 
     :returns: Pressure measured by gauge in bars
     :rtype: float
     """
-    _send_data_request(s, addr, 740)
-    raddr, rw, rparam_num, rdata = _read_gauge_response(s, valid_char_filter=valid_char_filter)
-
-    if raddr != addr or rw != 1 or rparam_num != 740:
-        raise ValueError("invalid response from gauge")
-
-    # Convert to a float
-    mantissa = int(rdata[:4])
-    exponent = int(rdata[4:])
-    return float(mantissa * 10 ** (exponent - 26))
+    return read_parameter(s, addr, 740, valid_char_filter, policy)
 
 
-def write_pressure_setpoint(s, addr, val, valid_char_filter=None):
+def write_pressure_setpoint(s, addr, val, valid_char_filter=None, policy=None):
     """
     Sets the gauge's "vacuum setpoint".  In the manual, this appears to tell the gauge if it's operating in a high or low pressure regime to change some of its signal processing.
 
@@ -219,25 +728,17 @@ def write_pressure_setpoint(s, addr, val, valid_char_filter=None):
     :type addr: int
     :param valid_char_filter: Manually override the valid character filter.
     :type valid_char_filter: bool/None
+    :param policy: Timeout and retry policy for the exchange, or None to rely on the port's timeout.
+    :type policy: pfeiffer_vacuum_protocol.RetryPolicy/None
     :param val: Manually override the valid character filter.
     :type val: The setpoint
     :returns: None
     :rtype: None
     """
-    # Format the data
-    data = "{:03d}".format(val)
-    _send_control_command(s, addr, 741, data)
-    raddr, rw, rparam_num, rdata = _read_gauge_response(s, valid_char_filter=valid_char_filter)
+    write_parameter(s, addr, 741, val, valid_char_filter, policy)
 
-    # Check the response
-    if raddr != addr or rw != 1 or rparam_num != 741:
-        raise ValueError("invalid response from gauge")
-
-    if rdata != data:
-        raise ValueError("invalid acknowledgment from gauge")
 
-
-def read_correction_value(s, addr, valid_char_filter=None):
+def read_correction_value(s, addr, valid_char_filter=None, policy=None):
     """
     Returns the current correction value used to adjust pressure measurements for different gas compositions.
 
@@ -246,19 +747,15 @@ def read_correction_value(s, addr, valid_char_filter=None):
     :type addr: int
     :param valid_char_filter: Manually override the valid character filter.
     :type valid_char_filter: bool/None
+    :param policy: Timeout and retry policy for the exchange, or None to rely on the port's timeout.
+    :type policy: pfeiffer_vacuum_protocol.RetryPolicy/None
 
     :returns: The current correction value
     """
-    _send_data_request(s, addr, 742)
-    raddr, rw, rparam_num, rdata = _read_gauge_response(s, valid_char_filter=valid_char_filter)
-
-    if raddr != addr or rw != 1 or rparam_num != 742:
-        raise ValueError("invalid response from gauge")
-
-    return float(rdata) / 100
+    return read_parameter(s, addr, 742, valid_char_filter, policy)
 
 
-def write_correction_value(s, addr, val, valid_char_filter=None):
+def write_correction_value(s, addr, val, valid_char_filter=None, policy=None):
     """
     Sets the correction value on the gauge.  Used to adjust the pressure measurement for different gas compositions.
 
@@ -267,19 +764,11 @@ def write_correction_value(s, addr, val, valid_char_filter=None):
     :type addr: int
     :param valid_char_filter: Manually override the valid character filter.
     :type valid_char_filter: bool/None
+    :param policy: Timeout and retry policy for the exchange, or None to rely on the port's timeout.
+    :type policy: pfeiffer_vacuum_protocol.RetryPolicy/None
     :param val: The value it will be set to
     :type val: float
     :returns: None
     :rtype: None
     """
-    # Format the data
-    data = "{:06d}".format(int(val * 100))
-    _send_control_command(s, addr, 742, data)
-    raddr, rw, rparam_num, rdata = _read_gauge_response(s, valid_char_filter=valid_char_filter)
-
-    # Check the response
-    if raddr != addr or rw != 1 or rparam_num != 742:
-        raise ValueError("invalid response from gauge")
-
-    if rdata != data:
-        raise ValueError("invalid acknowledgment from gauge")
+    write_parameter(s, addr, 742, val, valid_char_filter, policy)
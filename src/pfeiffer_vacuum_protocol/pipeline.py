@@ -0,0 +1,152 @@
+from collections import deque, namedtuple
+
+from . import pfeiffer_vacuum_protocol as _core
+from .pfeiffer_vacuum_protocol import (
+    InvalidCharError,
+    _DATA_DECODERS,
+    _check_response,
+    _get_frame_reader,
+    _parse_gauge_response,
+    _parse_gauge_response_observed,
+    _read_gauge_response,
+    _resolve_valid_char_filter,
+    _send_data_request,
+    reset_input_buffer,
+)
+
+# Result of `read_pipelined`.  `values` and `errors` are keyed by (addr, param_num), `fallbacks` counts the times the
+# pipeline was abandoned for lockstep exchanges.
+PipelineResult = namedtuple("PipelineResult", ["values", "errors", "fallbacks"])
+
+
+def _read_frame(s, valid_char_filter):
+    # Returns the next frame, and the numbers of bytes removed by the valid character filter and skipped as noise
+    reader = _get_frame_reader(s)
+    dropped, skipped = reader.dropped, reader.skipped
+    frame = reader.read_frame(valid_char_filter)
+    return frame, reader.dropped - dropped, reader.skipped - skipped
+
+
+def _parse_response(s, frame, dropped, skipped):
+    # Returns the parsed response, or None if nothing at all arrived before the port timed out
+    inst = _core._instrument
+    if not frame:
+        if inst is not None:
+            inst.response(s, frame, dropped, skipped, ValueError("gauge response too short to be valid"))
+        return None
+    if inst is not None:
+        return _parse_gauge_response_observed(inst, s, frame, dropped, skipped)
+    return _parse_gauge_response(frame)
+
+
+def read_pipelined(s, requests, depth=2, valid_char_filter=None, buffered=False):
+    """
+    Read many parameters, sending each data request as soon as the bus is free instead of after the previous response
+    has been handled.
+
+    By default, a request is written the moment the terminator of the previous response arrives, before that response
+    is parsed and decoded, so the bus is never driven by both ends at once.  Adapters that hold back transmission until
+    the bus is idle can take more: with `buffered`, up to `depth` requests are written ahead of their responses, which
+    hides the gauges' turnaround and the latency of USB adapters.  On a plain half-duplex adapter, requests written
+    ahead collide with the responses.
+
+    Responses are matched to the outstanding requests by their address and parameter number.  A request whose response
+    is skipped over is marked as failed.  When a response can't be matched, or can't be parsed, the input is flushed
+    and the remaining requests are made in lockstep.
+
+    :param s: The open serial device attached to the gauges.
+    :param requests: The (address, parameter) pairs to read, any readable parameter in
+        `pfeiffer_vacuum_protocol.PARAMETERS`.
+    :type requests: list of tuple
+    :param depth: One makes every exchange lockstep.  With `buffered`, the largest number of requests in flight.
+    :type depth: int
+    :param valid_char_filter: Manually override the valid character filter.
+    :type valid_char_filter: bool/None
+    :param buffered: The adapter holds back transmission until the bus is idle, so requests can be written ahead.
+    :type buffered: bool
+
+    :returns: The decoded values and the errors raised for each request
+    :rtype: pfeiffer_vacuum_protocol.pipeline.PipelineResult
+    """
+    requests = list(requests)
+    for _, param_num in requests:
+        if param_num not in _DATA_DECODERS:
+            raise ValueError("cannot read parameter {:d}".format(param_num))
+    if depth < 1:
+        raise ValueError("depth must be at least 1")
+    valid_char_filter = _resolve_valid_char_filter(valid_char_filter, s)
+    ahead = depth if buffered else 1
+
+    values = {}
+    errors = {}
+    pending = deque(requests)
+    in_flight = deque()
+    fallbacks = 0
+
+    reset_input_buffer(s)
+    while depth > 1 and (pending or in_flight):
+        # Keep the pipeline full
+        while pending and len(in_flight) < ahead:
+            key = pending.popleft()
+            _send_data_request(s, *key)
+            in_flight.append(key)
+
+        answered = True
+        try:
+            frame, dropped, skipped = _read_frame(s, valid_char_filter)
+            answered = bool(frame)
+            if pending and not buffered and frame.endswith(b"\r"):
+                # The gauge is done talking, the next request can go out while this response is handled
+                key = pending.popleft()
+                _send_data_request(s, *key)
+                in_flight.append(key)
+            response = _parse_response(s, frame, dropped, skipped)
+        except (ValueError, InvalidCharError):
+            response = False
+
+        if response is None:
+            # Silence, the oldest request will never be answered.  Carry on unless later ones were written ahead of it.
+            errors[in_flight.popleft()] = ValueError("gauge response too short to be valid")
+            matched = not in_flight
+        elif response is False:
+            matched = False
+        else:
+            raddr, rw, rparam_num, rdata = response
+            key = (raddr, rparam_num)
+            matched = rw == 1 and key in in_flight
+            if matched:
+                # Requests sent before the one answered were skipped over by their gauges
+                while in_flight[0] != key:
+                    errors[in_flight.popleft()] = ValueError("gauge response too short to be valid")
+                in_flight.popleft()
+                try:
+                    values[key] = _DATA_DECODERS[rparam_num](rdata)
+                    errors.pop(key, None)
+                except ValueError as e:
+                    errors[key] = e
+
+        if not matched:
+            # Lost track of which response belongs to which request, redo the rest one at a time once the responses to
+            # the requests already written are in
+            fallbacks += 1
+            for _ in range(len(in_flight) - answered):
+                try:
+                    _read_frame(s, valid_char_filter)
+                except InvalidCharError:
+                    pass
+            pending.extendleft(reversed(in_flight))
+            in_flight.clear()
+            reset_input_buffer(s)
+            break
+
+    # Lockstep exchanges
+    for key in pending:
+        try:
+            reset_input_buffer(s)
+            _send_data_request(s, *key)
+            rdata = _check_response(_read_gauge_response(s, valid_char_filter), *key)
+            values[key] = _DATA_DECODERS[key[1]](rdata)
+            errors.pop(key, None)
+        except (ValueError, InvalidCharError) as e:
+            errors[key] = e
+    return PipelineResult(values, errors, fallbacks)
@@ -0,0 +1,161 @@
+import random
+import time
+
+from . import pfeiffer_vacuum_protocol as _core
+from .pfeiffer_vacuum_protocol import (
+    InvalidCharError,
+    _ERROR_RESPONSES,
+    _check_response,
+    _get_frame_reader,
+    _parse_gauge_response,
+    _parse_gauge_response_observed,
+    _send_control_command,
+    _send_data_request,
+    reset_input_buffer,
+)
+
+
+def _telegram_lengths(data_str):
+    # Bytes sent and expected back for a data request (data_str None) or a control command
+    if data_str is None:
+        return 16, 20
+    return 14 + len(data_str), 14 + len(data_str)
+
+
+class RetryPolicy:
+    """
+    Timeout and retry behavior for a single exchange with a gauge, passed to the read/write functions as `policy`.
+
+    Each attempt gets a deadline sized for the telegrams involved instead of the port's timeout, so a response that
+    lost a byte is given up on quickly.  Attempts that fail with a bad checksum, a short or garbled telegram, or a reply
+    to some other request are retried after draining any stale bytes from the port and waiting a random jitter.  Error
+    replies from the gauge (NO_DEF, _RANGE, _LOGIC) are never retried.
+    """
+
+    def __init__(
+        self,
+        retries=2,
+        timeout=None,
+        turnaround=0.02,
+        latency=0.016,
+        slack=1.5,
+        jitter=0.005,
+        backoff=0.0,
+        retry_timeouts=False,
+        bits_per_char=10,
+    ):
+        """
+        :param retries: Number of attempts made after the first one fails.
+        :type retries: int
+        :param timeout: Fixed time allowed for each attempt in seconds, or None to work it out from the baudrate.
+        :type timeout: float/None
+        :param turnaround: Time the gauge takes to start answering, in seconds.
+        :type turnaround: float
+        :param latency: Delay added by the adapter, eg 0.016 for the default FTDI latency timer, in seconds.
+        :type latency: float
+        :param slack: Factor applied to the time the telegrams take on the wire.
+        :type slack: float
+        :param jitter: Largest random delay before a retry, in seconds.
+        :type jitter: float
+        :param backoff: Delay before the first retry, doubled for every later one, in seconds.
+        :type backoff: float
+        :param retry_timeouts: Also retry when nothing at all was received.  Off by default because a missing gauge
+            would then cost every attempt.
+        :type retry_timeouts: bool
+        :param bits_per_char: Bits on the wire per byte, including start and stop bits.
+        :type bits_per_char: int
+        """
+        if retries < 0:
+            raise ValueError("retries cannot be negative")
+        self.retries = retries
+        self.timeout = timeout
+        self.turnaround = turnaround
+        self.latency = latency
+        self.slack = slack
+        self.jitter = jitter
+        self.backoff = backoff
+        self.retry_timeouts = retry_timeouts
+        self.bits_per_char = bits_per_char
+
+    def attempt_timeout(self, baudrate, n_tx, n_rx):
+        """
+        Time allowed for one attempt in seconds.
+
+        :param baudrate: The port's baudrate, 9600 if None.
+        :type baudrate: int/None
+        :param n_tx: Bytes in the telegram sent.
+        :type n_tx: int
+        :param n_rx: Bytes expected in the response.
+        :type n_rx: int
+        """
+        if self.timeout is not None:
+            return self.timeout
+        wire = (n_tx + n_rx) * self.bits_per_char / (baudrate or 9600)
+        return wire * self.slack + self.turnaround + self.latency
+
+    def delay(self, attempt):
+        """
+        Time to wait before retry number `attempt`, counting from one.
+        """
+        return self.backoff * 2 ** (attempt - 1) + random.uniform(0, self.jitter)
+
+    def retryable(self, frame):
+        """
+        Whether an attempt that got `frame` back and failed is worth repeating.
+        """
+        if not frame:
+            return self.retry_timeouts
+        if len(frame) >= 14 and frame.endswith(b"\r") and frame[10:-4] in _ERROR_RESPONSES:
+            # The gauge understood and refused the request, unless the telegram was mangled in transit
+            return frame[-4:-1].isdigit() and int(frame[-4:-1]) != sum(frame[:-4]) % 256
+        return True
+
+    def exchange(self, s, addr, param_num, data_str, valid_char_filter):
+        """
+        Make a data request (`data_str` None) or control command, retrying as needed.  Used by the read/write
+        functions.
+
+        :returns: The data field of the response
+        :rtype: str
+        """
+        timeout = self.attempt_timeout(getattr(s, "baudrate", None), *_telegram_lengths(data_str))
+        valid_char_filter = _core._resolve_valid_char_filter(valid_char_filter, s)
+        reader = _get_frame_reader(s)
+        # Set the timeout once for every attempt, reads only change it again to meet their deadline
+        old_timeout = getattr(s, "timeout", None)
+        if old_timeout != timeout:
+            s.timeout = timeout
+        try:
+            for attempt in range(self.retries + 1):
+                if attempt:
+                    reset_input_buffer(s)
+                    time.sleep(self.delay(attempt))
+
+                if data_str is None:
+                    _send_data_request(s, addr, param_num)
+                else:
+                    _send_control_command(s, addr, param_num, data_str)
+
+                inst = _core._instrument
+                dropped, skipped = reader.dropped, reader.skipped
+                try:
+                    frame = reader.read_frame(valid_char_filter, time.monotonic() + timeout)
+                except InvalidCharError as e:
+                    if inst is not None:
+                        inst.response(s, b"", 0, 0, e)
+                    raise
+
+                try:
+                    if inst is not None:
+                        response = _parse_gauge_response_observed(
+                            inst, s, frame, reader.dropped - dropped, reader.skipped - skipped
+                        )
+                    else:
+                        response = _parse_gauge_response(frame)
+                    return _check_response(response, addr, param_num)
+                except ValueError:
+                    if attempt == self.retries or not self.retryable(frame):
+                        raise
+        finally:
+            if s.timeout != old_timeout:
+                s.timeout = old_timeout
@@ -0,0 +1,146 @@
+import math
+import time
+from collections import namedtuple
+
+from .pfeiffer_vacuum_protocol import (
+    InvalidCharError,
+    _DATA_DECODERS,
+    _check_response,
+    _read_gauge_response,
+    _send_data_request,
+    reset_input_buffer,
+)
+from .pipeline import read_pipelined
+
+# Result of one pass over the bus.  `values` and `errors` are keyed by (addr, param_num).
+Snapshot = namedtuple("Snapshot", ["timestamp", "duration", "values", "errors"])
+
+
+class BusPoller:
+    """
+    Reads a fixed set of parameters from many gauges sharing one RS485 port.
+
+    Every sweep sends the same requests in the same order so the sampling interval of each gauge stays even.  A gauge
+    that does not answer within `timeout` only costs its own slot, its error is recorded and the sweep moves on.
+    """
+
+    def __init__(
+        self,
+        s,
+        addrs,
+        params=(740,),
+        timeout=0.1,
+        valid_char_filter=None,
+        history=None,
+        name=None,
+        depth=1,
+        buffered=False,
+    ):
+        """
+        :param s: The open serial device attached to the gauges.
+        :param addrs: The addresses of the gauges to poll.
+        :type addrs: list of int
+        :param params: The parameter numbers to read from every gauge, any readable one in
+            `pfeiffer_vacuum_protocol.PARAMETERS`.
+        :type params: list of int
+        :param timeout: Read timeout applied to the port while waiting on each gauge, in seconds.
+        :type timeout: float/None
+        :param valid_char_filter: Manually override the valid character filter.
+        :type valid_char_filter: bool/None
+        :param history: Pressure readings (parameter 740) are also written here when given.
+        :type history: pfeiffer_vacuum_protocol.history.PressureHistory/None
+        :param name: Port name used as the history key, defaults to the serial object's `port` attribute.
+        :type name: str/None
+        :param depth: More than one sends each request as soon as the previous response is in, see
+            `pfeiffer_vacuum_protocol.pipeline.read_pipelined`.
+        :type depth: int
+        :param buffered: The adapter holds back transmission until the bus is idle, so up to `depth` requests can be
+            written ahead of their responses.
+        :type buffered: bool
+        """
+        for param_num in params:
+            if param_num not in _DATA_DECODERS:
+                raise ValueError("cannot poll parameter {:d}".format(param_num))
+
+        self.s = s
+        self.schedule = [(addr, param_num) for addr in addrs for param_num in params]
+        self.timeout = timeout
+        self.valid_char_filter = valid_char_filter
+        self.history = history
+        self.name = name if name is not None else getattr(s, "port", None)
+        self.depth = depth
+        self.buffered = buffered
+
+        # Number of sweeps where pipelining fell back to lockstep exchanges
+        self.fallbacks = 0
+
+    def _poll_one(self, addr, param_num):
+        reset_input_buffer(self.s)
+        _send_data_request(self.s, addr, param_num)
+        rdata = _check_response(_read_gauge_response(self.s, self.valid_char_filter), addr, param_num)
+        return _DATA_DECODERS[param_num](rdata)
+
+    def sweep(self):
+        """
+        Poll every (address, parameter) pair once.
+
+        :returns: The values read and the errors raised during the sweep
+        :rtype: pfeiffer_vacuum_protocol.poller.Snapshot
+        """
+        values = {}
+        errors = {}
+
+        # Apply the per-gauge timeout for the duration of the sweep, pySerial reconfigures the port on every change
+        old_timeout = getattr(self.s, "timeout", None)
+        set_timeout = hasattr(self.s, "timeout") and old_timeout != self.timeout
+        if set_timeout:
+            self.s.timeout = self.timeout
+
+        timestamp = time.time()
+        start = time.perf_counter()
+        try:
+            if self.depth > 1:
+                values, errors, fallbacks = read_pipelined(
+                    self.s, self.schedule, self.depth, self.valid_char_filter, self.buffered
+                )
+                self.fallbacks += fallbacks > 0
+            else:
+                for key in self.schedule:
+                    try:
+                        values[key] = self._poll_one(*key)
+                    except (ValueError, InvalidCharError) as e:
+                        errors[key] = e
+        finally:
+            if set_timeout:
+                self.s.timeout = old_timeout
+
+        if self.history is not None:
+            self._record_history(timestamp, values)
+        return Snapshot(timestamp, time.perf_counter() - start, values, errors)
+
+    def _record_history(self, timestamp, values):
+        for addr, param_num in self.schedule:
+            if param_num == 740:
+                p = values.get((addr, 740))
+                if p is None:
+                    self.history.append(self.name, addr, timestamp, math.nan, 1)
+                else:
+                    self.history.append(self.name, addr, timestamp, p)
+
+    def sweeps(self, period=None):
+        """
+        Generator yielding one snapshot per sweep forever.
+
+        :param period: Time between the start of each sweep in seconds, or back to back sweeps if None.
+        :type period: float/None
+        """
+        next_start = time.perf_counter()
+        while True:
+            yield self.sweep()
+            if period is not None:
+                next_start += period
+                delay = next_start - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    next_start = time.perf_counter()
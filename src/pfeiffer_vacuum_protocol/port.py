@@ -0,0 +1,198 @@
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from .pfeiffer_vacuum_protocol import read_parameter, reset_input_buffer, write_parameter
+
+# Tells the I/O thread to exit
+_STOP = object()
+
+
+class Port:
+    """
+    Owns a serial object shared by many threads.  A lock is held across every request/response exchange so telegrams
+    from different threads can't interleave on the half-duplex bus.
+
+    Requests can be made directly with the read/write methods, which block on the lock, or handed to `submit` which
+    queues them for a single I/O thread and returns a `concurrent.futures.Future`.
+    """
+
+    def __init__(self, s, valid_char_filter=None):
+        """
+        :param s: The open serial device attached to the gauges.
+        :param valid_char_filter: Default valid character filter setting for requests on this port.
+        :type valid_char_filter: bool/None
+        """
+        self.s = s
+        self.valid_char_filter = valid_char_filter
+        self.lock = threading.Lock()
+        self.queue = queue.Queue()
+        self._thread = None
+        self._thread_lock = threading.Lock()
+
+        # Contention and queue statistics
+        self._transactions = 0
+        self._contended = 0
+        self._lock_wait_total = 0.0
+        self._lock_wait_max = 0.0
+        self._queue_depth_max = 0
+
+    def transaction(self, fn, *args, **kwargs):
+        """
+        Run `fn(s, *args, **kwargs)` while holding the port lock.  `fn` is any function taking the serial object
+        first, like `pfeiffer_vacuum_protocol.read_pressure`.  If the port has a valid character filter setting, it is
+        passed to `fn` unless overridden.
+        """
+        if self.valid_char_filter is not None and kwargs.get("valid_char_filter") is None:
+            kwargs["valid_char_filter"] = self.valid_char_filter
+
+        t0 = time.perf_counter()
+        if not self.lock.acquire(blocking=False):
+            self.lock.acquire()
+            contended = True
+        else:
+            contended = False
+        try:
+            wait = time.perf_counter() - t0
+            self._transactions += 1
+            self._contended += contended
+            self._lock_wait_total += wait
+            self._lock_wait_max = max(self._lock_wait_max, wait)
+            return fn(self.s, *args, **kwargs)
+        finally:
+            self.lock.release()
+
+    def submit(self, fn, *args, **kwargs):
+        """
+        Queue `fn(s, *args, **kwargs)` for the port's I/O thread, starting it if needed.
+
+        :returns: A future holding the result of the call
+        :rtype: concurrent.futures.Future
+        """
+        self.start()
+        future = Future()
+        self.queue.put((future, fn, args, kwargs))
+        self._queue_depth_max = max(self._queue_depth_max, self.queue.qsize())
+        return future
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                break
+            future, fn, args, kwargs = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            try:
+                future.set_result(self.transaction(fn, *args, **kwargs))
+            except BaseException as e:
+                future.set_exception(e)
+
+    def start(self):
+        """
+        Start the I/O thread draining the request queue.
+        """
+        with self._thread_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="pfeiffer-port-io", daemon=True)
+                self._thread.start()
+
+    def close(self):
+        """
+        Finish the queued requests, stop the I/O thread, and close the serial object.
+        """
+        with self._thread_lock:
+            if self._thread is not None:
+                self.queue.put(_STOP)
+                self._thread.join()
+                self._thread = None
+        with self.lock:
+            if hasattr(self.s, "close"):
+                self.s.close()
+
+    def reset_input_buffer(self):
+        """
+        See `pfeiffer_vacuum_protocol.reset_input_buffer`.
+        """
+        with self.lock:
+            reset_input_buffer(self.s)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def stats(self):
+        """
+        Lock contention and queue depth measured on this port.
+
+        :returns: The number of transactions, how many had to wait for the lock, the total and longest wait in
+            seconds, and the current and largest request queue depth
+        :rtype: dict
+        """
+        return {
+            "transactions": self._transactions,
+            "contended": self._contended,
+            "lock_wait_total": self._lock_wait_total,
+            "lock_wait_max": self._lock_wait_max,
+            "queue_depth": self.queue.qsize(),
+            "queue_depth_max": self._queue_depth_max,
+        }
+
+    def read_parameter(self, addr, param_num, valid_char_filter=None, policy=None):
+        """
+        See `pfeiffer_vacuum_protocol.read_parameter`.
+        """
+        return self.transaction(read_parameter, addr, param_num, valid_char_filter=valid_char_filter, policy=policy)
+
+    def write_parameter(self, addr, param_num, val, valid_char_filter=None, policy=None):
+        """
+        See `pfeiffer_vacuum_protocol.write_parameter`.
+        """
+        return self.transaction(
+            write_parameter, addr, param_num, val, valid_char_filter=valid_char_filter, policy=policy
+        )
+
+    def read_error_code(self, addr, valid_char_filter=None, policy=None):
+        """
+        See `pfeiffer_vacuum_protocol.read_error_code`.
+        """
+        return self.read_parameter(addr, 303, valid_char_filter, policy)
+
+    def read_software_version(self, addr, valid_char_filter=None, policy=None):
+        """
+        See `pfeiffer_vacuum_protocol.read_software_version`.
+        """
+        return self.read_parameter(addr, 312, valid_char_filter, policy)
+
+    def read_gauge_type(self, addr, valid_char_filter=None, policy=None):
+        """
+        See `pfeiffer_vacuum_protocol.read_gauge_type`.
+        """
+        return self.read_parameter(addr, 349, valid_char_filter, policy)
+
+    def read_pressure(self, addr, valid_char_filter=None, policy=None):
+        """
+        See `pfeiffer_vacuum_protocol.read_pressure`.
+        """
+        return self.read_parameter(addr, 740, valid_char_filter, policy)
+
+    def write_pressure_setpoint(self, addr, val, valid_char_filter=None, policy=None):
+        """
+        See `pfeiffer_vacuum_protocol.write_pressure_setpoint`.
+        """
+        return self.write_parameter(addr, 741, val, valid_char_filter, policy)
+
+    def read_correction_value(self, addr, valid_char_filter=None, policy=None):
+        """
+        See `pfeiffer_vacuum_protocol.read_correction_value`.
+        """
+        return self.read_parameter(addr, 742, valid_char_filter, policy)
+
+    def write_correction_value(self, addr, val, valid_char_filter=None, policy=None):
+        """
+        See `pfeiffer_vacuum_protocol.write_correction_value`.
+        """
+        return self.write_parameter(addr, 742, val, valid_char_filter, policy)
@@ -0,0 +1,197 @@
+import threading
+import time
+
+from .pfeiffer_vacuum_protocol import read_parameter, write_parameter
+from .port import Port
+
+
+def _pyserial_factory(**kwargs):
+    def factory(name):
+        try:
+            import serial
+        except ImportError:
+            raise ImportError("opening ports by name requires `pySerial`, or pass a factory to the registry")
+        return serial.Serial(name, **kwargs)
+
+    return factory
+
+
+class PortRegistry:
+    """
+    Opens each serial port once and shares it between every caller through a `Port`.
+
+    Ports are opened on first use by calling `factory(name)`, without holding up requests on the ports already open.
+    When a port raises `OSError`, for example because the adapter was unplugged, it is closed and reopened on a later
+    request.  Reconnect attempts back off exponentially while the port keeps failing.
+    """
+
+    def __init__(self, factory=None, backoff=0.5, max_backoff=30.0, valid_char_filter=None, **serial_kwargs):
+        """
+        :param factory: Function opening a serial object from a port name.  Defaults to `serial.Serial(name,
+            **serial_kwargs)` from pySerial.
+        :param backoff: Wait before the first reconnect attempt in seconds.  Doubles on every failed attempt.
+        :type backoff: float
+        :param max_backoff: Longest wait between reconnect attempts in seconds.
+        :type max_backoff: float
+        :param valid_char_filter: Default valid character filter setting for every port.
+        :type valid_char_filter: bool/None
+        """
+        self.factory = factory if factory is not None else _pyserial_factory(**serial_kwargs)
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.valid_char_filter = valid_char_filter
+        self.lock = threading.Lock()
+        self.ports = {}
+        self.gauges = {}
+
+        # Port name -> lock held while the port is being opened
+        self.opening = {}
+
+        # Port name -> (number of failed attempts, time of the next allowed attempt)
+        self.failures = {}
+
+    def port(self, name):
+        """
+        Get the shared port, opening it if needed.
+
+        :param name: The name of the serial port, eg "COM1" or "/dev/ttyUSB0".
+        :type name: str
+        :returns: The port
+        :rtype: pfeiffer_vacuum_protocol.Port
+        """
+        with self.lock:
+            port = self.ports.get(name)
+            if port is not None:
+                return port
+            opening = self.opening.setdefault(name, threading.Lock())
+
+        # Open outside the registry lock so a slow adapter doesn't hold up the other ports, one caller at a time per
+        # port so it's only opened once
+        with opening:
+            with self.lock:
+                port = self.ports.get(name)
+                if port is not None:
+                    return port
+                n_failed, next_attempt = self.failures.get(name, (0, 0.0))
+                wait = next_attempt - time.monotonic()
+                if wait > 0:
+                    raise ConnectionError(
+                        "port {} is unavailable, next reconnect attempt in {:.2f} s".format(name, wait)
+                    )
+
+            try:
+                s = self.factory(name)
+            except OSError:
+                with self.lock:
+                    self._backoff(name, n_failed)
+                raise
+
+            port = Port(s, valid_char_filter=self.valid_char_filter)
+            with self.lock:
+                self.ports[name] = port
+                self.failures.pop(name, None)
+            return port
+
+    def _backoff(self, name, n_failed):
+        delay = min(self.backoff * 2**n_failed, self.max_backoff)
+        self.failures[name] = (n_failed + 1, time.monotonic() + delay)
+
+    def gauge(self, name, addr):
+        """
+        Get a handle to the gauge at `addr` on a port.  The port is only opened when the handle is used.
+
+        :param name: The name of the serial port.
+        :type name: str
+        :param addr: The address of the gauge.
+        :type addr: int
+        :rtype: pfeiffer_vacuum_protocol.registry.Gauge
+        """
+        with self.lock:
+            gauge = self.gauges.get((name, addr))
+            if gauge is None:
+                gauge = Gauge(self, name, addr)
+                self.gauges[(name, addr)] = gauge
+            return gauge
+
+    def transaction(self, name, fn, *args, **kwargs):
+        """
+        Run `fn(s, *args, **kwargs)` on a port while holding its lock.  The port is dropped if this raises `OSError`.
+        """
+        port = self.port(name)
+        try:
+            return port.transaction(fn, *args, **kwargs)
+        except OSError:
+            self._drop(name, port)
+            raise
+
+    def _drop(self, name, port):
+        with self.lock:
+            if self.ports.get(name) is not port:
+                return
+            del self.ports[name]
+            self._backoff(name, 0)
+        try:
+            port.close()
+        except OSError:
+            pass
+
+    def close(self):
+        """
+        Close every open port.
+        """
+        with self.lock:
+            ports = list(self.ports.values())
+            self.ports.clear()
+        for port in ports:
+            port.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class Gauge:
+    """
+    Handle to a gauge at an address on one of the registry's ports.
+    """
+
+    def __init__(self, registry, name, addr):
+        self.registry = registry
+        self.name = name
+        self.addr = addr
+
+    def __repr__(self):
+        return "Gauge({!r}, {:d})".format(self.name, self.addr)
+
+    def read_parameter(self, param_num, valid_char_filter=None, policy=None):
+        return self.registry.transaction(
+            self.name, read_parameter, self.addr, param_num, valid_char_filter=valid_char_filter, policy=policy
+        )
+
+    def write_parameter(self, param_num, val, valid_char_filter=None, policy=None):
+        return self.registry.transaction(
+            self.name, write_parameter, self.addr, param_num, val, valid_char_filter=valid_char_filter, policy=policy
+        )
+
+    def read_error_code(self, valid_char_filter=None, policy=None):
+        return self.read_parameter(303, valid_char_filter, policy)
+
+    def read_software_version(self, valid_char_filter=None, policy=None):
+        return self.read_parameter(312, valid_char_filter, policy)
+
+    def read_gauge_type(self, valid_char_filter=None, policy=None):
+        return self.read_parameter(349, valid_char_filter, policy)
+
+    def read_pressure(self, valid_char_filter=None, policy=None):
+        return self.read_parameter(740, valid_char_filter, policy)
+
+    def write_pressure_setpoint(self, val, valid_char_filter=None, policy=None):
+        return self.write_parameter(741, val, valid_char_filter, policy)
+
+    def read_correction_value(self, valid_char_filter=None, policy=None):
+        return self.read_parameter(742, valid_char_filter, policy)
+
+    def write_correction_value(self, val, valid_char_filter=None, policy=None):
+        return self.write_parameter(742, val, valid_char_filter, policy)
@@ -0,0 +1,268 @@
+import math
+import time
+from collections import namedtuple
+
+from .pfeiffer_vacuum_protocol import (
+    InvalidCharError,
+    _DATA_DECODERS,
+    _check_response,
+    _read_gauge_response,
+    _send_data_request,
+    reset_input_buffer,
+)
+
+# One reading made by the scheduler.  `value` is None and `error` holds the exception when the read failed.
+Reading = namedtuple("Reading", ["timestamp", "addr", "param", "value", "error"])
+
+# Bytes on the wire for a data request and a typical response
+_EXCHANGE_BYTES = 16 + 20
+
+# No timeout saved
+_UNSET = object()
+
+
+class _Task:
+    def __init__(self, addr, param_num, rate, priority, cost):
+        self.addr = addr
+        self.param_num = param_num
+        self.rate = rate
+        self.priority = priority
+        self.allocated = rate
+        self.cost = cost
+        self.next_due = 0.0
+        self.reads = 0
+        self.errors = 0
+
+
+class AdaptiveScheduler:
+    """
+    Polls each (address, parameter) pair of a half-duplex bus at its own rate.
+
+    Requested rates are granted in order of priority as long as the estimated bus time fits in `budget`.  The
+    priority level that no longer fits is slowed down proportionally and lower priorities get no bus time at all.
+    The time each exchange takes is measured as the scheduler runs, so the estimates follow the real bus.  A gauge that
+    keeps failing, typically by timing out, has its polling slowed down exponentially until it answers again.
+    """
+
+    def __init__(
+        self,
+        s,
+        tasks,
+        timeout=0.1,
+        budget=0.9,
+        fail_threshold=3,
+        max_backoff=60.0,
+        exchange_time=None,
+        valid_char_filter=None,
+        history=None,
+        name=None,
+    ):
+        """
+        :param s: The open serial device attached to the gauges.
+        :param tasks: (address, parameter) -> polling rate in reads per second, or (rate, priority).  The default
+            priority is 0 and higher priorities are served first.  Parameters can be any readable one in
+            `pfeiffer_vacuum_protocol.PARAMETERS`.
+        :type tasks: dict
+        :param timeout: Read timeout applied to the port while waiting on each gauge, in seconds.
+        :type timeout: float/None
+        :param budget: Fraction of the bus time the scheduler may use.
+        :type budget: float
+        :param fail_threshold: Number of failed reads in a row before a gauge is backed off.
+        :type fail_threshold: int
+        :param max_backoff: Longest time between reads of a backed off gauge, in seconds.
+        :type max_backoff: float
+        :param exchange_time: Initial estimate of the bus time taken by one request and response in seconds, computed
+            from the port's baudrate if None.
+        :type exchange_time: float/None
+        :param valid_char_filter: Manually override the valid character filter.
+        :type valid_char_filter: bool/None
+        :param history: Pressure readings (parameter 740) are also written here when given.
+        :type history: pfeiffer_vacuum_protocol.history.PressureHistory/None
+        :param name: Port name used as the history key, defaults to the serial object's `port` attribute.
+        :type name: str/None
+        """
+        if not 0 < budget <= 1:
+            raise ValueError("budget must be in (0, 1]")
+
+        # Initial estimate of the time for one exchange, replaced by measurements as we go
+        cost = exchange_time
+        if cost is None:
+            cost = _EXCHANGE_BYTES * 10 / (getattr(s, "baudrate", 9600) or 9600)
+
+        self.tasks = []
+        for (addr, param_num), spec in tasks.items():
+            rate, priority = spec if isinstance(spec, tuple) else (spec, 0)
+            if param_num not in _DATA_DECODERS:
+                raise ValueError("cannot poll parameter {:d}".format(param_num))
+            if rate <= 0:
+                raise ValueError("rate must be positive")
+            self.tasks.append(_Task(addr, param_num, rate, priority, cost))
+
+        self.s = s
+        self.timeout = timeout
+        self.budget = budget
+        self.fail_threshold = fail_threshold
+        self.max_backoff = max_backoff
+        self.valid_char_filter = valid_char_filter
+        self.history = history
+        self.name = name if name is not None else getattr(s, "port", None)
+
+        # Address -> number of failed reads in a row
+        self.failures = {}
+        self.start_time = None
+        self.polls_since_allocation = 0
+        self._allocate()
+
+        # Port timeout to restore once polling stops, if it was changed
+        self.old_timeout = _UNSET
+
+    def backoff(self, addr):
+        """
+        Factor the polling interval of a gauge is currently stretched by, 1 if it is healthy.
+        """
+        n = self.failures.get(addr, 0)
+        if n < self.fail_threshold:
+            return 1
+        return 2 ** min(n - self.fail_threshold + 1, 30)
+
+    def _allocate(self):
+        # Hand out bus time by priority, scaling down the first level that doesn't fit
+        capacity = self.budget
+        for priority in sorted({t.priority for t in self.tasks}, reverse=True):
+            level = [t for t in self.tasks if t.priority == priority]
+            wanted = {}
+            for t in level:
+                rate = t.rate / self.backoff(t.addr)
+                wanted[t] = max(rate, min(t.rate, 1.0 / self.max_backoff))
+            demand = sum(rate * t.cost for t, rate in wanted.items())
+            scale = 1.0 if demand <= capacity else capacity / demand
+            for t, rate in wanted.items():
+                t.allocated = rate * scale
+            capacity = max(capacity - demand, 0.0)
+        self.polls_since_allocation = 0
+
+    def _next_task(self, now):
+        # The highest priority task that is due, otherwise the one due soonest
+        active = [t for t in self.tasks if t.allocated > 0]
+        due = [t for t in active if t.next_due <= now]
+        if due:
+            return max(due, key=lambda t: (t.priority, -t.next_due))
+        return min(active, key=lambda t: t.next_due, default=None)
+
+    def _read(self, t):
+        reset_input_buffer(self.s)
+        _send_data_request(self.s, t.addr, t.param_num)
+        rdata = _check_response(_read_gauge_response(self.s, self.valid_char_filter), t.addr, t.param_num)
+        return _DATA_DECODERS[t.param_num](rdata)
+
+    def poll(self):
+        """
+        Wait for the next read to be due, make it, and return it.  The port's timeout is left set to `timeout`
+        until `restore_timeout` is called, which `readings` does when it ends.
+
+        :returns: The reading, or None if every task is starved of bus time
+        :rtype: pfeiffer_vacuum_protocol.scheduler.Reading/None
+        """
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+            for t in self.tasks:
+                t.next_due = self.start_time
+
+        t = self._next_task(time.perf_counter())
+        if t is None:
+            return None
+        delay = t.next_due - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+
+        # Apply the per-gauge timeout, only when it changed since pySerial reconfigures the port every time
+        if hasattr(self.s, "timeout") and self.s.timeout != self.timeout:
+            if self.old_timeout is _UNSET:
+                self.old_timeout = self.s.timeout
+            self.s.timeout = self.timeout
+        timestamp = time.time()
+        start = time.perf_counter()
+        try:
+            value = self._read(t)
+            error = None
+        except (ValueError, InvalidCharError) as e:
+            value = None
+            error = e
+        now = time.perf_counter()
+
+        # Track the bus time this exchange took
+        t.cost += 0.2 * (now - start - t.cost)
+        t.reads += 1
+
+        # Back off gauges that keep failing, restore them once they answer
+        old_backoff = self.backoff(t.addr)
+        if error is None:
+            self.failures.pop(t.addr, None)
+        else:
+            t.errors += 1
+            self.failures[t.addr] = self.failures.get(t.addr, 0) + 1
+        self.polls_since_allocation += 1
+        if self.backoff(t.addr) != old_backoff or self.polls_since_allocation >= len(self.tasks):
+            self._allocate()
+
+        # Stay on the grid, but don't burst to catch up after falling behind
+        if t.allocated > 0:
+            t.next_due = max(t.next_due + 1.0 / t.allocated, now)
+
+        if self.history is not None and t.param_num == 740:
+            if error is None:
+                self.history.append(self.name, t.addr, timestamp, value)
+            else:
+                self.history.append(self.name, t.addr, timestamp, math.nan, 1)
+        return Reading(timestamp, t.addr, t.param_num, value, error)
+
+    def readings(self):
+        """
+        Generator yielding readings forever, or until every task is starved of bus time.  The port's timeout is
+        restored when the generator ends or is closed.
+        """
+        try:
+            while True:
+                reading = self.poll()
+                if reading is None:
+                    return
+                yield reading
+        finally:
+            self.restore_timeout()
+
+    def restore_timeout(self):
+        """
+        Put back the port's timeout from before polling started.
+        """
+        if self.old_timeout is not _UNSET:
+            self.s.timeout = self.old_timeout
+            self.old_timeout = _UNSET
+
+    def utilization(self):
+        """
+        Estimated fraction of the bus time used at the allocated rates.
+        """
+        return sum(t.allocated * t.cost for t in self.tasks)
+
+    def stats(self):
+        """
+        Requested, allocated and achieved rates of every task since polling started.
+
+        :returns: (address, parameter) -> dict with the requested, allocated and achieved rates in reads per second,
+            priority, number of reads and failed reads, the backoff factor, and the measured time per exchange
+        :rtype: dict
+        """
+        elapsed = time.perf_counter() - self.start_time if self.start_time is not None else 0.0
+        return {
+            (t.addr, t.param_num): {
+                "requested": t.rate,
+                "allocated": t.allocated,
+                "achieved": t.reads / elapsed if elapsed > 0 else 0.0,
+                "priority": t.priority,
+                "reads": t.reads,
+                "errors": t.errors,
+                "backoff": self.backoff(t.addr),
+                "cost": t.cost,
+            }
+            for t in self.tasks
+        }
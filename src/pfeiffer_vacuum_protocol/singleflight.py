@@ -0,0 +1,217 @@
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+
+from .port import Port
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class SingleFlight:
+    """
+    Lets concurrent callers asking for the same key share one call.
+
+    While a call for a key is running, callers asking for the same key wait for it and get its result, or its
+    exception, instead of making their own call.  With a `max_age`, the result is also handed to callers arriving up to
+    that many seconds after the call completed.  Exceptions are never kept past the call.
+
+    A `barrier` marks a change the calls can't see coming, like a write to a gauge.  Results of calls that were in
+    flight at either end of the barrier are not shared with later callers.
+    """
+
+    def __init__(self, max_age=0.0):
+        """
+        :param max_age: Time a result is reused after its call completed in seconds.  Zero only shares calls in flight.
+        :type max_age: float
+        """
+        self.max_age = max_age
+        self.lock = threading.Lock()
+
+        # Key -> call in flight, and key -> (time completed, result)
+        self.flights = {}
+        self.results = {}
+
+        self.calls = 0
+        self.shared = 0
+        self.hits = 0
+
+    def _fresh(self, key):
+        # The kept result for `key` if it is still fresh, called with the lock held
+        entry = self.results.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() - entry[0] <= self.max_age:
+            self.hits += 1
+            return entry
+        del self.results[key]
+        return None
+
+    def _land(self, key, flight, ok, value):
+        # Retire a finished call, keeping its result unless a barrier detached it
+        with self.lock:
+            if self.flights.get(key) is flight:
+                del self.flights[key]
+                if ok and self.max_age > 0:
+                    self.results[key] = (time.monotonic(), value)
+
+    def call(self, key, fn, *args, **kwargs):
+        """
+        Return `fn(*args, **kwargs)`, or the result of the call already made for `key`.
+        """
+        with self.lock:
+            entry = self._fresh(key)
+            if entry is not None:
+                return entry[1]
+            flight = self.flights.get(key)
+            if flight is None:
+                flight = self.flights[key] = _Flight()
+                self.calls += 1
+                leader = True
+            else:
+                self.shared += 1
+                leader = False
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = fn(*args, **kwargs)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            self._land(key, flight, flight.error is None, flight.value)
+            flight.done.set()
+        return flight.value
+
+    def invalidate(self, match=None):
+        """
+        Drop kept results, and stop sharing the calls in flight with callers arriving from now on.
+
+        :param match: Only affect the keys for which `match(key)` is true, or every key if None.
+        """
+        with self.lock:
+            for table in (self.flights, self.results):
+                for key in [key for key in table if match is None or match(key)]:
+                    del table[key]
+
+    @contextmanager
+    def barrier(self, match=None):
+        """
+        Context manager wrapped around a change to the data the calls read, eg a write to a gauge.  Invalidates the
+        matching keys on entry and on exit.
+        """
+        self.invalidate(match)
+        try:
+            yield
+        finally:
+            self.invalidate(match)
+
+    def stats(self):
+        """
+        :returns: dict with the number of calls made, callers that shared a call in flight, and callers served a kept
+            result
+        :rtype: dict
+        """
+        with self.lock:
+            return {"calls": self.calls, "shared": self.shared, "hits": self.hits}
+
+
+class AsyncSingleFlight(SingleFlight):
+    """
+    `SingleFlight` for asyncio, where `fn` is a coroutine function.  A caller that is cancelled doesn't cancel the call
+    others are waiting on.
+    """
+
+    async def call(self, key, fn, *args, **kwargs):
+        """
+        Return `await fn(*args, **kwargs)`, or the result of the call already made for `key`.
+        """
+        with self.lock:
+            entry = self._fresh(key)
+            if entry is not None:
+                return entry[1]
+            task = self.flights.get(key)
+            if task is None:
+                task = self.flights[key] = asyncio.ensure_future(fn(*args, **kwargs))
+                task.add_done_callback(lambda t: self._done(key, t))
+                self.calls += 1
+            else:
+                self.shared += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key, task):
+        ok = not task.cancelled() and task.exception() is None
+        self._land(key, task, ok, task.result() if ok else None)
+
+
+class Coalescer:
+    """
+    Lets threads reading the same parameter from the same gauge share one exchange on the bus.
+
+    Reads arriving while the same read is on the bus get its result, as do reads within `max_age` seconds after it.
+    Writes act as a barrier for their gauge, no read of that gauge made before or during a write is shared with reads
+    made after it.  Reads sharing an exchange get its result whatever their own `valid_char_filter` and `policy`.
+    """
+
+    def __init__(self, s, max_age=0.0, valid_char_filter=None):
+        """
+        :param s: The open serial device attached to the gauges, or a `pfeiffer_vacuum_protocol.Port`.
+        :param max_age: Time a value is reused after it was read in seconds.  Zero only shares reads in flight.
+        :type max_age: float
+        :param valid_char_filter: Default valid character filter setting for reads and writes.
+        :type valid_char_filter: bool/None
+        """
+        self.port = s if isinstance(s, Port) else Port(s, valid_char_filter=valid_char_filter)
+        self.flights = SingleFlight(max_age)
+
+    def read_parameter(self, addr, param_num, valid_char_filter=None, policy=None):
+        """
+        See `pfeiffer_vacuum_protocol.read_parameter`.
+        """
+        return self.flights.call(
+            (addr, param_num), self.port.read_parameter, addr, param_num, valid_char_filter, policy
+        )
+
+    def write_parameter(self, addr, param_num, val, valid_char_filter=None, policy=None):
+        """
+        See `pfeiffer_vacuum_protocol.write_parameter`.
+        """
+        with self.flights.barrier(lambda key: key[0] == addr):
+            return self.port.write_parameter(addr, param_num, val, valid_char_filter, policy)
+
+    def stats(self):
+        """
+        See `SingleFlight.stats`.
+        """
+        return self.flights.stats()
+
+    def read_error_code(self, addr, valid_char_filter=None, policy=None):
+        return self.read_parameter(addr, 303, valid_char_filter, policy)
+
+    def read_software_version(self, addr, valid_char_filter=None, policy=None):
+        return self.read_parameter(addr, 312, valid_char_filter, policy)
+
+    def read_gauge_type(self, addr, valid_char_filter=None, policy=None):
+        return self.read_parameter(addr, 349, valid_char_filter, policy)
+
+    def read_pressure(self, addr, valid_char_filter=None, policy=None):
+        return self.read_parameter(addr, 740, valid_char_filter, policy)
+
+    def write_pressure_setpoint(self, addr, val, valid_char_filter=None, policy=None):
+        return self.write_parameter(addr, 741, val, valid_char_filter, policy)
+
+    def read_correction_value(self, addr, valid_char_filter=None, policy=None):
+        return self.read_parameter(addr, 742, valid_char_filter, policy)
+
+    def write_correction_value(self, addr, val, valid_char_filter=None, policy=None):
+        return self.write_parameter(addr, 742, val, valid_char_filter, policy)
@@ -0,0 +1,117 @@
+import asyncio
+import math
+import time
+from collections import namedtuple
+
+from . import aio
+from .pfeiffer_vacuum_protocol import InvalidCharError, read_pressure
+from .port import Port
+
+# A pressure reading from a stream.  `pressure` is None and `error` holds the exception when the read failed.  `lag`
+# is how late the tick this reading belongs to started, in seconds, and `skipped` counts the ticks dropped just before
+# it because the consumer fell behind.
+Sample = namedtuple("Sample", ["timestamp", "addr", "pressure", "error", "lag", "skipped"])
+
+
+class _Schedule:
+    """
+    Tick times on a fixed grid so the period doesn't drift with the time spent reading and consuming.
+    """
+
+    def __init__(self, rate, max_lag, now):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        self.period = 1.0 / rate
+        self.max_lag = max_lag
+        self.next_tick = now
+
+    def advance(self, now):
+        """
+        Returns the delay until the next tick, its lag, and the number of ticks skipped to get to it.
+        """
+        lag = now - self.next_tick
+        skipped = 0
+        if lag > self.max_lag * self.period:
+            # Too far behind, drop the missed ticks instead of bursting through them
+            skipped = int(math.floor(lag / self.period))
+            self.next_tick += skipped * self.period
+            lag = now - self.next_tick
+        tick = self.next_tick
+        self.next_tick += self.period
+        return max(tick - now, 0.0), max(lag, 0.0), skipped
+
+
+def stream_pressure(s, addrs, rate, max_lag=1, valid_char_filter=None):
+    """
+    Generator reading the pressure from every gauge in `addrs` at `rate` passes per second, forever.
+
+    Readings are made lazily when the consumer asks for them.  If the consumer falls more than `max_lag` periods
+    behind, the missed passes are skipped and counted in the `skipped` field of the next sample rather than read in a
+    burst.
+
+    :param s: The open serial device, or a `pfeiffer_vacuum_protocol.Port`.
+    :param addrs: The addresses of the gauges.
+    :type addrs: list of int
+    :param rate: Passes over the gauges per second.
+    :type rate: float
+    :param max_lag: Number of periods the stream may run behind before skipping passes.
+    :type max_lag: float
+    :param valid_char_filter: Manually override the valid character filter.
+    :type valid_char_filter: bool/None
+
+    :returns: One `Sample` per gauge per pass
+    """
+    addrs = list(addrs)
+    if isinstance(s, Port):
+
+        def read(addr):
+            return s.read_pressure(addr, valid_char_filter=valid_char_filter)
+    else:
+
+        def read(addr):
+            return read_pressure(s, addr, valid_char_filter=valid_char_filter)
+
+    schedule = _Schedule(rate, max_lag, time.perf_counter())
+    while True:
+        delay, lag, skipped = schedule.advance(time.perf_counter())
+        if delay > 0:
+            time.sleep(delay)
+        for addr in addrs:
+            try:
+                sample = Sample(time.time(), addr, read(addr), None, lag, skipped)
+            except (ValueError, InvalidCharError) as e:
+                sample = Sample(time.time(), addr, None, e, lag, skipped)
+            skipped = 0
+            yield sample
+
+
+async def astream_pressure(port, addrs, rate, max_lag=1, valid_char_filter=None):
+    """
+    Async iterator version of `stream_pressure`.
+
+    :param port: The port attached to the gauges.
+    :type port: pfeiffer_vacuum_protocol.aio.AsyncPort
+    :param addrs: The addresses of the gauges.
+    :type addrs: list of int
+    :param rate: Passes over the gauges per second.
+    :type rate: float
+    :param max_lag: Number of periods the stream may run behind before skipping passes.
+    :type max_lag: float
+    :param valid_char_filter: Manually override the valid character filter.
+    :type valid_char_filter: bool/None
+    """
+    addrs = list(addrs)
+    loop = asyncio.get_running_loop()
+    schedule = _Schedule(rate, max_lag, loop.time())
+    while True:
+        delay, lag, skipped = schedule.advance(loop.time())
+        if delay > 0:
+            await asyncio.sleep(delay)
+        for addr in addrs:
+            try:
+                p = await aio.read_pressure(port, addr, valid_char_filter=valid_char_filter)
+                sample = Sample(time.time(), addr, p, None, lag, skipped)
+            except (ValueError, InvalidCharError) as e:
+                sample = Sample(time.time(), addr, None, e, lag, skipped)
+            skipped = 0
+            yield sample
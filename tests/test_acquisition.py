@@ -0,0 +1,75 @@
+import threading
+import time
+import unittest
+import pfeiffer_vacuum_protocol.mock as mock
+import pfeiffer_vacuum_protocol as pvp
+
+
+def _port(n, silent=()):
+    return mock.Serial(mock.Bus([mock.PPT100(address=a, silent=a in silent) for a in range(1, n + 1)]), "COM")
+
+
+class TestMultiPortAcquisition(unittest.TestCase):
+    def test_merge(self):
+        ports = {"COM1": _port(3), "COM2": _port(2, silent=(2,)), "COM3": _port(1)}
+        addrs = {"COM1": [1, 2, 3], "COM2": [1, 2], "COM3": [1]}
+        acq = pvp.MultiPortAcquisition(ports, addrs, period=0.005)
+        acq.start()
+        threading.Timer(0.1, acq.stop).start()
+        recs = list(acq.records())
+
+        self.assertEqual([r.timestamp for r in recs], sorted(r.timestamp for r in recs))
+        self.assertEqual({r.port for r in recs}, {"COM1", "COM2", "COM3"})
+        self.assertTrue(all(r.value == 1.0 for r in recs if r.error is None))
+        self.assertTrue(all(r.port == "COM2" and r.addr == 2 for r in recs if r.error is not None))
+
+        stats = acq.stats()
+        self.assertEqual(sum(x["reads"] for x in stats.values()), len(recs))
+        self.assertGreater(stats["COM1"]["rate"], 0)
+        self.assertGreater(stats["COM2"]["errors"], 0)
+
+    def test_reader(self):
+        acq = pvp.MultiPortAcquisition({"COM1": pvp.Port(_port(1))}, {"COM1": [1]}, reader=pvp.read_gauge_type)
+        with acq:
+            time.sleep(0.01)
+        recs = list(acq.records())
+        self.assertGreater(len(recs), 0)
+        self.assertEqual({r.value for r in recs}, {"PPT 100"})
+
+    def test_restart(self):
+        acq = pvp.MultiPortAcquisition({"COM1": _port(1), "COM2": _port(1)}, {"COM1": [1], "COM2": [1]})
+        for _ in range(2):
+            with acq:
+                time.sleep(0.01)
+            recs = list(acq.records())
+            self.assertGreater(len(recs), 0)
+            self.assertEqual([r.timestamp for r in recs], sorted(r.timestamp for r in recs))
+            self.assertEqual(sum(x["reads"] for x in acq.stats().values()), len(recs))
+
+    def test_max_queued(self):
+        history = pvp.PressureHistory(capacity=100000)
+        acq = pvp.MultiPortAcquisition({"COM1": _port(1)}, {"COM1": [1]}, history=history, max_queued=5)
+        with acq:
+            time.sleep(0.02)
+        stats = acq.stats()["COM1"]
+        self.assertEqual(len(list(acq.records())), 5)
+        self.assertEqual(stats["dropped"], stats["reads"] - 5)
+        self.assertEqual(history.count("COM1", 1), stats["reads"])
+
+    def test_history_other_values(self):
+        history = pvp.PressureHistory()
+        acq = pvp.MultiPortAcquisition({"COM1": _port(1)}, {"COM1": [1]}, reader=pvp.read_gauge_type, history=history)
+        with acq:
+            time.sleep(0.01)
+        stats = acq.stats()["COM1"]
+        self.assertGreater(stats["reads"], 1)
+        self.assertEqual(stats["history_errors"], stats["reads"])
+        self.assertEqual(len(list(acq.records())), stats["reads"])
+
+    def test_not_started(self):
+        acq = pvp.MultiPortAcquisition({"COM1": _port(1)}, {"COM1": [1]})
+        self.assertEqual(list(acq.records()), [])
+
+
+if __name__ == "__main__":
+    unittest.main()
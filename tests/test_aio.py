@@ -0,0 +1,71 @@
+import asyncio
+import unittest
+import pfeiffer_vacuum_protocol.mock as mock
+import pfeiffer_vacuum_protocol as pvp
+from pfeiffer_vacuum_protocol import aio
+
+
+class TestAsync(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        pvp.disable_valid_char_filter()
+        self.port = await aio.open_mock_connection(mock.Serial(mock.PPT100(), "COM1"), timeout=0.05)
+
+    async def asyncTearDown(self):
+        self.port.close()
+
+    async def test_read_error_code(self):
+        self.assertEqual(await aio.read_error_code(self.port, 1), pvp.ErrorCode.NO_ERROR)
+
+    async def test_read_software_version(self):
+        self.assertEqual(await aio.read_software_version(self.port, 1), (1, 1, 0))
+
+    async def test_read_gauge_type(self):
+        self.assertEqual(await aio.read_gauge_type(self.port, 1), "PPT 100")
+
+    async def test_read_pressure(self):
+        self.assertEqual(await aio.read_pressure(self.port, 1), 1.0)
+
+    async def test_write_pressure_setpoint(self):
+        await aio.write_pressure_setpoint(self.port, 1, 0)
+        await aio.write_pressure_setpoint(self.port, 1, 1)
+        with self.assertRaises(ValueError):
+            await aio.write_pressure_setpoint(self.port, 1, 2)
+
+    async def test_read_correction_value(self):
+        self.assertEqual(await aio.read_correction_value(self.port, 1), 1.0)
+
+    async def test_write_correction_value(self):
+        await aio.write_correction_value(self.port, 1, 1.0)
+
+    async def test_no_response(self):
+        with self.assertRaises(ValueError):
+            await aio.read_pressure(self.port, 2)
+
+    async def test_concurrent(self):
+        r = await asyncio.gather(*[aio.read_pressure(self.port, 1) for _ in range(10)])
+        self.assertEqual(r, [1.0] * 10)
+
+    async def test_connection_lost(self):
+        self.port.close()
+        await asyncio.sleep(0)
+        with self.assertRaises(ConnectionError):
+            await aio.read_pressure(self.port, 1)
+
+
+class TestAsyncNonAscii(unittest.IsolatedAsyncioTestCase):
+    async def test_filter(self):
+        port = await aio.open_mock_connection(mock.Serial(mock.PPT100(nonascii=True), "COM1"), timeout=0.05)
+        self.assertEqual(await aio.read_pressure(port, 1, valid_char_filter=True), 1.0)
+        with self.assertRaises(pvp.InvalidCharError):
+            await aio.read_pressure(port, 1, valid_char_filter=False)
+
+    async def test_port_setting(self):
+        s = mock.Serial(mock.PPT100(noise=b"\xff" * 100 + b"junk\r"), "COM1")
+        port = await aio.open_mock_connection(s, timeout=0.05, valid_char_filter=True)
+        self.assertEqual(await aio.read_pressure(port, 1), 1.0)
+        with self.assertRaises(pvp.InvalidCharError):
+            await aio.read_pressure(port, 1, valid_char_filter=False)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,67 @@
+import math
+import random
+import unittest
+from fractions import Fraction
+from unittest import mock
+import pfeiffer_vacuum_protocol as pvp
+from pfeiffer_vacuum_protocol import batch
+from pfeiffer_vacuum_protocol.batch import decode_batch
+from pfeiffer_vacuum_protocol.pfeiffer_vacuum_protocol import _control_telegram
+
+
+class TestDecodeBatch(unittest.TestCase):
+    def test_values(self):
+        blob = (
+            b"0011074006100023025\r"  # 1 bar
+            + _control_telegram(2, 740, "250020")  # 2.5 mbar
+            + b"0011074206000100022\r"  # correction 1.0
+            + b"0011034906    A3236\r"  # gauge type, no value
+            + b"0010074002=?106\r"  # request, no value
+            + b"0011074006100023026\r"  # bad checksum
+            + b"0011073906NO_DEF198\r"  # error response
+            + b"\xff\xff0011074006100023025\r"  # noise
+            + b"00110740"  # incomplete
+        )
+        r = decode_batch(blob)
+        self.assertEqual(list(r.valid), [1, 1, 1, 1, 1, 0, 0, 0])
+        self.assertEqual(list(r.addr), [1, 2, 1, 1, 1, 0, 0, 0])
+        self.assertEqual(list(r.param), [740, 740, 742, 349, 740, 0, 0, 0])
+        self.assertEqual(list(r.action), [1, 1, 1, 1, 0, 0, 0, 0])
+        self.assertEqual(list(r.value[:3]), [1.0, 0.0025, 1.0])
+        self.assertTrue(all(math.isnan(x) for x in r.value[3:]))
+        self.assertEqual(r.consumed, len(blob) - 8)
+
+    def test_fixed_width(self):
+        blob = b"0011074006100023025\r" * 3 + b"0011074006100023026\r"
+        r = decode_batch(blob, width=20)
+        self.assertEqual(list(r.valid), [1, 1, 1, 0])
+        self.assertEqual(r.consumed, 80)
+
+    def test_matches_read_pressure(self):
+        rng = random.Random(0)
+        frames = []
+        for _ in range(200):
+            data = "{:04d}{:02d}".format(rng.randrange(10000), rng.randrange(100))
+            frames.append(_control_telegram(rng.randrange(1, 256), 740, data))
+        for numpy in (batch.np, None):
+            with mock.patch.object(batch, "np", numpy):
+                r = decode_batch(b"".join(frames))
+            for frame, value in zip(frames, r.value):
+                self.assertEqual(value, pvp.pfeiffer_vacuum_protocol._decode_pressure(frame[10:16].decode()))
+
+    def test_pressure_exact(self):
+        # Decoded values are the nearest double to the true value, however large or small the exponent
+        for exponent in range(100):
+            for mantissa in (1, 1234, 6311, 9999):
+                exact = float(Fraction(mantissa) * Fraction(10) ** (exponent - 26))
+                data = "{:04d}{:02d}".format(mantissa, exponent)
+                self.assertEqual(pvp.pfeiffer_vacuum_protocol._decode_pressure(data), exact)
+                self.assertEqual(decode_batch(_control_telegram(1, 740, data)).value[0], exact)
+
+    def test_empty(self):
+        r = decode_batch(b"")
+        self.assertEqual((len(r.valid), r.consumed), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,22 @@
+import io
+import unittest
+from pfeiffer_vacuum_protocol import benchmark
+
+
+class TestBenchmark(unittest.TestCase):
+    def test_scenarios(self):
+        for scenario in benchmark.SCENARIOS:
+            r = benchmark.run_scenario(scenario, calls=10, warmup=1)
+            self.assertEqual(r.name, scenario.name)
+            self.assertGreater(r.telegrams_per_sec, 0)
+            self.assertLessEqual(r.p50, r.p99)
+
+    def test_main(self):
+        out = io.StringIO()
+        results = benchmark.main(["-n", "10", "-k", "read_pressure"], out=out)
+        self.assertEqual([r.name for r in results], ["read_pressure", "read_pressure_nonascii"])
+        self.assertIn("telegrams/s", out.getvalue())
+
+
+if __name__ == "__main__":
+    unittest.main()
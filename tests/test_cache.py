@@ -0,0 +1,105 @@
+import time
+import unittest
+import pfeiffer_vacuum_protocol as pvp
+from pfeiffer_vacuum_protocol import mock
+
+
+class TestGaugeCache(unittest.TestCase):
+    def setUp(self):
+        self.bus = mock.Bus([mock.PPT100(address=1), mock.PPT100(address=2)])
+        self.s = mock.Serial(self.bus, "COM1")
+        self.cache = pvp.GaugeCache(self.s)
+
+    def test_hits(self):
+        for _ in range(5):
+            self.assertEqual(self.cache.read_gauge_type(1), "PPT 100")
+            self.assertEqual(self.cache.read_software_version(1), (1, 1, 0))
+        self.assertEqual(self.s.n_writes, 2)
+        stats = self.cache.stats()
+        self.assertEqual(stats["hits"], 8)
+        self.assertEqual(stats["misses"], 2)
+        self.assertEqual(stats["entries"], 2)
+
+    def test_pressure_not_cached(self):
+        for _ in range(3):
+            self.cache.read_pressure(1)
+        self.assertEqual(self.s.n_writes, 3)
+        self.assertEqual(self.cache.stats()["misses"], 0)
+
+    def test_ttl(self):
+        cache = pvp.GaugeCache(self.s, ttls={349: 0.05})
+        cache.read_gauge_type(1)
+        cache.read_gauge_type(1)
+        time.sleep(0.06)
+        cache.read_gauge_type(1)
+        self.assertEqual(self.s.n_writes, 2)
+
+    def test_invalidate(self):
+        for addr in (1, 2):
+            self.cache.read_gauge_type(addr)
+            self.cache.read_correction_value(addr)
+        self.cache.invalidate(addr=1, param_num=349)
+        self.assertEqual(self.cache.stats()["entries"], 3)
+        self.cache.invalidate(param_num=742)
+        self.assertEqual(self.cache.stats()["entries"], 1)
+        self.cache.invalidate()
+        self.assertEqual(self.cache.stats()["entries"], 0)
+
+    def test_write_through(self):
+        self.cache.read_correction_value(1)
+        self.cache.write_correction_value(1, 1.234)
+        writes = self.s.n_writes
+        self.assertEqual(self.cache.read_correction_value(1), 1.23)
+        self.assertEqual(self.s.n_writes, writes)
+
+    def test_evict_on_failure(self):
+        self.cache.read_gauge_type(2)
+        self.cache.read_software_version(2)
+        self.cache.read_gauge_type(1)
+        self.bus.devices[2].silent = True
+        with self.assertRaises(ValueError):
+            self.cache.read_pressure(2)
+        stats = self.cache.stats()
+        self.assertEqual(stats["evictions"], 2)
+        self.assertEqual(stats["entries"], 1)
+
+    def test_keep_on_error_reply(self):
+        self.cache.read_gauge_type(1)
+        with self.assertRaises(pvp.GaugeError) as cm:
+            self.cache.write_pressure_setpoint(1, 5)
+        self.assertEqual(cm.exception.code, "_RANGE")
+        with self.assertRaises(pvp.GaugeError):
+            self.cache.write_correction_value(1, 10000.0)
+        with self.assertRaises(ValueError):
+            self.cache.write_parameter(1, 740, 1.0)
+        stats = self.cache.stats()
+        self.assertEqual(stats["evictions"], 0)
+        self.assertEqual(stats["entries"], 1)
+
+    def test_read_racing_write(self):
+        # The write lands between the read's exchange and storing its result
+        transaction = self.cache.port.transaction
+        writes = [2.5]
+
+        def racing_transaction(fn, *args, **kwargs):
+            result = transaction(fn, *args, **kwargs)
+            if writes:
+                self.cache.write_correction_value(1, writes.pop())
+            return result
+
+        self.cache.port.transaction = racing_transaction
+        self.assertEqual(self.cache.read_correction_value(1), 1.0)
+        writes = self.s.n_writes
+        self.assertEqual(self.cache.read_correction_value(1), 2.5)
+        self.assertEqual(self.s.n_writes, writes)
+
+    def test_port(self):
+        port = pvp.Port(self.s)
+        cache = pvp.GaugeCache(port)
+        self.assertIs(cache.port, port)
+        cache.read_gauge_type(1)
+        self.assertEqual(port.stats()["transactions"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import os
+import tempfile
+import unittest
+import pfeiffer_vacuum_protocol as pvp
+from pfeiffer_vacuum_protocol import capture, mock
+
+
+class TestCapture(unittest.TestCase):
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix=".cap")
+        os.close(fd)
+        os.remove(self.path)
+
+    def tearDown(self):
+        for p in (self.path, self.path + ".idx"):
+            if os.path.exists(p):
+                os.remove(p)
+
+    def record(self):
+        bus = mock.Bus([mock.PPT100(address=1), mock.PPT100(address=2)])
+        with capture.CaptureSerial(mock.Serial(bus), self.path) as s:
+            p1 = pvp.read_pressure(s, 1)
+            p2 = pvp.read_pressure(s, 2)
+            ct = pvp.read_correction_value(s, 1)
+        return p1, p2, ct
+
+    def test_record_and_select(self):
+        self.record()
+        with capture.CaptureReader(self.path) as r:
+            self.assertEqual(len(r), 6)
+            self.assertEqual([t.direction for t in r], [capture.TX, capture.RX] * 3)
+            self.assertEqual([t.addr for t in r], [1, 1, 2, 2, 1, 1])
+            self.assertEqual(bytes(r[0].data), b"0010074002=?106\r")
+            self.assertIsInstance(r[0].data, memoryview)
+
+            rx = list(r.select(addr=1, param=740, direction=capture.RX))
+            self.assertEqual(len(rx), 1)
+            self.assertEqual(bytes(rx[0].data)[:8], b"00110740")
+
+            # Time range
+            t = [x.timestamp for x in r]
+            self.assertEqual(len(list(r.select(start=t[2]))), 4)
+            self.assertEqual(len(list(r.select(end=t[2]))), 2)
+            self.assertEqual(len(list(r.select(param=742))), 2)
+            del rx, t
+
+    def test_append(self):
+        self.record()
+        self.record()
+        with capture.CaptureReader(self.path) as r:
+            self.assertEqual(len(r), 12)
+
+    def test_replay(self):
+        expected = self.record()
+        with capture.CaptureReader(self.path) as r:
+            s = capture.ReplaySerial(r)
+            got = (pvp.read_pressure(s, 1), pvp.read_pressure(s, 2), pvp.read_correction_value(s, 1))
+            self.assertEqual(got, expected)
+
+            # Nothing left to replay
+            s = capture.ReplaySerial(r)
+            pvp.read_pressure(s, 1)
+            with self.assertRaises(ValueError):
+                pvp.read_pressure(s, 1)
+
+    def test_timeout_passed_through(self):
+        # The poller's per-gauge timeout reaches the real port
+        dev = mock.PPT100(response_delay=1.0)
+        with capture.CaptureSerial(mock.Serial(dev, "COM1", timeout=2.0, timing=mock.Timing()), self.path) as s:
+            snap = pvp.BusPoller(s, [1], timeout=0.05).sweep()
+            self.assertLess(snap.duration, 0.5)
+            self.assertIn((1, 740), snap.errors)
+            self.assertEqual(s.s.timeout, 2.0)
+
+    def test_reset_input_buffer(self):
+        with capture.CaptureSerial(mock.Serial(mock.PPT100(), "COM1"), self.path) as s:
+            s.write(b"0010074002=?106\r")
+            s.read(5)
+            s.reset_input_buffer()
+            self.assertEqual(s.rx, b"")
+            self.assertEqual(pvp.read_pressure(s, 1), 1.0)
+        with capture.CaptureReader(self.path) as r:
+            self.assertEqual([bytes(t.data) for t in r][1:], [b"00110", b"0010074002=?106\r", b"0011074006100023025\r"])
+
+    def test_not_a_capture(self):
+        with open(self.path, "wb") as f:
+            f.write(b"hello")
+        with self.assertRaises(ValueError):
+            capture.CaptureReader(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
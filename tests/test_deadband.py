@@ -0,0 +1,110 @@
+import itertools
+import unittest
+import pfeiffer_vacuum_protocol.mock as mock
+import pfeiffer_vacuum_protocol as pvp
+from pfeiffer_vacuum_protocol import aio
+
+
+class TestDeadbandFilter(unittest.TestCase):
+    def _feed(self, f, values, addr=1):
+        events = [f.update(float(t), "COM1", addr, 740, v) for t, v in enumerate(values)]
+        return [None if e is None else e.value for e in events]
+
+    def test_absolute(self):
+        f = pvp.DeadbandFilter(absolute=0.1)
+        values = [1.0, 1.05, 0.95, 1.11, 1.2, 1.22, 1.0]
+        self.assertEqual(self._feed(f, values), [1.0, None, None, 1.11, None, 1.22, 1.0])
+        self.assertEqual(f.stats(), {"readings": 7, "events": 4, "gauges": 1})
+
+    def test_relative(self):
+        # Pumping down, the band follows the pressure
+        f = pvp.DeadbandFilter(relative=0.5)
+        values = [1e-3, 8e-4, 4e-4, 3e-4, 1e-4, 1e-4, 1e-9]
+        self.assertEqual(self._feed(f, values), [1e-3, None, 4e-4, None, 1e-4, None, 1e-9])
+
+    def test_absolute_floor(self):
+        f = pvp.DeadbandFilter(absolute=1e-6, relative=0.1)
+        self.assertEqual(self._feed(f, [1e-9, 5e-7, 2e-6, 2.1e-6, 3e-6]), [1e-9, None, 2e-6, None, 3e-6])
+
+    def test_heartbeat(self):
+        f = pvp.DeadbandFilter(relative=0.1, heartbeat=2.5)
+        events = [f.update(float(t), None, 1, 740, 1.0) for t in range(8)]
+        self.assertEqual([e.reason for e in events if e is not None], ["first", "heartbeat", "heartbeat"])
+        self.assertEqual([e.suppressed for e in events if e is not None], [0, 2, 2])
+
+    def test_errors(self):
+        f = pvp.DeadbandFilter(relative=0.1, heartbeat=10)
+        error = ValueError("gauge response too short to be valid")
+        self.assertEqual(f.update(0.0, None, 1, 740, 1.0).reason, "first")
+        e = f.update(1.0, None, 1, 740, None, error)
+        self.assertEqual((e.reason, e.value, e.error), ("error", None, error))
+        self.assertIsNone(f.update(2.0, None, 1, 740, None, error))
+        self.assertEqual(f.update(3.0, None, 1, 740, 1.0).reason, "change")
+        self.assertIsNone(f.update(4.0, None, 1, 740, 1.0))
+        self.assertEqual(f.update(5.0, None, 2, 740, None, error).reason, "error")
+
+    def test_gauges_apart(self):
+        f = pvp.DeadbandFilter(relative=0.1)
+        self.assertEqual(self._feed(f, [1.0, 1.0, 2.0], addr=1), [1.0, None, 2.0])
+        self.assertEqual(self._feed(f, [1.0, 1.0, 2.0], addr=2), [1.0, None, 2.0])
+        self.assertIsNotNone(f.update(0.0, "COM2", 1, 740, 1.0))
+        self.assertEqual(len(f.times), 3)
+
+    def test_other_values(self):
+        f = pvp.DeadbandFilter(relative=1.0)
+        codes = [pvp.ErrorCode.NO_ERROR, pvp.ErrorCode.NO_ERROR, pvp.ErrorCode.DEFECTIVE_TRANSMITTER]
+        self.assertEqual(self._feed(f, codes), [codes[0], None, codes[2]])
+
+    def test_bad_settings(self):
+        with self.assertRaises(ValueError):
+            pvp.DeadbandFilter(relative=-0.1)
+        with self.assertRaises(ValueError):
+            pvp.DeadbandFilter(heartbeat=0)
+        with self.assertRaises(TypeError):
+            next(pvp.DeadbandFilter().filter([1.0]))
+
+
+class TestFilterStreams(unittest.TestCase):
+    def test_stream_pressure(self):
+        s = mock.Serial(mock.Bus([mock.PPT100(address=1), mock.PPT100(address=2)]), "COM1")
+        stream = itertools.islice(pvp.stream_pressure(s, [1, 2, 3], rate=1000), 30)
+        f = pvp.DeadbandFilter(relative=0.01)
+        events = list(f.filter(stream, port="COM1"))
+        self.assertEqual([(e.addr, e.reason) for e in events], [(1, "first"), (2, "first"), (3, "error")])
+        self.assertEqual({e.port for e in events}, {"COM1"})
+        self.assertEqual(f.stats()["readings"], 30)
+
+    def test_poller(self):
+        s = mock.Serial(mock.Bus([mock.PPT100(address=1), mock.PPT100(address=2)]), "COM1", timeout=0.01)
+        poller = pvp.BusPoller(s, [1, 2], params=(740, 303))
+        f = pvp.DeadbandFilter(relative=0.01)
+        events = list(f.filter(itertools.islice(poller.sweeps(), 5), port="COM1"))
+        self.assertEqual(len(events), 4)
+        self.assertEqual({e.reason for e in events}, {"first"})
+
+    def test_records(self):
+        records = [pvp.Record(float(t), "COM1", 1, 1.0, None) for t in range(5)]
+        events = list(pvp.DeadbandFilter(heartbeat=2).filter(records))
+        self.assertEqual([e.timestamp for e in events], [0.0, 2.0, 4.0])
+        self.assertEqual({(e.port, e.param) for e in events}, {("COM1", None)})
+
+
+class TestAsyncFilter(unittest.IsolatedAsyncioTestCase):
+    async def test_astream_pressure(self):
+        port = await aio.open_mock_connection(mock.Serial(mock.PPT100(), "COM1"), timeout=0.05)
+        f = pvp.DeadbandFilter(relative=0.01)
+
+        async def samples(n):
+            async for sample in pvp.astream_pressure(port, [1], rate=1000):
+                yield sample
+                n -= 1
+                if n == 0:
+                    return
+
+        events = [event async for event in f.afilter(samples(10))]
+        self.assertEqual([e.reason for e in events], ["first"])
+        self.assertEqual(f.readings, 10)
+
+
+if __name__ == "__main__":
+    unittest.main()
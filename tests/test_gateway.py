@@ -0,0 +1,158 @@
+import asyncio
+import contextlib
+import io
+import json
+import os
+import socket
+import tempfile
+import unittest
+import pfeiffer_vacuum_protocol as pvp
+from pfeiffer_vacuum_protocol import gateway, mock
+from pfeiffer_vacuum_protocol.pfeiffer_vacuum_protocol import _control_telegram
+
+
+def _registry(timing=None):
+    return pvp.PortRegistry(lambda name: mock.Serial(mock.PPT100(), name, timeout=0.05, timing=timing))
+
+
+class TestGateway(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.registry = _registry()
+        self.gw = gateway.Gateway(self.registry, ["COM1", "COM2"], max_age=10.0)
+        self.server = await self.gw.start_tcp("127.0.0.1", 0)
+        self.addr = self.server.sockets[0].getsockname()
+
+    async def asyncTearDown(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.registry.close()
+
+    async def _json(self, *requests):
+        reader, writer = await asyncio.open_connection(*self.addr)
+        replies = []
+        for req in requests:
+            writer.write(json.dumps(req).encode() + b"\n")
+            replies.append(json.loads(await reader.readline()))
+        writer.close()
+        return replies
+
+    async def test_raw(self):
+        reader, writer = await asyncio.open_connection(*self.addr)
+        writer.write(b"0010074002=?106\r")
+        self.assertEqual(await reader.readuntil(b"\r"), b"0011074006100023025\r")
+
+        # Error replies are passed on, the gauge stays silent for other failures
+        writer.write(_control_telegram(1, 741, "005"))
+        self.assertEqual(await reader.readuntil(b"\r"), _control_telegram(1, 741, "_RANGE"))
+        writer.write(b"0020074002=?107\r")
+        writer.write(b"0010074202=?108\r")
+        self.assertEqual(await reader.readuntil(b"\r"), _control_telegram(1, 742, "000100"))
+        writer.close()
+
+    async def test_json(self):
+        replies = await self._json(
+            {"id": 1, "op": "read", "addr": 1, "param": 740},
+            {"id": 2, "op": "read", "port": "COM2", "addr": 1, "param": 349},
+            {"op": "read", "addr": 1, "param": 303},
+            {"op": "write", "addr": 1, "param": 742, "value": 1.5},
+            {"op": "write", "addr": 1, "param": 741, "value": 5},
+            {"op": "read", "port": "/dev/mem", "addr": 1, "param": 740},
+            {"op": "read", "addr": 1},
+            {"op": "stats"},
+        )
+        self.assertEqual(replies[0], {"id": 1, "value": 1.0})
+        self.assertEqual(replies[1], {"id": 2, "value": "PPT 100"})
+        self.assertEqual(replies[2], {"value": "NO_ERROR"})
+        self.assertEqual(replies[3], {"value": None})
+        self.assertEqual(replies[4], {"error": "data is out of range", "code": "_RANGE"})
+        self.assertIn("unknown port", replies[5]["error"])
+        self.assertIn("missing field", replies[6]["error"])
+        self.assertEqual(replies[7]["value"]["clients"], 1)
+
+    async def test_cache(self):
+        await self._json(*[{"op": "read", "addr": 1, "param": 740}] * 3)
+        self.assertEqual(self.gw.stats()["exchanges"], 1)
+        self.assertEqual(self.gw.stats()["cache_hits"], 2)
+
+        # Writes drop the cached value
+        await self._json({"op": "read", "addr": 1, "param": 742}, {"op": "write", "addr": 1, "param": 742, "value": 1})
+        await self._json({"op": "read", "addr": 1, "param": 742})
+        self.assertEqual(self.gw.stats()["exchanges"], 4)
+
+
+class TestCoalescing(unittest.IsolatedAsyncioTestCase):
+    async def test_in_flight(self):
+        registry = _registry(mock.Timing())
+        gw = gateway.Gateway(registry, ["COM1"], max_age=0.0)
+        data = await asyncio.gather(*(gw.request("COM1", 1, 740) for _ in range(10)))
+        self.assertEqual(data, ["100023"] * 10)
+        self.assertEqual(gw.stats()["exchanges"], 1)
+        self.assertEqual(gw.stats()["coalesced"], 9)
+
+        # Nothing is cached without a max age
+        await gw.request("COM1", 1, 740)
+        self.assertEqual(gw.stats()["exchanges"], 2)
+        registry.close()
+
+    async def test_write_overtakes_read(self):
+        registry = _registry(mock.Timing())
+        gw = gateway.Gateway(registry, ["COM1"], max_age=10.0)
+        read = asyncio.ensure_future(gw.request("COM1", 1, 742))
+        await asyncio.sleep(0)
+        await gw.command("COM1", 1, 742, "000150")
+        await read
+        self.assertEqual(gw.flights.results, {})
+        registry.close()
+
+    async def test_raw_error_codes(self):
+        # Only errors replied by the gauge are passed on, whatever the message of other errors
+        async def request(name, addr, param_num):
+            raise errors.pop()
+
+        registry = _registry()
+        gw = gateway.Gateway(registry, ["COM1"])
+        errors = [ValueError("data is out of range"), pvp.GaugeError("logic access violation", "_LOGIC")]
+        gw.request = request
+        self.assertEqual(await gw._raw_reply(b"0010074002=?106\r"), _control_telegram(1, 740, "_LOGIC"))
+        self.assertIsNone(await gw._raw_reply(b"0010074002=?106\r"))
+        self.assertEqual(gw.errors, 2)
+        registry.close()
+
+    async def test_errors_shared(self):
+        registry = _registry()
+        gw = gateway.Gateway(registry, ["COM1"])
+        results = await asyncio.gather(*(gw.request("COM1", 1, 999) for _ in range(3)), return_exceptions=True)
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual(gw.flights.flights, {})
+        registry.close()
+
+
+@unittest.skipUnless(hasattr(socket, "AF_UNIX"), "no Unix sockets")
+class TestUnixSocket(unittest.IsolatedAsyncioTestCase):
+    async def test_unix(self):
+        registry = _registry()
+        gw = gateway.Gateway(registry, ["COM1"])
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "gateway.sock")
+            server = await gw.start_unix(path)
+            reader, writer = await asyncio.open_unix_connection(path)
+            writer.write(b"0010074002=?106\r")
+            self.assertEqual(await reader.readuntil(b"\r"), b"0011074006100023025\r")
+            writer.close()
+            server.close()
+            await server.wait_closed()
+        registry.close()
+
+
+class TestMain(unittest.TestCase):
+    def test_parse_address(self):
+        self.assertEqual(gateway._parse_address("0.0.0.0:8740"), ("0.0.0.0", 8740))
+        self.assertEqual(gateway._parse_address(":8740"), ("127.0.0.1", 8740))
+
+    def test_no_listener(self):
+        with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+            gateway.main(["COM1", "--mock"])
+
+
+if __name__ == "__main__":
+    unittest.main()
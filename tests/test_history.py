@@ -0,0 +1,76 @@
+import math
+import time
+import unittest
+import pfeiffer_vacuum_protocol.mock as mock
+import pfeiffer_vacuum_protocol as pvp
+
+
+class TestPressureHistory(unittest.TestCase):
+    def test_last(self):
+        h = pvp.PressureHistory(capacity=4)
+        for i in range(6):
+            h.append("COM1", 1, float(i), 10.0 * i)
+        t, p, e = h.last("COM1", 1)
+        self.assertEqual(list(t), [2.0, 3.0, 4.0, 5.0])
+        self.assertEqual(list(p), [20.0, 30.0, 40.0, 50.0])
+        self.assertEqual(list(e), [0, 0, 0, 0])
+        self.assertEqual(list(h.last("COM1", 1, 2)[1]), [40.0, 50.0])
+        self.assertEqual(h.count("COM1", 1), 4)
+
+    def test_partial(self):
+        h = pvp.PressureHistory(capacity=10)
+        h.append("COM1", 1, 0.0, 1.0)
+        h.append("COM1", 1, 1.0, 2.0)
+        self.assertEqual(list(h.last("COM1", 1, 5)[1]), [1.0, 2.0])
+
+    def test_zero_copy(self):
+        h = pvp.PressureHistory(capacity=4)
+        for i in range(3):
+            h.append("COM1", 1, float(i), float(i))
+        p = h.last("COM1", 1)[1]
+        h.append("COM1", 1, 3.0, 99.0)
+        self.assertEqual(h.last("COM1", 1)[1][-1], 99.0)
+        self.assertEqual(list(p), [0.0, 1.0, 2.0])
+
+    def test_missing(self):
+        with self.assertRaises(KeyError):
+            pvp.PressureHistory().last("COM1", 1)
+
+    def test_summary(self):
+        h = pvp.PressureHistory(capacity=8)
+        for i, p in enumerate([1.0, 2.0, math.nan, 3.0]):
+            h.append("COM1", 1, float(i), p, 0 if p == p else 1)
+        s = h.summary("COM1", 1)
+        self.assertEqual((s["count"], s["errors"], s["min"], s["max"], s["mean"]), (3, 1, 1.0, 3.0, 2.0))
+        self.assertEqual(h.summary("COM1", 1, 2)["count"], 1)
+
+    def test_rolling_mean(self):
+        h = pvp.PressureHistory(capacity=8)
+        for i, p in enumerate([1.0, 2.0, 3.0, 4.0, math.nan, 6.0, 7.0, 8.0]):
+            h.append("COM1", 1, float(i), p)
+        r = list(h.rolling_mean("COM1", 1, 2))
+        self.assertEqual(r[:3], [1.5, 2.5, 3.5])
+        self.assertTrue(math.isnan(r[3]) and math.isnan(r[4]))
+        self.assertEqual(r[5:], [6.5, 7.5])
+
+    def test_acquisition(self):
+        h = pvp.PressureHistory(capacity=100)
+        s = mock.Serial(mock.Bus([mock.PPT100(address=1), mock.PPT100(address=2, silent=True)]), "COM1")
+        with pvp.MultiPortAcquisition({"COM1": s}, {"COM1": [1, 2]}, history=h):
+            time.sleep(0.01)
+        self.assertEqual(set(h.keys()), {("COM1", 1), ("COM1", 2)})
+        self.assertEqual(h.summary("COM1", 1)["mean"], 1.0)
+        self.assertEqual(h.summary("COM1", 2)["count"], 0)
+
+    def test_poller(self):
+        h = pvp.PressureHistory(capacity=10)
+        s = mock.Serial(mock.Bus([mock.PPT100(address=1)]), "COM1")
+        p = pvp.BusPoller(s, [1, 2], [740, 303], history=h)
+        p.sweep()
+        p.sweep()
+        self.assertEqual(list(h.last("COM1", 1)[1]), [1.0, 1.0])
+        self.assertEqual(list(h.last("COM1", 2)[2]), [1, 1])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,114 @@
+import asyncio
+import unittest
+import pfeiffer_vacuum_protocol as pvp
+from pfeiffer_vacuum_protocol import aio, mock, pipeline
+from pfeiffer_vacuum_protocol import pfeiffer_vacuum_protocol as core
+
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self):
+        self.inst = pvp.enable_instrumentation()
+
+    def tearDown(self):
+        pvp.disable_instrumentation()
+
+    def test_disabled(self):
+        pvp.disable_instrumentation()
+        self.assertIsNone(core._instrument)
+        pvp.read_pressure(mock.Serial(mock.PPT100(), "COM1"), 1)
+        self.assertEqual(self.inst.snapshot(), {})
+
+    def test_counts(self):
+        s = mock.Serial(mock.PPT100(), "COM1")
+        for _ in range(3):
+            pvp.read_pressure(s, 1)
+        with self.assertRaises(ValueError):
+            pvp.write_pressure_setpoint(s, 1, 5)
+
+        snap = self.inst.snapshot()
+        c = snap[("COM1", 1, 740)]
+        self.assertEqual(c["requests"], 3)
+        self.assertEqual(c["responses"], 3)
+        self.assertEqual(c["bytes_read"], 60)
+        self.assertEqual(c["latency"]["count"], 3)
+        self.assertEqual(c["latency"]["buckets"][-1], (float("inf"), 3))
+        self.assertEqual(sum(c["errors"].values()), 0)
+        self.assertEqual(snap[("COM1", 1, 741)]["errors"]["_RANGE"], 1)
+
+    def test_timeout_and_checksum(self):
+        bus = mock.Bus([mock.PPT100(address=1), mock.PPT100(address=2, silent=True)], corrupt_rate=1.0)
+        s = mock.Serial(bus, "COM1")
+        for addr in (1, 2):
+            with self.assertRaises(ValueError):
+                pvp.read_pressure(s, addr)
+        snap = self.inst.snapshot()
+        self.assertEqual(snap[("COM1", 1, 740)]["errors"]["checksum"], 1)
+        self.assertEqual(snap[("COM1", 2, 740)]["errors"]["timeout"], 1)
+        self.assertEqual(snap[("COM1", 2, 740)]["responses"], 0)
+
+    def test_invalid_chars(self):
+        s = mock.Serial(mock.PPT100(nonascii=True), "COM1")
+        pvp.read_pressure(s, 1, valid_char_filter=True)
+        with self.assertRaises(pvp.InvalidCharError):
+            pvp.read_pressure(s, 1, valid_char_filter=False)
+        c = self.inst.snapshot()[("COM1", 1, 740)]
+        self.assertEqual(c["invalid_chars_dropped"], 40)
+        self.assertEqual(c["errors"]["invalid_char"], 1)
+
+    def test_noise_counted_apart(self):
+        s = mock.Serial(mock.PPT100(noise=b"\xff\xff12\r"), "COM1")
+        pvp.read_pressure(s, 1, valid_char_filter=True)
+        c = self.inst.snapshot()[("COM1", 1, 740)]
+        self.assertEqual((c["invalid_chars_dropped"], c["noise_bytes_skipped"]), (2, 3))
+        self.assertEqual(c["bytes_read"], 25)
+
+    def test_pipelined(self):
+        # Every response is counted against its own request, even with several outstanding
+        bus = mock.Bus([mock.PPT100(address=1), mock.PPT100(address=2, silent=True), mock.PPT100(address=3)])
+        s = mock.Serial(bus, "COM1", timeout=0.05, timing=mock.Timing())
+        requests = [(1, 740), (2, 740), (3, 740), (1, 742)]
+        for buffered in (False, True):
+            pipeline.read_pipelined(s, requests, depth=3, buffered=buffered)
+        snap = self.inst.snapshot()
+        for addr, param in requests:
+            c = snap[("COM1", addr, param)]
+            self.assertEqual(c["requests"], 2)
+            self.assertEqual(c["errors"]["mismatch"], 0)
+        self.assertEqual(snap[("COM1", 2, 740)]["errors"]["timeout"], 2)
+        self.assertEqual(snap[("COM1", 1, 742)]["latency"]["count"], 2)
+        self.assertNotIn(("COM1", None, None), snap)
+
+    def test_mismatch(self):
+        # Another gauge answers the request
+        s = mock.Serial(mock.Bus([mock.PPT100(address=2)]), "COM1")
+        core._send_data_request(s, 1, 740)
+        s.buffer = core._control_telegram(2, 740, "100023")
+        with self.assertRaises(ValueError):
+            core._check_response(core._read_gauge_response(s), 1, 740)
+        self.assertEqual(self.inst.snapshot()[("COM1", 1, 740)]["errors"]["mismatch"], 1)
+
+    def test_aio(self):
+        async def run():
+            port = await aio.open_mock_connection(mock.Serial(mock.PPT100(), "COM1"))
+            await aio.read_pressure(port, 1)
+            port.close()
+
+        asyncio.run(run())
+        self.assertEqual(sum(c["responses"] for c in self.inst.snapshot().values()), 1)
+
+    def test_prometheus(self):
+        pvp.read_pressure(mock.Serial(mock.PPT100(), "COM1"), 1)
+        text = self.inst.prometheus()
+        self.assertIn('pfeiffer_vacuum_requests_total{port="COM1",addr="1",param="740"} 1\n', text)
+        self.assertIn('pfeiffer_vacuum_latency_seconds_bucket{port="COM1",addr="1",param="740",le="+Inf"} 1\n', text)
+        self.assertIn('pfeiffer_vacuum_errors_total{port="COM1",addr="1",param="740",kind="NO_DEF"} 0\n', text)
+        self.assertIn("# TYPE pfeiffer_vacuum_latency_seconds histogram\n", text)
+
+    def test_reset(self):
+        pvp.read_pressure(mock.Serial(mock.PPT100(), "COM1"), 1)
+        self.inst.reset()
+        self.assertEqual(self.inst.snapshot(), {})
+
+
+if __name__ == "__main__":
+    unittest.main()
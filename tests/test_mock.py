@@ -2,6 +2,8 @@ import unittest
 import pfeiffer_vacuum_protocol.mock as mock
 from pfeiffer_vacuum_protocol import ErrorCode
 import io
+import time
+import pfeiffer_vacuum_protocol as pvp
 
 
 class TestSerial(unittest.TestCase):
@@ -39,6 +41,69 @@ class TestSerial(unittest.TestCase):
         s = mock.Serial(mock.PPT100(), "COM1")
         s.flush()
 
+    def test_counters(self):
+        s = mock.Serial(mock.PPT100(), "COM1", timeout=1)
+        s.write(b"0010074002=?106\r")
+        s.read(1)
+        s.read()
+        s.timeout = 0.1
+        self.assertEqual((s.n_writes, s.n_reads, s.n_timeout_sets), (1, 2, 1))
+        self.assertEqual(s.timeout, 0.1)
+
+
+class TestTiming(unittest.TestCase):
+    def setUp(self):
+        # 16 byte request, 1 ms turnaround, 20 byte response at 9600 baud is about 38.5 ms
+        self.timing = mock.Timing(turnaround=0.001)
+
+    def test_read_pressure(self):
+        s = mock.Serial(mock.PPT100(), "COM1", timeout=1, timing=self.timing)
+        t0 = time.monotonic()
+        self.assertEqual(pvp.read_pressure(s, 1), 1.0)
+        self.assertGreaterEqual(time.monotonic() - t0, 0.038)
+
+    def test_adapter_latency(self):
+        s = mock.Serial(mock.PPT100(), "COM1", timeout=1, timing=mock.Timing(adapter_latency=0.016))
+        t0 = time.monotonic()
+        pvp.read_pressure(s, 1)
+        self.assertGreaterEqual(time.monotonic() - t0, 0.054)
+
+    def test_in_waiting(self):
+        s = mock.Serial(mock.PPT100(), "COM1", timeout=1, timing=self.timing)
+        s.write(b"0010074002=?106\r")
+        self.assertEqual(s.in_waiting, 0)
+        time.sleep(0.05)
+        self.assertEqual(s.in_waiting, 20)
+
+    def test_timeout(self):
+        # Response starts about 68 ms after the write and takes 21 ms to arrive
+        s = mock.Serial(mock.PPT100(), "COM1", timeout=0.04, timing=mock.Timing(turnaround=0.05))
+        s.write(b"0010074002=?106\r")
+        self.assertEqual(s.read(20), b"")
+        r = s.read(20)
+        self.assertGreater(len(r), 0)
+        self.assertLess(len(r), 20)
+
+    def test_zero_timeout(self):
+        s = mock.Serial(mock.PPT100(), "COM1", timeout=0, timing=self.timing)
+        s.write(b"0010074002=?106\r")
+        self.assertEqual(s.read(20), b"")
+
+    def test_inter_byte_timeout(self):
+        # Data that is already in the buffer is returned once the next byte is overdue
+        s = mock.Serial(mock.PPT100(), "COM1", timeout=1, inter_byte_timeout=0.002, timing=self.timing)
+        s.write(b"0010074002=?106\r")
+        time.sleep(0.05)
+        s.write(b"0010074002=?106\r")
+        t0 = time.monotonic()
+        self.assertEqual(s.read(40), b"0011074006100023025\r")
+        self.assertLess(time.monotonic() - t0, 0.02)
+
+    def test_no_response(self):
+        s = mock.Serial(mock.PPT100(), "COM1", timeout=None, timing=self.timing)
+        s.write(b"0020074002=?107\r")
+        self.assertEqual(s.read(20), b"")
+
 
 class TestPPT100(unittest.TestCase):
     def test_nonascii(self):
@@ -56,6 +121,11 @@ class TestPPT100(unittest.TestCase):
         r = g.get_response(b"0010073902=?114\r")
         self.assertEqual(r, b"0011073906NO_DEF198\r")
 
+    def test_address(self):
+        g = mock.PPT100(address=2)
+        r = g.get_response(b"0020074002=?107\r")
+        self.assertEqual(r, b"0021074006100023026\r")
+
     def test_no_device(self):
         g = mock.PPT100()
         r = g.get_response(b"0020074002=?107\r")
@@ -147,5 +217,63 @@ class TestPPT100(unittest.TestCase):
         self.assertEqual(r, b"")
 
 
+class TestBus(unittest.TestCase):
+    def test_routing(self):
+        bus = mock.Bus([mock.PPT100(address=a) for a in range(1, 201)])
+        s = mock.Serial(bus, "COM1")
+        for a in [1, 17, 200]:
+            self.assertEqual(pvp.read_pressure(s, a), 1.0)
+        with self.assertRaises(ValueError):
+            pvp.read_pressure(s, 201)
+
+    def test_duplicate_address(self):
+        with self.assertRaises(ValueError):
+            mock.Bus([mock.PPT100(address=3), mock.PPT100(address=3)])
+
+    def test_broadcast(self):
+        devices = [mock.PPT100(address=1), mock.PPT100(address=2)]
+        bus = mock.Bus(devices)
+        self.assertEqual(bus.get_response(b"0001074206000100021\r"), b"")
+        self.assertEqual(bus.get_response(b"0000074002=?105\r"), b"")
+        self.assertEqual(bus.get_response(b"0001074103005133\r"), b"")
+        self.assertEqual([dev.written for dev in devices], [[(742, b"000100")]] * 2)
+
+    def test_silent(self):
+        s = mock.Serial(mock.Bus([mock.PPT100(address=1, silent=True), mock.PPT100(address=2)]), "COM1")
+        with self.assertRaises(ValueError):
+            pvp.read_pressure(s, 1)
+        self.assertEqual(pvp.read_pressure(s, 2), 1.0)
+
+    def test_corrupt(self):
+        bus = mock.Bus([mock.PPT100()], corrupt_rate=1.0)
+        with self.assertRaises(ValueError):
+            pvp.read_pressure(mock.Serial(bus, "COM1"), 1)
+        self.assertEqual(bus.faults["corrupted"], 1)
+
+    def test_drop(self):
+        bus = mock.Bus([mock.PPT100()], drop_rate=1.0)
+        r = bus.get_response(b"0010074002=?106\r")
+        self.assertEqual(len(r), 19)
+        self.assertEqual(bus.faults["dropped"], 1)
+
+    def test_fault_rate(self):
+        bus = mock.Bus([mock.PPT100()], corrupt_rate=0.25, seed=0)
+        s = mock.Serial(bus, "COM1")
+        n_bad = 0
+        for _ in range(1000):
+            try:
+                pvp.read_pressure(s, 1)
+            except ValueError:
+                n_bad += 1
+        self.assertEqual(n_bad, bus.faults["corrupted"])
+        self.assertTrue(200 < n_bad < 300)
+
+    def test_slow(self):
+        bus = mock.Bus([mock.PPT100()], slow_rate=1.0, slow_delay=0.05)
+        s = mock.Serial(bus, "COM1", timeout=0.03, timing=mock.Timing())
+        with self.assertRaises(ValueError):
+            pvp.read_pressure(s, 1)
+
+
 if __name__ == "__main__":
     unittest.main()
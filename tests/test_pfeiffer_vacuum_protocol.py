@@ -1,3 +1,4 @@
+import random
 import unittest
 import pfeiffer_vacuum_protocol.mock as mock
 import pfeiffer_vacuum_protocol as pvp
@@ -97,5 +98,243 @@ class NonAsciiErrorChecks(unittest.TestCase):
             pvp.read_pressure(s, 1, valid_char_filter=False)
 
 
+# Adapter that does not report how many bytes are buffered
+class NoInWaitingSerial(mock.Serial):
+    in_waiting = 0
+
+
+class TestFrameReader(unittest.TestCase):
+    def test_bulk_read(self):
+        s = mock.Serial(mock.PPT100(nonascii=True), "COM1")
+        self.assertEqual(pvp.read_pressure(s, 1, valid_char_filter=True), 1.0)
+        self.assertEqual(s.n_reads, 1)
+
+    def test_bulk_read_no_in_waiting(self):
+        s = NoInWaitingSerial(mock.PPT100(), "COM1")
+        self.assertEqual(pvp.read_pressure(s, 1), 1.0)
+        self.assertEqual(s.n_reads, 2)
+
+    def test_leftover_bytes(self):
+        s = mock.Serial(mock.PPT100(), "COM1")
+        s.write(b"0010074002=?106\r")
+        s.write(b"0010074202=?108\r")
+        self.assertEqual(pvp.read_pressure(s, 1), 1.0)
+        self.assertEqual(s.in_waiting, 0)
+        self.assertEqual(pvp.read_correction_value(s, 1), 1.0)
+
+    def test_reset_input_buffer(self):
+        s = mock.Serial(mock.PPT100(), "COM1")
+        s.write(b"0010074002=?106\r")
+        s.write(b"0010074202=?108\r")
+        self.assertEqual(pvp.read_pressure(s, 1), 1.0)
+        pvp.reset_input_buffer(s)
+        with self.assertRaises(ValueError):
+            pvp.pfeiffer_vacuum_protocol._read_gauge_response(s)
+
+        # Through a port
+        s.write(b"0010074002=?106\r")
+        s.write(b"0010074202=?108\r")
+        port = pvp.Port(s)
+        self.assertEqual(port.read_pressure(1), 1.0)
+        port.reset_input_buffer()
+        self.assertEqual(port.read_gauge_type(1), "PPT 100")
+
+    def test_no_response(self):
+        s = mock.Serial(mock.PPT100(), "COM1", 19200)
+        with self.assertRaises(ValueError):
+            pvp.read_pressure(s, 1)
+
+
+class TestResync(unittest.TestCase):
+    def test_long_noise(self):
+        # More garbage than a telegram ahead of the response
+        s = mock.Serial(mock.PPT100(noise=b"\xff" * 300), "COM1")
+        self.assertEqual(pvp.read_pressure(s, 1, valid_char_filter=True), 1.0)
+        self.assertEqual(s.n_reads, 1)
+        reader = pvp.pfeiffer_vacuum_protocol._get_frame_reader(s)
+        self.assertEqual(reader.dropped, 300)
+        self.assertEqual(reader.resyncs, 0)
+
+    def test_clean(self):
+        s = mock.Serial(mock.PPT100(), "COM1")
+        for _ in range(3):
+            self.assertEqual(pvp.read_pressure(s, 1), 1.0)
+        reader = pvp.pfeiffer_vacuum_protocol._get_frame_reader(s)
+        self.assertEqual((reader.dropped, reader.resyncs), (0, 0))
+
+    def test_ascii_noise(self):
+        # Printable garbage and a stray telegram fragment are skipped too
+        s = mock.Serial(mock.PPT100(noise=b"x7\x00 12\r0074000"), "COM1")
+        self.assertEqual(pvp.read_pressure(s, 1), 1.0)
+        self.assertEqual(pvp.read_correction_value(s, 1), 1.0)
+
+    def test_noise_byte_at_a_time(self):
+        s = NoInWaitingSerial(mock.PPT100(noise=b"\xfe0?9\r\xff" * 20), "COM1")
+        self.assertEqual(pvp.read_pressure(s, 1, valid_char_filter=True), 1.0)
+
+    def test_byte_budget(self):
+        # Endless noise gives up instead of reading forever
+        s = mock.Serial(mock.PPT100(noise=b"\xff" * 5000), "COM1")
+        with self.assertRaises(ValueError):
+            pvp.read_pressure(s, 1, valid_char_filter=True)
+
+    def test_fake_header(self):
+        # The noise looks like the start of a telegram
+        s = mock.Serial(mock.PPT100(noise=b"00100740"), "COM1")
+        self.assertEqual(pvp.read_pressure(s, 1), 1.0)
+
+    def test_fake_header_terminated(self):
+        # A header in the noise ends at a terminator before the length it gives
+        s = mock.Serial(mock.PPT100(noise=b"56?93808810950525477?60?\r?3\r"), "COM1")
+        self.assertEqual(pvp.read_pressure(s, 1), 1.0)
+        self.assertEqual(pvp.read_correction_value(s, 1), 1.0)
+
+    def test_noise_fuzz(self):
+        rng = random.Random(0)
+        alphabet = [bytes([c]) for c in b"0123456789?"] + [b"\r", b"=?", b"\xff"]
+        for _ in range(300):
+            noise = b"\r" + b"".join(rng.choice(alphabet) for _ in range(rng.randrange(200)))
+            s = mock.Serial(mock.PPT100(noise=noise), "COM1")
+            self.assertEqual(pvp.read_pressure(s, 1, valid_char_filter=True), 1.0, noise)
+            self.assertEqual(pvp.read_correction_value(s, 1, valid_char_filter=True), 1.0, noise)
+
+    def test_bad_checksum(self):
+        # A telegram that is really corrupted is still reported as such
+        s = mock.Serial(mock.Bus([mock.PPT100()], corrupt_rate=1.0), "COM1")
+        with self.assertRaisesRegex(ValueError, "checksum"):
+            pvp.read_pressure(s, 1)
+
+    def test_per_port_filter(self):
+        pvp.disable_valid_char_filter()
+        s = mock.Serial(mock.PPT100(nonascii=True), "COM1")
+        pvp.set_valid_char_filter(s, True)
+        self.assertEqual(pvp.read_pressure(s, 1), 1.0)
+        with self.assertRaises(pvp.InvalidCharError):
+            pvp.read_pressure(s, 1, valid_char_filter=False)
+
+        # Other ports keep the global setting
+        with self.assertRaises(pvp.InvalidCharError):
+            pvp.read_pressure(mock.Serial(mock.PPT100(nonascii=True), "COM2"), 1)
+
+        pvp.set_valid_char_filter(s, None)
+        with self.assertRaises(pvp.InvalidCharError):
+            pvp.read_pressure(s, 1)
+
+
+class TestDataRequestTelegram(unittest.TestCase):
+    def test_telegram(self):
+        self.assertEqual(pvp.pfeiffer_vacuum_protocol._data_request_telegram(1, 740), b"0010074002=?106\r")
+        self.assertEqual(pvp.pfeiffer_vacuum_protocol._data_request_telegram(2, 740), b"0020074002=?107\r")
+
+    def test_cached(self):
+        a = pvp.pfeiffer_vacuum_protocol._data_request_telegram(1, 303)
+        self.assertIs(pvp.pfeiffer_vacuum_protocol._data_request_telegram(1, 303), a)
+
+
+class TestParseTelegram(unittest.TestCase):
+    def test_fields(self):
+        r = pvp.pfeiffer_vacuum_protocol._parse_telegram(b"0011074006100023025\r")
+        self.assertEqual(r, (1, 1, 740, b"100023"))
+
+    def test_bad_checksum(self):
+        with self.assertRaises(ValueError):
+            pvp.pfeiffer_vacuum_protocol._parse_telegram(b"0011074006100023026\r")
+
+    def test_error_responses(self):
+        for r in [b"0011073906NO_DEF198\r", b"0011074106_RANGE192\r"]:
+            with self.assertRaises(ValueError):
+                pvp.pfeiffer_vacuum_protocol._parse_gauge_response(r)
+
+
+class ExtraParamGauge(mock.PPT100):
+    # Also answers a made up parameter 398
+    def get_response(self, bin_str):
+        if bin_str[5:8] == b"398":
+            return pvp.pfeiffer_vacuum_protocol._control_telegram(self.address, 398, "000123")
+        return super().get_response(bin_str)
+
+
+class TestParameters(unittest.TestCase):
+    def tearDown(self):
+        pvp.PARAMETERS.pop(398, None)
+        pvp.pfeiffer_vacuum_protocol._DATA_DECODERS.pop(398, None)
+
+    def test_generic(self):
+        s = mock.Serial(mock.PPT100(), "COM1")
+        self.assertEqual(pvp.read_parameter(s, 1, 740), pvp.read_pressure(s, 1))
+        self.assertEqual(pvp.read_parameter(s, 1, 349), "PPT 100")
+        pvp.write_parameter(s, 1, 742, 1.5)
+        pvp.write_parameter(s, 1, 741, 1)
+        with self.assertRaises(ValueError):
+            pvp.write_parameter(s, 1, 741, 5)
+
+    def test_access(self):
+        s = mock.Serial(mock.PPT100(), "COM1")
+        with self.assertRaises(ValueError):
+            pvp.read_parameter(s, 1, 741)
+        with self.assertRaises(ValueError):
+            pvp.write_parameter(s, 1, 740, 1.0)
+        with self.assertRaises(ValueError):
+            pvp.read_parameter(s, 1, 398)
+
+    def test_register(self):
+        param = pvp.register_parameter(398, "made_up", "u_integer")
+        self.assertEqual(pvp.PARAMETERS[398], param)
+        s = mock.Serial(ExtraParamGauge(), "COM1")
+        self.assertEqual(pvp.read_parameter(s, 1, 398), 123)
+
+        # Also usable from the poller
+        snap = pvp.BusPoller(s, [1], params=[740, 398]).sweep()
+        self.assertEqual(snap.values, {(1, 740): 1.0, (1, 398): 123})
+
+        with self.assertRaises(ValueError):
+            pvp.register_parameter(398, "made_up", "float")
+        with self.assertRaises(ValueError):
+            pvp.register_parameter(398, "made_up", "u_integer", access="x")
+
+    def test_named_wrappers(self):
+        from pfeiffer_vacuum_protocol import aio, registry
+
+        names = {
+            "read_error_code",
+            "read_software_version",
+            "read_gauge_type",
+            "read_pressure",
+            "write_pressure_setpoint",
+            "read_correction_value",
+            "write_correction_value",
+        }
+        for owner in (pvp.Port, pvp.GaugeCache, pvp.Coalescer, registry.Gauge, aio):
+            for name in names:
+                self.assertEqual(getattr(owner, name).__name__, name)
+            self.assertFalse(hasattr(owner, "read_pressure_setpoint"))
+
+        s = mock.Serial(mock.PPT100(), "COM1")
+        self.assertEqual(pvp.Port(s).read_gauge_type(1), "PPT 100")
+        gauge = pvp.PortRegistry(lambda name: s).gauge("COM1", 1)
+        gauge.write_correction_value(1.5)
+        self.assertEqual(gauge.read_pressure(), 1.0)
+
+    def test_codecs(self):
+        types = pvp.DATA_TYPES
+        self.assertEqual(types["boolean_old"].decode("111111"), True)
+        self.assertEqual(types["boolean_old"].encode(False), "000000")
+        with self.assertRaises(ValueError):
+            types["boolean_old"].decode("101010")
+        self.assertEqual(types["u_integer"].encode(42), "000042")
+        with self.assertRaises(ValueError):
+            types["u_integer"].encode(1000000)
+        self.assertEqual(types["u_real"].decode("001571"), 15.71)
+        self.assertEqual(types["string"].decode("    A3"), "    A3")
+        with self.assertRaises(ValueError):
+            types["string"].encode("abc")
+        self.assertEqual(types["u_short_int"].encode(1), "001")
+        for val, data in [(1.0, "100023"), (0.0025, "250020"), (1e-9, "100014"), (0.0, "000000")]:
+            self.assertEqual(types["u_expo_new"].encode(val), data)
+            self.assertAlmostEqual(types["u_expo_new"].decode(data), val, delta=val * 1e-9)
+        with self.assertRaises(ValueError):
+            types["u_expo_new"].encode(-1.0)
+
+
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,107 @@
+import time
+import unittest
+import pfeiffer_vacuum_protocol as pvp
+from pfeiffer_vacuum_protocol import mock
+from pfeiffer_vacuum_protocol.pfeiffer_vacuum_protocol import _control_telegram
+from pfeiffer_vacuum_protocol.pipeline import read_pipelined
+
+
+class WrongAddress(mock.PPT100):
+    # Answers as if it were another gauge
+    def get_response(self, bin_str):
+        return _control_telegram(9, 740, "100023")
+
+
+class HalfDuplexSerial(mock.Serial):
+    # Counts requests written while a gauge is still answering
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.collisions = 0
+
+    def write(self, output):
+        self.collisions += time.monotonic() < self.bus_free
+        return super().write(output)
+
+
+class TestReadPipelined(unittest.TestCase):
+    def test_values(self):
+        bus = mock.Bus([mock.PPT100(address=a) for a in range(1, 6)])
+        s = mock.Serial(bus, "COM1", timeout=1)
+        requests = [(a, p) for a in range(1, 6) for p in (740, 742)]
+        r = read_pipelined(s, requests, depth=3)
+        self.assertEqual(r.values, {key: 1.0 for key in requests})
+        self.assertEqual(r.errors, {})
+        self.assertEqual(r.fallbacks, 0)
+
+    def test_silent_gauge(self):
+        bus = mock.Bus([mock.PPT100(address=1), mock.PPT100(address=2, silent=True), mock.PPT100(address=3)])
+        s = mock.Serial(bus, "COM1", timeout=1)
+        r = read_pipelined(s, [(1, 740), (2, 740), (3, 740)], depth=2)
+        self.assertEqual(r.values, {(1, 740): 1.0, (3, 740): 1.0})
+        self.assertEqual(list(r.errors), [(2, 740)])
+        self.assertEqual(r.fallbacks, 0)
+
+    def test_silent_last(self):
+        bus = mock.Bus([mock.PPT100(address=1), mock.PPT100(address=2, silent=True)])
+        s = mock.Serial(bus, "COM1", timeout=1)
+        r = read_pipelined(s, [(1, 740), (2, 740)], depth=2)
+        self.assertEqual(r.values, {(1, 740): 1.0})
+        self.assertEqual(list(r.errors), [(2, 740)])
+
+    def test_fallback_on_mismatch(self):
+        bus = mock.Bus([mock.PPT100(address=1), WrongAddress(address=2), mock.PPT100(address=3)])
+        s = mock.Serial(bus, "COM1", timeout=1)
+        r = read_pipelined(s, [(1, 740), (2, 740), (3, 740)], depth=3)
+        self.assertEqual(r.values, {(1, 740): 1.0, (3, 740): 1.0})
+        self.assertEqual(list(r.errors), [(2, 740)])
+        self.assertEqual(r.fallbacks, 1)
+
+    def test_fallback_on_bad_checksum(self):
+        bus = mock.Bus([mock.PPT100(address=1), mock.PPT100(address=2)], corrupt_rate=1.0)
+        s = mock.Serial(bus, "COM1", timeout=1)
+        r = read_pipelined(s, [(1, 740), (2, 740)], depth=2)
+        self.assertEqual(r.values, {})
+        self.assertEqual(set(r.errors), {(1, 740), (2, 740)})
+        self.assertEqual(r.fallbacks, 1)
+
+    def test_bad_args(self):
+        s = mock.Serial(mock.PPT100(), "COM1")
+        with self.assertRaises(ValueError):
+            read_pipelined(s, [(1, 741)])
+        with self.assertRaises(ValueError):
+            read_pipelined(s, [(1, 740)], depth=0)
+
+    def test_gated_on_terminator(self):
+        # Without a buffering adapter, no request goes out while a gauge is answering
+        timing = mock.Timing(turnaround=0.002, adapter_latency=0.002)
+        requests = [(a, 740) for a in range(1, 5)]
+        for buffered, collide in ((False, False), (True, True)):
+            s = HalfDuplexSerial(mock.Bus([mock.PPT100(address=a) for a in range(1, 5)]), "COM1", timing=timing)
+            s.timeout = 0.5
+            r = read_pipelined(s, requests, depth=2, buffered=buffered)
+            self.assertEqual(r.values, {key: 1.0 for key in requests})
+            self.assertEqual(s.collisions > 0, collide)
+
+    def test_dropped_reported(self):
+        inst = pvp.enable_instrumentation()
+        try:
+            s = mock.Serial(mock.PPT100(nonascii=True), "COM1", timeout=1)
+            read_pipelined(s, [(1, 740), (1, 742)], depth=2, valid_char_filter=True)
+        finally:
+            pvp.disable_instrumentation()
+        self.assertGreater(inst.snapshot()[("COM1", 1, 742)]["invalid_chars_dropped"], 0)
+
+    def test_faster_with_adapter_latency(self):
+        timing = mock.Timing(turnaround=0.002, adapter_latency=0.016)
+        durations = {}
+        for depth in (1, 2):
+            bus = mock.Bus([mock.PPT100(address=a) for a in range(1, 5)])
+            s = mock.Serial(bus, "COM1", timing=timing)
+            snap = pvp.BusPoller(s, range(1, 5), timeout=0.5, depth=depth, buffered=True).sweep()
+            self.assertEqual(snap.values, {(a, 740): 1.0 for a in range(1, 5)})
+            durations[depth] = snap.duration
+        self.assertLess(durations[2], durations[1] - 0.03)
+
+
+if __name__ == "__main__":
+    unittest.main()
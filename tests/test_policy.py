@@ -0,0 +1,95 @@
+import asyncio
+import time
+import unittest
+import pfeiffer_vacuum_protocol as pvp
+from pfeiffer_vacuum_protocol import aio, mock
+
+
+class FlakyGauge(mock.PPT100):
+    # Loses the last byte of its first `n_bad` responses
+    def __init__(self, n_bad, **kwargs):
+        super().__init__(**kwargs)
+        self.n_bad = n_bad
+
+    def get_response(self, bin_str):
+        r = super().get_response(bin_str)
+        if self.n_bad > 0:
+            self.n_bad -= 1
+            return r[:-1]
+        return r
+
+
+class TestRetryPolicy(unittest.TestCase):
+    def test_attempt_timeout(self):
+        policy = pvp.RetryPolicy(turnaround=0.02, latency=0.016, slack=1.5)
+        self.assertAlmostEqual(policy.attempt_timeout(9600, 16, 20), 36 * 10 / 9600 * 1.5 + 0.036)
+        self.assertAlmostEqual(policy.attempt_timeout(None, 16, 20), 36 * 10 / 9600 * 1.5 + 0.036)
+        self.assertEqual(pvp.RetryPolicy(timeout=0.2).attempt_timeout(9600, 16, 20), 0.2)
+
+    def test_retries_short_frames(self):
+        s = mock.Serial(FlakyGauge(2), "COM1", timeout=2, timing=mock.Timing())
+        t0 = time.perf_counter()
+        self.assertEqual(pvp.read_pressure(s, 1, policy=pvp.RetryPolicy(retries=2)), 1.0)
+        self.assertLess(time.perf_counter() - t0, 1.0)
+        self.assertEqual(s.n_writes, 3)
+        self.assertEqual(s.timeout, 2)
+
+    def test_timeout_set_once(self):
+        s = mock.Serial(FlakyGauge(2, noise=b"\x00\x01"), "COM1", timeout=2, timing=mock.Timing())
+        policy = pvp.RetryPolicy(retries=2, jitter=0)
+        for _ in range(5):
+            self.assertEqual(pvp.read_pressure(s, 1, policy=policy), 1.0)
+        self.assertEqual(s.n_timeout_sets, 10)
+        self.assertEqual(s.timeout, 2)
+
+    def test_gives_up(self):
+        s = mock.Serial(FlakyGauge(5), "COM1", timeout=2, timing=mock.Timing())
+        with self.assertRaises(ValueError):
+            pvp.read_pressure(s, 1, policy=pvp.RetryPolicy(retries=2))
+        self.assertEqual(s.n_writes, 3)
+
+    def test_retries_checksum(self):
+        bus = mock.Bus([mock.PPT100()], corrupt_rate=0.5, seed=1)
+        s = mock.Serial(bus, "COM1")
+        policy = pvp.RetryPolicy(retries=20, jitter=0)
+        for _ in range(20):
+            self.assertEqual(pvp.read_pressure(s, 1, policy=policy), 1.0)
+        self.assertGreater(bus.faults["corrupted"], 0)
+
+    def test_error_replies_not_retried(self):
+        s = mock.Serial(mock.PPT100(), "COM1")
+        with self.assertRaises(ValueError):
+            pvp.write_pressure_setpoint(s, 1, 5, policy=pvp.RetryPolicy())
+        self.assertEqual(s.n_writes, 1)
+
+        # Still valid with the policy
+        pvp.write_correction_value(s, 1, 1.5, policy=pvp.RetryPolicy())
+
+    def test_timeouts(self):
+        s = mock.Serial(mock.PPT100(silent=True), "COM1")
+        with self.assertRaises(ValueError):
+            pvp.read_pressure(s, 1, policy=pvp.RetryPolicy(retries=2))
+        self.assertEqual(s.n_writes, 1)
+        with self.assertRaises(ValueError):
+            pvp.read_pressure(s, 1, policy=pvp.RetryPolicy(retries=2, retry_timeouts=True, jitter=0))
+        self.assertEqual(s.n_writes, 4)
+
+    def test_port(self):
+        bus = mock.Bus([mock.PPT100()], corrupt_rate=0.5, seed=2)
+        port = pvp.Port(mock.Serial(bus, "COM1"))
+        policy = pvp.RetryPolicy(retries=20, jitter=0)
+        for _ in range(10):
+            self.assertEqual(port.read_pressure(1, policy=policy), 1.0)
+
+    def test_aio(self):
+        async def run():
+            bus = mock.Bus([mock.PPT100()], corrupt_rate=0.5, seed=3)
+            port = await aio.open_mock_connection(mock.Serial(bus, "COM1"))
+            policy = pvp.RetryPolicy(retries=20, jitter=0)
+            values = [await aio.read_pressure(port, 1, policy=policy) for _ in range(10)]
+            port.close()
+            return values, bus.faults["corrupted"]
+
+        values, corrupted = asyncio.run(run())
+        self.assertEqual(values, [1.0] * 10)
+        self.assertGreater(corrupted, 0)
@@ -0,0 +1,58 @@
+import unittest
+import pfeiffer_vacuum_protocol.mock as mock
+import pfeiffer_vacuum_protocol as pvp
+
+
+class TestBusPoller(unittest.TestCase):
+    def test_sweep(self):
+        s = mock.Serial(mock.PPT100(), "COM1")
+        p = pvp.BusPoller(s, [1], [740, 303, 742])
+        snap = p.sweep()
+        self.assertEqual(snap.values, {(1, 740): 1.0, (1, 303): pvp.ErrorCode.NO_ERROR, (1, 742): 1.0})
+        self.assertEqual(snap.errors, {})
+        self.assertGreater(snap.timestamp, 0)
+
+    def test_dead_gauge(self):
+        s = mock.Serial(mock.PPT100(), "COM1")
+        p = pvp.BusPoller(s, [2, 1, 3], [740])
+        snap = p.sweep()
+        self.assertEqual(snap.values, {(1, 740): 1.0})
+        self.assertEqual(set(snap.errors), {(2, 740), (3, 740)})
+
+    def test_many_gauges(self):
+        bus = mock.Bus([mock.PPT100(address=a, silent=a == 7) for a in range(1, 51)])
+        snap = pvp.BusPoller(mock.Serial(bus, "COM1"), range(1, 51), [740, 303]).sweep()
+        self.assertEqual(len(snap.values), 98)
+        self.assertEqual(set(snap.errors), {(7, 740), (7, 303)})
+
+    def test_timeout_restored(self):
+        s = mock.Serial(mock.PPT100(), "COM1", timeout=1.0)
+        pvp.BusPoller(s, [1], timeout=0.05).sweep()
+        self.assertEqual(s.timeout, 1.0)
+        self.assertEqual(s.n_timeout_sets, 2)
+
+    def test_timeout_unchanged(self):
+        s = mock.Serial(mock.PPT100(), "COM1", timeout=0.05)
+        pvp.BusPoller(s, [1], timeout=0.05).sweep()
+        self.assertEqual(s.n_timeout_sets, 0)
+
+    def test_stale_bytes_discarded(self):
+        s = mock.Serial(mock.PPT100(), "COM1")
+        s.write(b"0010074202=?108\r")
+        snap = pvp.BusPoller(s, [1], [740]).sweep()
+        self.assertEqual(snap.values, {(1, 740): 1.0})
+
+    def test_bad_param(self):
+        s = mock.Serial(mock.PPT100(), "COM1")
+        with self.assertRaises(ValueError):
+            pvp.BusPoller(s, [1], [741])
+
+    def test_sweeps(self):
+        s = mock.Serial(mock.PPT100(), "COM1")
+        it = pvp.BusPoller(s, [1]).sweeps(period=0.001)
+        snaps = [next(it) for _ in range(3)]
+        self.assertEqual([x.values[(1, 740)] for x in snaps], [1.0] * 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
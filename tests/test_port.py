@@ -0,0 +1,68 @@
+import threading
+import unittest
+import pfeiffer_vacuum_protocol.mock as mock
+import pfeiffer_vacuum_protocol as pvp
+
+
+def _bus_port(n=8, **kwargs):
+    return pvp.Port(mock.Serial(mock.Bus([mock.PPT100(address=a) for a in range(1, n + 1)]), "COM1"), **kwargs)
+
+
+class TestPort(unittest.TestCase):
+    def test_methods(self):
+        with pvp.Port(mock.Serial(mock.PPT100(), "COM1")) as p:
+            self.assertEqual(p.read_error_code(1), pvp.ErrorCode.NO_ERROR)
+            self.assertEqual(p.read_software_version(1), (1, 1, 0))
+            self.assertEqual(p.read_gauge_type(1), "PPT 100")
+            self.assertEqual(p.read_pressure(1), 1.0)
+            self.assertEqual(p.read_correction_value(1), 1.0)
+            p.write_pressure_setpoint(1, 1)
+            p.write_correction_value(1, 1.0)
+            self.assertEqual(p.stats()["transactions"], 7)
+
+    def test_valid_char_filter(self):
+        pvp.disable_valid_char_filter()
+        p = pvp.Port(mock.Serial(mock.PPT100(nonascii=True), "COM1"), valid_char_filter=True)
+        self.assertEqual(p.read_pressure(1), 1.0)
+        self.assertEqual(p.submit(pvp.read_pressure, 1).result(), 1.0)
+        with self.assertRaises(pvp.InvalidCharError):
+            p.read_pressure(1, valid_char_filter=False)
+        p.close()
+
+    def test_threads(self):
+        p = _bus_port()
+        errors = []
+
+        def worker(addr):
+            for _ in range(200):
+                try:
+                    p.read_pressure(addr)
+                except ValueError as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=worker, args=(a,)) for a in range(1, 9)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(p.stats()["transactions"], 1600)
+
+    def test_submit(self):
+        p = _bus_port()
+        futures = [p.submit(pvp.read_pressure, a) for a in range(1, 9) for _ in range(20)]
+        self.assertEqual([f.result() for f in futures], [1.0] * 160)
+        p.close()
+        stats = p.stats()
+        self.assertEqual(stats["queue_depth"], 0)
+        self.assertGreaterEqual(stats["queue_depth_max"], 1)
+
+    def test_submit_error(self):
+        p = _bus_port()
+        with self.assertRaises(ValueError):
+            p.submit(pvp.read_pressure, 20).result()
+        p.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
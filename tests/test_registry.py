@@ -0,0 +1,107 @@
+import threading
+import time
+import unittest
+import pfeiffer_vacuum_protocol.mock as mock
+import pfeiffer_vacuum_protocol as pvp
+
+
+# Serial port whose adapter can be unplugged
+class UnpluggableSerial(mock.Serial):
+    unplugged = False
+
+    def write(self, output):
+        if self.unplugged:
+            raise OSError("device disconnected")
+        return super().write(output)
+
+
+class Factory:
+    def __init__(self):
+        self.opened = []
+        self.available = True
+
+    def __call__(self, name):
+        if not self.available:
+            raise OSError("no such port {}".format(name))
+        s = UnpluggableSerial(mock.Bus([mock.PPT100(address=1), mock.PPT100(address=2)]), name)
+        self.opened.append(s)
+        return s
+
+
+# Takes a while to open some ports, like an adapter enumerating slowly
+class SlowFactory(Factory):
+    def __call__(self, name):
+        if name == "SLOW":
+            time.sleep(0.3)
+        return super().__call__(name)
+
+
+class TestPortRegistry(unittest.TestCase):
+    def test_shared(self):
+        factory = Factory()
+        with pvp.PortRegistry(factory) as reg:
+            self.assertIs(reg.port("COM1"), reg.port("COM1"))
+            self.assertEqual(reg.gauge("COM1", 1).read_pressure(), 1.0)
+            self.assertEqual(reg.gauge("COM1", 2).read_gauge_type(), "PPT 100")
+            self.assertEqual(reg.gauge("COM2", 1).read_correction_value(), 1.0)
+            self.assertIs(reg.gauge("COM1", 1), reg.gauge("COM1", 1))
+            self.assertEqual([s.port for s in factory.opened], ["COM1", "COM2"])
+
+    def test_gauge_methods(self):
+        with pvp.PortRegistry(Factory()) as reg:
+            g = reg.gauge("COM1", 1)
+            self.assertEqual(g.read_error_code(), pvp.ErrorCode.NO_ERROR)
+            self.assertEqual(g.read_software_version(), (1, 1, 0))
+            g.write_pressure_setpoint(1)
+            g.write_correction_value(1.0)
+
+    def test_slow_open(self):
+        factory = SlowFactory()
+        with pvp.PortRegistry(factory) as reg:
+            reg.port("FAST")
+            threads = [threading.Thread(target=reg.port, args=("SLOW",)) for _ in range(2)]
+            for t in threads:
+                t.start()
+            time.sleep(0.05)
+
+            # Other ports are served while one is opening
+            t0 = time.perf_counter()
+            self.assertEqual(reg.gauge("FAST", 1).read_pressure(), 1.0)
+            self.assertLess(time.perf_counter() - t0, 0.1)
+
+            # And the slow port is only opened once
+            for t in threads:
+                t.join()
+            self.assertEqual([s.port for s in factory.opened], ["FAST", "SLOW"])
+
+    def test_reconnect(self):
+        factory = Factory()
+        reg = pvp.PortRegistry(factory, backoff=0.05)
+        g = reg.gauge("COM1", 1)
+        g.read_pressure()
+
+        # Adapter disappears, the port is dropped and reconnects are held off
+        factory.opened[0].unplugged = True
+        factory.available = False
+        with self.assertRaises(OSError):
+            g.read_pressure()
+        with self.assertRaises(ConnectionError):
+            g.read_pressure()
+
+        # Failed reconnects back off further
+        time.sleep(0.06)
+        with self.assertRaises(OSError):
+            g.read_pressure()
+        self.assertEqual(reg.failures["COM1"][0], 2)
+
+        # And the adapter comes back
+        factory.available = True
+        time.sleep(0.11)
+        self.assertEqual(g.read_pressure(), 1.0)
+        self.assertNotIn("COM1", reg.failures)
+        self.assertEqual(len(factory.opened), 2)
+        reg.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import itertools
+import math
+import unittest
+import pfeiffer_vacuum_protocol as pvp
+from pfeiffer_vacuum_protocol import mock
+
+
+def run_for(sched, n):
+    return list(itertools.islice(sched.readings(), n))
+
+
+class TestAdaptiveScheduler(unittest.TestCase):
+    def test_rates(self):
+        s = mock.Serial(mock.PPT100(), "COM1")
+        sched = pvp.AdaptiveScheduler(s, {(1, 740): 200, (1, 303): 10}, exchange_time=1e-4)
+        readings = run_for(sched, 84)
+        n_303 = sum(r.param == 303 for r in readings)
+        self.assertIn(n_303, range(3, 7))
+        self.assertTrue(all(r.error is None for r in readings))
+        self.assertEqual({r.value for r in readings if r.param == 740}, {1.0})
+
+        stats = sched.stats()
+        self.assertEqual(stats[(1, 740)]["requested"], 200)
+        self.assertEqual(stats[(1, 740)]["allocated"], 200)
+        self.assertGreater(stats[(1, 740)]["achieved"], 100)
+        self.assertEqual(stats[(1, 740)]["reads"] + stats[(1, 303)]["reads"], 84)
+
+    def test_budget(self):
+        # At 9600 baud an exchange takes ~37.5 ms, so two 20 Hz gauges don't fit and starve the low priority task
+        s = mock.Serial(mock.PPT100(), "COM1")
+        tasks = {(1, 740): (20, 1), (2, 740): (20, 1), (1, 303): (1, 0)}
+        sched = pvp.AdaptiveScheduler(s, tasks, budget=0.9)
+        stats = sched.stats()
+        self.assertAlmostEqual(stats[(1, 740)]["allocated"], 12.0)
+        self.assertAlmostEqual(stats[(2, 740)]["allocated"], 12.0)
+        self.assertEqual(stats[(1, 303)]["allocated"], 0.0)
+        self.assertAlmostEqual(sched.utilization(), 0.9)
+
+    def test_backoff(self):
+        bus = mock.Bus([mock.PPT100(address=1), mock.PPT100(address=2, silent=True)])
+        s = mock.Serial(bus, "COM1", timeout=1)
+        sched = pvp.AdaptiveScheduler(s, {(1, 740): 100, (2, 740): 100}, fail_threshold=2, exchange_time=1e-4)
+        readings = run_for(sched, 40)
+        dead = [r for r in readings if r.addr == 2]
+        self.assertTrue(all(r.error is not None for r in dead))
+        self.assertLess(len(dead), 10)
+        self.assertGreater(sched.backoff(2), 1)
+        self.assertEqual(sched.backoff(1), 1)
+        self.assertEqual(s.timeout, 1)
+
+    def test_recovery(self):
+        bus = mock.Bus([mock.PPT100(address=1), mock.PPT100(address=2, silent=True)])
+        s = mock.Serial(bus, "COM1", timeout=1)
+        sched = pvp.AdaptiveScheduler(s, {(1, 740): 1000, (2, 740): 1000}, fail_threshold=2, exchange_time=1e-4)
+        readings = sched.readings()
+        for _ in readings:
+            if sched.backoff(2) >= 4:
+                break
+        self.assertLess(sched.stats()[(2, 740)]["allocated"], 1000)
+
+        # The gauge answers again, its next read restores the full rate
+        bus.devices[2].silent = False
+        recovered = next(r for r in readings if r.addr == 2)
+        self.assertIsNone(recovered.error)
+        self.assertEqual(recovered.value, 1.0)
+        self.assertEqual(sched.backoff(2), 1)
+        self.assertEqual(sched.stats()[(2, 740)]["allocated"], 1000)
+        readings = run_for(sched, 20)
+        self.assertGreater(sum(r.addr == 2 for r in readings), 5)
+        self.assertTrue(all(r.error is None for r in readings))
+
+    def test_timeout_set_once(self):
+        s = mock.Serial(mock.PPT100(), "COM1", timeout=1)
+        sched = pvp.AdaptiveScheduler(s, {(1, 740): 1000}, exchange_time=1e-4)
+        readings = sched.readings()
+        for _ in range(10):
+            next(readings)
+        self.assertEqual(s.timeout, 0.1)
+        readings.close()
+        self.assertEqual(s.timeout, 1)
+        self.assertEqual(s.n_timeout_sets, 2)
+
+    def test_history(self):
+        history = pvp.PressureHistory(capacity=10)
+        s = mock.Serial(mock.PPT100(), "COM1")
+        sched = pvp.AdaptiveScheduler(s, {(1, 740): 1000, (1, 349): 1000}, exchange_time=1e-4, history=history)
+        run_for(sched, 6)
+        self.assertEqual(history.count("COM1", 1), 3)
+        _, pressures, _ = history.last("COM1", 1)
+        self.assertFalse(any(math.isnan(p) for p in pressures))
+
+    def test_bad_tasks(self):
+        s = mock.Serial(mock.PPT100(), "COM1")
+        with self.assertRaises(ValueError):
+            pvp.AdaptiveScheduler(s, {(1, 741): 1})
+        with self.assertRaises(ValueError):
+            pvp.AdaptiveScheduler(s, {(1, 740): 0})
+        with self.assertRaises(ValueError):
+            pvp.AdaptiveScheduler(s, {(1, 740): 1}, budget=0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,149 @@
+import asyncio
+import threading
+import time
+import unittest
+import pfeiffer_vacuum_protocol as pvp
+from pfeiffer_vacuum_protocol import mock
+from pfeiffer_vacuum_protocol.singleflight import AsyncSingleFlight, Coalescer, SingleFlight
+
+
+def _threads(n, fn):
+    results = [None] * n
+    start = threading.Barrier(n)
+
+    def run(i):
+        start.wait()
+        try:
+            results[i] = fn()
+        except Exception as e:
+            results[i] = e
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+class TestSingleFlight(unittest.TestCase):
+    def test_shared(self):
+        sf = SingleFlight()
+        calls = []
+
+        def slow():
+            calls.append(1)
+            time.sleep(0.05)
+            return len(calls)
+
+        self.assertEqual(_threads(10, lambda: sf.call("k", slow)), [1] * 10)
+        self.assertEqual(sf.stats(), {"calls": 1, "shared": 9, "hits": 0})
+
+        # Nothing is kept without a max age
+        self.assertEqual(sf.call("k", slow), 2)
+
+    def test_max_age(self):
+        sf = SingleFlight(max_age=0.05)
+        self.assertEqual(sf.call("k", lambda: 1), 1)
+        self.assertEqual(sf.call("k", lambda: 2), 1)
+        self.assertEqual(sf.call("j", lambda: 3), 3)
+        time.sleep(0.06)
+        self.assertEqual(sf.call("k", lambda: 4), 4)
+        self.assertEqual(sf.hits, 1)
+
+    def test_errors(self):
+        sf = SingleFlight(max_age=10.0)
+
+        def fail():
+            time.sleep(0.05)
+            raise ValueError("gauge response too short to be valid")
+
+        results = _threads(5, lambda: sf.call("k", fail))
+        self.assertTrue(all(isinstance(r, ValueError) for r in results))
+        self.assertEqual(sf.calls, 1)
+        self.assertEqual(sf.call("k", lambda: 1), 1)
+
+    def test_barrier(self):
+        sf = SingleFlight(max_age=10.0)
+        sf.call(("a", 1), lambda: 1)
+        sf.call(("b", 1), lambda: 1)
+        with sf.barrier(lambda key: key[0] == "a"):
+            # Made during the barrier, so not kept after it
+            self.assertEqual(sf.call(("a", 1), lambda: 2), 2)
+        self.assertEqual(sf.call(("a", 1), lambda: 3), 3)
+        self.assertEqual(sf.call(("b", 1), lambda: 3), 1)
+
+    def test_barrier_detaches_flight(self):
+        sf = SingleFlight(max_age=10.0)
+        started = threading.Event()
+
+        def slow():
+            started.set()
+            time.sleep(0.05)
+            return "old"
+
+        t = threading.Thread(target=sf.call, args=("k", slow))
+        t.start()
+        started.wait()
+        with sf.barrier():
+            pass
+        self.assertEqual(sf.call("k", lambda: "new"), "new")
+        t.join()
+        self.assertEqual(sf.call("k", lambda: "newer"), "new")
+
+
+class TestAsyncSingleFlight(unittest.IsolatedAsyncioTestCase):
+    async def test_shared(self):
+        sf = AsyncSingleFlight()
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return len(calls)
+
+        self.assertEqual(await asyncio.gather(*(sf.call("k", slow) for _ in range(5))), [1] * 5)
+        self.assertEqual(sf.stats(), {"calls": 1, "shared": 4, "hits": 0})
+
+    async def test_cancel(self):
+        sf = AsyncSingleFlight()
+
+        async def slow():
+            await asyncio.sleep(0.01)
+            return 1
+
+        first = asyncio.ensure_future(sf.call("k", slow))
+        second = asyncio.ensure_future(sf.call("k", slow))
+        await asyncio.sleep(0)
+        first.cancel()
+        self.assertEqual(await second, 1)
+        self.assertEqual(sf.flights, {})
+
+
+class TestCoalescer(unittest.TestCase):
+    def test_read_pressure(self):
+        s = mock.Serial(mock.PPT100(), "COM1", timeout=1, timing=mock.Timing())
+        c = Coalescer(s)
+        self.assertEqual(_threads(10, lambda: c.read_pressure(1)), [1.0] * 10)
+        self.assertEqual(s.n_writes, 1)
+
+    def test_write_barrier(self):
+        s = mock.Serial(mock.PPT100(), "COM1")
+        c = Coalescer(pvp.Port(s), max_age=10.0)
+        self.assertEqual(c.read_pressure(1), 1.0)
+        self.assertEqual(c.read_correction_value(1), 1.0)
+        self.assertEqual(c.read_pressure(1), 1.0)
+        self.assertEqual(s.n_writes, 2)
+
+        # Writing any parameter of a gauge drops what was read from it
+        c.write_correction_value(1, 1.5)
+        self.assertEqual(c.read_pressure(1), 1.0)
+        self.assertEqual(s.n_writes, 4)
+        with self.assertRaises(ValueError):
+            c.write_pressure_setpoint(1, 5)
+        self.assertEqual(c.read_gauge_type(1), "PPT 100")
+        self.assertEqual(c.stats()["hits"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,56 @@
+import itertools
+import time
+import unittest
+import pfeiffer_vacuum_protocol.mock as mock
+import pfeiffer_vacuum_protocol as pvp
+from pfeiffer_vacuum_protocol import aio
+
+
+def _serial():
+    return mock.Serial(mock.Bus([mock.PPT100(address=1), mock.PPT100(address=2)]), "COM1")
+
+
+class TestStreamPressure(unittest.TestCase):
+    def test_samples(self):
+        samples = list(itertools.islice(pvp.stream_pressure(_serial(), [1, 2, 3], rate=1000), 6))
+        self.assertEqual([x.addr for x in samples], [1, 2, 3, 1, 2, 3])
+        self.assertEqual([x.pressure for x in samples], [1.0, 1.0, None] * 2)
+        self.assertIsInstance(samples[2].error, ValueError)
+
+    def test_port(self):
+        samples = list(itertools.islice(pvp.stream_pressure(pvp.Port(_serial()), [1], rate=1000), 3))
+        self.assertEqual([x.pressure for x in samples], [1.0] * 3)
+
+    def test_rate(self):
+        t0 = time.perf_counter()
+        samples = list(itertools.islice(pvp.stream_pressure(_serial(), [1], rate=200), 21))
+        self.assertGreaterEqual(time.perf_counter() - t0, 0.1)
+        self.assertEqual(sum(x.skipped for x in samples), 0)
+
+    def test_backpressure(self):
+        it = pvp.stream_pressure(_serial(), [1], rate=1000, max_lag=1)
+        next(it)
+        time.sleep(0.02)
+        x = next(it)
+        self.assertGreaterEqual(x.skipped, 10)
+        self.assertEqual(next(it).skipped, 0)
+
+    def test_bad_rate(self):
+        with self.assertRaises(ValueError):
+            next(pvp.stream_pressure(_serial(), [1], rate=0))
+
+
+class TestAsyncStreamPressure(unittest.IsolatedAsyncioTestCase):
+    async def test_samples(self):
+        port = await aio.open_mock_connection(_serial(), timeout=0.01)
+        samples = []
+        async for x in pvp.astream_pressure(port, [1, 3], rate=500):
+            samples.append(x)
+            if len(samples) == 4:
+                break
+        self.assertEqual([x.pressure for x in samples], [1.0, None, 1.0, None])
+        port.close()
+
+
+if __name__ == "__main__":
+    unittest.main()